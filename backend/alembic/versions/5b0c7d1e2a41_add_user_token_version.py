@@ -0,0 +1,27 @@
+"""add user token_version
+
+Revision ID: 5b0c7d1e2a41
+Revises: 28210de8f66a
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0c7d1e2a41'
+down_revision: str | None = '28210de8f66a'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'token_version')
@@ -0,0 +1,31 @@
+"""add seed checksum
+
+Revision ID: 7d4e9a2c5f18
+Revises: 5b0c7d1e2a41
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e9a2c5f18'
+down_revision: str | None = '5b0c7d1e2a41'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table('seedchecksum',
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('checksum', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('seedchecksum')
@@ -0,0 +1,53 @@
+"""native uuid columns
+
+Revision ID: 9a3f6c2d8b57
+Revises: 7d4e9a2c5f18
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3f6c2d8b57'
+down_revision: str | None = '7d4e9a2c5f18'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+TABLES = ('user', 'exercise', 'exerciselog', 'workout', 'workoutexercise')
+
+
+def _convert_sqlite_values(table_name: str, convert) -> None:
+    # SQLite columns keep whatever is stored in them, so only the values need converting.
+    connection = op.get_bind()
+    table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('uuid'))
+    rows = connection.execute(sa.select(table.c.id, table.c.uuid).where(table.c.uuid != None)).all()
+    values = [{'row_id': row_id, 'new_uuid': convert(value)} for row_id, value in rows]
+    if values:
+        connection.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id')).values(uuid=sa.bindparam('new_uuid')),
+            values
+        )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in TABLES:
+            op.alter_column(table, 'uuid', type_=postgresql.UUID(as_uuid=True), postgresql_using='uuid::uuid')
+    else:
+        for table in TABLES:
+            _convert_sqlite_values(table, lambda value: value if isinstance(value, bytes) else UUID(value).bytes)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in TABLES:
+            op.alter_column(table, 'uuid', type_=sa.VARCHAR(length=36), postgresql_using='uuid::text')
+    else:
+        for table in TABLES:
+            _convert_sqlite_values(table, lambda value: str(UUID(bytes=value)) if isinstance(value, bytes) else value)
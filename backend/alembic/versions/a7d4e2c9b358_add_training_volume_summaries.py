@@ -0,0 +1,49 @@
+"""add training volume summaries
+
+Revision ID: a7d4e2c9b358
+Revises: f2c6b8d3e519
+Create Date: 2026-10-18 20:00:00.000000
+
+Run `python rebuild_volume.py` after upgrading to backfill the summaries from existing logs.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4e2c9b358'
+down_revision: str | None = 'f2c6b8d3e519'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table('dailyexercisevolume',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('sets', sa.Integer(), nullable=False),
+    sa.Column('reps', sa.Integer(), nullable=False),
+    sa.Column('tonnage', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercise.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'exercise_id')
+    )
+    op.create_table('weeklymusclevolume',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('major_muscle_id', sa.Integer(), nullable=False),
+    sa.Column('sets', sa.Integer(), nullable=False),
+    sa.Column('reps', sa.Integer(), nullable=False),
+    sa.Column('tonnage', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['major_muscle_id'], ['majormuscle.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'week_start', 'major_muscle_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('weeklymusclevolume')
+    op.drop_table('dailyexercisevolume')
@@ -0,0 +1,26 @@
+"""add user data version
+
+Revision ID: b4e1d7a9c302
+Revises: 9a3f6c2d8b57
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e1d7a9c302'
+down_revision: str | None = '9a3f6c2d8b57'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'data_version')
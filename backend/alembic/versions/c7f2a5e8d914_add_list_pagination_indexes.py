@@ -0,0 +1,31 @@
+"""add list pagination indexes
+
+Revision ID: c7f2a5e8d914
+Revises: b4e1d7a9c302
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f2a5e8d914'
+down_revision: str | None = 'b4e1d7a9c302'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_exercise_user_id_name', 'exercise', ['user_id', 'name'], unique=False)
+    op.create_index('ix_exerciselog_user_id_datetime_completed', 'exerciselog', ['user_id', 'datetime_completed', 'id'], unique=False)
+    op.create_index('ix_workoutexercise_user_id_id', 'workoutexercise', ['user_id', 'id'], unique=False)
+    op.create_index('ix_workout_user_id_name', 'workout', ['user_id', 'name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workout_user_id_name', table_name='workout')
+    op.drop_index('ix_workoutexercise_user_id_id', table_name='workoutexercise')
+    op.drop_index('ix_exerciselog_user_id_datetime_completed', table_name='exerciselog')
+    op.drop_index('ix_exercise_user_id_name', table_name='exercise')
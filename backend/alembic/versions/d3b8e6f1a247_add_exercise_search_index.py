@@ -0,0 +1,33 @@
+"""add exercise search index
+
+Revision ID: d3b8e6f1a247
+Revises: c7f2a5e8d914
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b8e6f1a247'
+down_revision: str | None = 'c7f2a5e8d914'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # SQLite searches an in-process index built from the exercise catalog instead.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "CREATE INDEX ix_exercise_search ON exercise USING gin "
+        "((setweight(to_tsvector('english', name), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B')))"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_exercise_search', table_name='exercise')
@@ -0,0 +1,25 @@
+"""add exercise log exercise index
+
+Revision ID: e5a9c1d4f736
+Revises: d3b8e6f1a247
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c1d4f736'
+down_revision: str | None = 'd3b8e6f1a247'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_exerciselog_user_id_exercise_id_datetime_completed', 'exerciselog', ['user_id', 'exercise_id', 'datetime_completed', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_exerciselog_user_id_exercise_id_datetime_completed', table_name='exerciselog')
@@ -0,0 +1,54 @@
+"""add delta sync columns
+
+Revision ID: f2c6b8d3e519
+Revises: e5a9c1d4f736
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence
+
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6b8d3e519'
+down_revision: str | None = 'e5a9c1d4f736'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+SYNCED_TABLES = ('exerciselog', 'workout', 'workoutexercise')
+
+
+def upgrade() -> None:
+    # Existing rows count as changed now. SQLite can only add a NOT NULL column with a constant
+    # default, and the application always sets the value itself, so only Postgres drops it again.
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=' ')
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=now))
+        if postgres:
+            op.alter_column(table, 'updated_at', server_default=None)
+        op.create_index(f'ix_{table}_user_id_updated_at', table, ['user_id', 'updated_at'], unique=False)
+    uuid_type = postgresql.UUID(as_uuid=True) if postgres else sa.BINARY(16)
+    op.create_table('deletedrecord',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('uuid', uuid_type, nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_deletedrecord_user_id_kind_deleted_at', 'deletedrecord', ['user_id', 'kind', 'deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_deletedrecord_user_id_kind_deleted_at', table_name='deletedrecord')
+    op.drop_table('deletedrecord')
+    for table in reversed(SYNCED_TABLES):
+        op.drop_index(f'ix_{table}_user_id_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
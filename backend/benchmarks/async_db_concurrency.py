@@ -0,0 +1,82 @@
+"""Compare request throughput of a blocking Session against an AsyncSession.
+
+Every request runs one query that takes ``--latency`` seconds, standing in for the round trip
+to a remote Postgres. With the blocking Session the query holds up the event loop, so
+concurrent requests are served one at a time. With the AsyncSession they overlap.
+
+    python benchmarks/async_db_concurrency.py --requests 50 --concurrency 25
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+def register_sleep(dbapi_connection, connection_record):
+    dbapi_connection.create_function("sleep", 1, lambda seconds: time.sleep(seconds) or seconds)
+
+
+def build_app(database_path: str, latency: float) -> FastAPI:
+    engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False}, poolclass=NullPool)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    event.listen(engine, "connect", register_sleep)
+    event.listen(async_engine.sync_engine, "connect", register_sleep)
+    query = text("SELECT sleep(:latency)").bindparams(latency=latency)
+
+    def get_sync_db():
+        with Session(engine) as session:
+            yield session
+
+    async def get_async_db():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_route(session: Session = Depends(get_sync_db)):
+        return {"value": session.exec(query).scalar()}
+
+    @app.get("/async")
+    async def async_route(session: AsyncSession = Depends(get_async_db)):
+        return {"value": (await session.exec(query)).scalar()}
+
+    return app
+
+
+async def run(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    limit = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        async def call():
+            async with limit:
+                response = await client.get(path)
+                response.raise_for_status()
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds each query takes")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(os.path.join(directory, "benchmark.db"), args.latency)
+        for label, path in [("Session (before)", "/sync"), ("AsyncSession (after)", "/async")]:
+            elapsed = asyncio.run(run(app, path, args.requests, args.concurrency))
+            print(f"{label:<22} {args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measure how long a fresh worker takes to import the app and answer its first request.
+
+Each run starts a new interpreter, times ``import main``, starts the app lifespan and sends
+one request that reaches the database. POSTGRES_URL is always a throwaway SQLite file that
+is created and seeded once before the runs.
+
+    python benchmarks/startup_time.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import asyncio, json, time
+started = time.perf_counter()
+import httpx
+import main
+imported = time.perf_counter()
+
+async def first_request():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await client.post("/users/login", data={"username": "benchmark", "password": "benchmark"})
+        return ready, time.perf_counter()
+
+ready, answered = asyncio.run(first_request())
+print(json.dumps({"import": imported - started, "lifespan": ready - imported, "first_request": answered - ready, "total": answered - started}))
+"""
+
+PREPARE = """
+from sqlmodel import create_engine
+import db
+db.setup_database(create_engine(db.postgres_url))
+"""
+
+
+def run(code: str, env: dict[str, str]) -> str:
+    return subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        # The throwaway database always wins over an exported POSTGRES_URL, so PREPARE never touches a real one.
+        env = {
+            "SECRET_KEY": "benchmark", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+            **os.environ,
+            "POSTGRES_URL": f"sqlite:///{os.path.join(directory, 'startup.db')}",
+        }
+        run(PREPARE, env)
+        results = [json.loads(run(WORKER, env).splitlines()[-1]) for _ in range(args.runs)]
+    for phase in ("import", "lifespan", "first_request", "total"):
+        timings = [result[phase] * 1000 for result in results]
+        print(f"{phase:<14} median {statistics.median(timings):8.1f}ms   min {min(timings):8.1f}ms   max {max(timings):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,128 @@
-import json
+import os
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
 from decouple import config
+from fastapi import Request
 from sqlmodel import SQLModel, create_engine, Session, select
 from sqlite3 import Connection as SQLite3Connection
-from sqlalchemy import event, inspect, Engine
+from sqlalchemy import event, inspect, Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models.relationship_merge import (
     ExerciseLog, Exercise, ExerciseSpecificMuscleLink, WorkoutExercise, Workout, User, 
     WorkoutCategory, MovementCategory, BandColor, MajorMuscle, SpecificMuscle,
     Equipment, UserRoleLink, Role
 )
-        
-def setup_database(engine: Engine):
-    if not inspect(engine).get_table_names():
-        SQLModel.metadata.create_all(engine)
-        populate_initial_category_items(engine)
+from utilities.catalog_seed import SeedReport, seed_catalog
+from utilities.pool_metrics import TimedQueuePool, pool_metrics
+from utilities.read_routing import PRIMARY_ENGINE, READ_METHODS, get_request_user_key, read_your_writes
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic")
+
+def migrate_database(engine: Engine) -> None:
+    """Let the migrations own the schema. The initial migration does not create the tables, so an
+    empty database gets them from the models and is stamped at the latest revision instead."""
+    alembic_config = AlembicConfig()
+    alembic_config.set_main_option("script_location", ALEMBIC_DIR)
+    with engine.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        if inspect(connection).get_table_names():
+            command.upgrade(alembic_config, "head")
+        else:
+            SQLModel.metadata.create_all(connection)
+            command.stamp(alembic_config, "head")
 
-def populate_initial_category_items(engine: Engine):
-    with open("exercise_json/new_exercise_json.json", 'r') as file:
-        exercise_data = json.load(file)
-    with Session(engine) as session:
-        # Bulk insert setup data if not exists
-        for model, key in [(WorkoutCategory, "workoutCategory"), (MovementCategory, "movementCategory"), 
-                           (MajorMuscle, "majorMuscle"), (Equipment, "equipment")]:
-            existing_items = {item.name: item for item in session.exec(select(model)).all()}
-            new_items = set(exercise[key].title() for exercise in exercise_data)
-            for item in new_items:
-                if item not in existing_items:
-                    session.add(model(name=item))
-        for model, key in [(SpecificMuscle, "specificMuscles")]:
-            existing_items = {item.name: item for item in session.exec(select(model)).all()}
-            new_items = set(specific_muscle.title() for exercise in exercise_data for specific_muscle in exercise[key])
-            for item in new_items:
-                if item not in existing_items:
-                    session.add(model(name=item))
-        roles = {"User", "Admin"}
-        for role in roles:
-            if not session.exec(select(Role).where(Role.name == role)).first():
-                session.add(Role(name=role)) 
-        band_colors = {"Yellow", "Red", "Green", "Black", "Purple", "Green", "Orange", "Gray"}  # Use set for uniqueness
-        existing_colors = {color.name for color in session.exec(select(BandColor))}
-        session.add_all(BandColor(name=color) for color in band_colors if color not in existing_colors)
-        
-        session.commit()
+def setup_database(engine: Engine, force_seed: bool = False) -> SeedReport:
+    migrate_database(engine)
+    return seed_catalog(engine, force=force_seed)
 
-def populate_exercise_data(engine: Engine):
-    with open("exercise_json/new_exercise_json.json", 'r') as file:
-        exercise_data = json.load(file)
-    with Session(bind=engine) as session:
-        for exercise in exercise_data:
-            if session.exec(select(Exercise).where(Exercise.name == exercise["name"].title())).first():
-                break
-            name = exercise["name"].title()
-            description = " ".join(exercise["description"])
-            image_url = exercise.get("gifUrl", None)
-            
-            workout_category_name = exercise.get("workoutCategory", "").title()
-            movement_category_name = exercise.get("movementCategory", "").title()
-            major_muscle_name = exercise.get("majorMuscle", "").title()
-            equipment_name = exercise.get("equipment", "").title()
-            specific_muscles = exercise.get("specificMuscles", [])
-            
-            workout_category_id = session.exec(select(WorkoutCategory).where(WorkoutCategory.name == workout_category_name)).first().id
-            movement_category_id = session.exec(select(MovementCategory).where(MovementCategory.name == movement_category_name)).first().id
-            major_muscle_id = session.exec(select(MajorMuscle).where(MajorMuscle.name == major_muscle_name)).first().id
-            equipment_id = session.exec(select(Equipment).where(Equipment.name == equipment_name)).first().id
-            specific_muscles = [specific_muscle.title() for specific_muscle in specific_muscles]
-            
-            new_exercise = Exercise.model_validate({"name":name, "description":description, "image_url":image_url, "workout_category_id":workout_category_id, "movement_category_id":movement_category_id, "major_muscle_id":major_muscle_id, "equipment_id":equipment_id})
-            session.add(new_exercise)
-            session.commit()
-            session.refresh(new_exercise)
-            for specific_muscle in specific_muscles:
-                specific_muscle_id = session.exec(select(SpecificMuscle.id).where(SpecificMuscle.name == specific_muscle)).first()
-                session.add(ExerciseSpecificMuscleLink(exercise_id=new_exercise.id, specific_muscle_id=specific_muscle_id))
-            session.commit()
+def seed_database(force_seed: bool = False) -> SeedReport:
+    """Migrate the database and seed the catalog with a short-lived sync engine."""
+    engine = create_engine(postgres_url, echo=False)
+    try:
+        return setup_database(engine, force_seed)
+    finally:
+        engine.dispose()
+
+def get_async_url(url: str | URL) -> URL:
+    """Swap the sync driver in a database URL for its asyncio counterpart (asyncpg / aiosqlite)."""
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+def get_pool_options(url: str | URL) -> dict[str, type | int | float | bool]:
+    """Pool settings for ``url``. In-memory SQLite uses a single static connection, which takes none."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
 
 # Engine setting and event listening setup
 
 postgres_url = config("POSTGRES_URL")
-engine = create_engine(postgres_url, echo=False)
+replica_url = config("POSTGRES_REPLICA_URL", default=None)
+SEED_ON_STARTUP = config("SEED_ON_STARTUP", default=False, cast=bool)
+DB_POOL_SIZE = int(config("DB_POOL_SIZE", default=5))
+DB_MAX_OVERFLOW = int(config("DB_MAX_OVERFLOW", default=10))
+DB_POOL_TIMEOUT = float(config("DB_POOL_TIMEOUT", default=30))
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", default=True, cast=bool)
+DB_POOL_RECYCLE = int(config("DB_POOL_RECYCLE", default=1800))
+async_engine: AsyncEngine | None = None
+replica_async_engine: AsyncEngine | None = None
 
-setup_database(engine)
-populate_exercise_data(engine)
+def get_async_engine() -> AsyncEngine:
+    global async_engine
+    if async_engine is None:
+        async_engine = create_async_engine(get_async_url(postgres_url), echo=False, **get_pool_options(postgres_url))
+        pool_metrics.watch(async_engine)
+    return async_engine
 
+def get_replica_engine() -> AsyncEngine | None:
+    """Engine for the read replica, or None when POSTGRES_REPLICA_URL is not set."""
+    global replica_async_engine
+    if replica_async_engine is None and replica_url:
+        replica_async_engine = create_async_engine(get_async_url(replica_url), echo=False, **get_pool_options(replica_url))
+        pool_metrics.watch(replica_async_engine)
+    return replica_async_engine
 
+async def dispose_async_engine():
+    global async_engine, replica_async_engine
+    for engine in (async_engine, replica_async_engine):
+        if engine is not None:
+            await engine.dispose()
+    async_engine = None
+    replica_async_engine = None
 
+def get_request_engine(request: Request) -> AsyncEngine:
+    """Send reads to the replica, unless the user wrote within the read-your-writes window,
+    and everything else to the primary."""
+    replica_engine = get_replica_engine()
+    if replica_engine is None:
+        return get_async_engine()
+    user_key = get_request_user_key(request)
+    if request.method in READ_METHODS:
+        return replica_engine if read_your_writes.use_replica(user_key) else get_async_engine()
+    read_your_writes.record_write(user_key)
+    return get_async_engine()
 
-def get_db():
-    with Session(bind=engine) as session:
+async def get_db(request: Request):
+    engine = get_request_engine(request)
+    info = {PRIMARY_ENGINE: get_async_engine()} if engine is replica_async_engine else {}
+    async with AsyncSession(engine, expire_on_commit=False, info=info) as session:
         yield session
-
-            
\ No newline at end of file
+    if request.method not in READ_METHODS and replica_async_engine is not None:
+        read_your_writes.record_write(get_request_user_key(request))
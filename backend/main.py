@@ -1,29 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, HTTPException 
 from fastapi.middleware.cors import CORSMiddleware
-from pyngrok import ngrok
-
-from db import engine, SQLModel
-from routes import authorization, exercises, users, workouts, workout_exercises, exercise_logs
 
-app = FastAPI()
+from db import SEED_ON_STARTUP, get_async_engine, get_replica_engine, dispose_async_engine, seed_database
+from routes import authorization, exercises, users, workouts, workout_exercises, exercise_logs, metrics, reference_data, analytics
 
 origins = ["https://gym-app-mike-frontend.onrender.com", "http://localhost:3000"]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-
-)
-
-app.include_router(authorization.router, tags=["Authorization"])
-app.include_router(exercises.router, tags=["Exercises"])
-app.include_router(workouts.router, tags=["Workouts"]) 
-app.include_router(users.router, tags=["Users"])
-app.include_router(exercise_logs.router, tags=["Exercise Logs"])
-app.include_router(workout_exercises.router, tags=["Workout Exercises"])
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if SEED_ON_STARTUP:
+        await asyncio.to_thread(seed_database)
+    get_async_engine()
+    get_replica_engine()
+    yield
+    await dispose_async_engine()
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+
+    )
+
+    app.include_router(authorization.router, tags=["Authorization"])
+    app.include_router(exercises.router, tags=["Exercises"])
+    app.include_router(workouts.router, tags=["Workouts"]) 
+    app.include_router(users.router, tags=["Users"])
+    app.include_router(exercise_logs.router, tags=["Exercise Logs"])
+    app.include_router(workout_exercises.router, tags=["Workout Exercises"])
+    app.include_router(metrics.router, tags=["Metrics"])
+    app.include_router(reference_data.router, tags=["Reference Data"])
+    app.include_router(analytics.router, tags=["Analytics"])
+    return app
+
+app = create_app()
 
 
 # Uncomment to force HTTPS
@@ -35,6 +53,7 @@ app.include_router(workout_exercises.router, tags=["Workout Exercises"])
 
 # if __name__ == "__main__":
 #     # # Setup ngrok
+#     # from pyngrok import ngrok
 #     # ngrok_tunnel = ngrok.connect(8000)
 #     # print("Public URL:", ngrok_tunnel.public_url)
 #     # Run Uvicorn
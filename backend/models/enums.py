@@ -10,6 +10,27 @@ class HeightUnits(str, Enum):
 class Gender(str, Enum):
     MALE = "male"
     FEMALE = "female"
+
+class ReferenceDataKind(str, Enum):
+    WORKOUT_CATEGORIES = "workout-categories"
+    MOVEMENT_CATEGORIES = "movement-categories"
+    MAJOR_MUSCLES = "major-muscles"
+    SPECIFIC_MUSCLES = "specific-muscles"
+    EQUIPMENT = "equipment"
+    BAND_COLORS = "band-colors"
+
+class SyncKind(str, Enum):
+    EXERCISE_LOG = "exercise_log"
+    WORKOUT = "workout"
+    WORKOUT_EXERCISE = "workout_exercise"
+
+class FacetMatch(str, Enum):
+    ANY = "any"
+    ALL = "all"
+
+class OneRepMaxFormula(str, Enum):
+    EPLEY = "epley"
+    BRZYCKI = "brzycki"
     
 # class WorkoutCategory(str, Enum):
 #     UPPER = "Upper"
@@ -2,21 +2,31 @@ from uuid import UUID
 from uuid import uuid4 as new_uuid
 from datetime import datetime
 
+from pydantic import field_validator
 from sqlmodel import SQLModel, Field, Column, ForeignKey, Integer
 
 from utilities.guid import GUID
+from utilities.timestamps import as_naive_utc, utcnow
 
 class ExerciseLogBase(SQLModel):
     datetime_completed: datetime
     reps: int
     weight: float
 
+    @field_validator("datetime_completed")
+    @classmethod
+    def datetime_completed_as_naive_utc(cls, value: datetime | None) -> datetime | None:
+        return as_naive_utc(value)
+
 class ExerciseLogTableBase(ExerciseLogBase): 
     id: int | None = Field(default=None, primary_key=True, index=True)
     uuid: UUID | None = Field(default_factory=new_uuid, sa_column=Column(GUID(), unique=True,  index=True))
     user_id: int | None = Field(default=None, sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), index=True))
     exercise_id: int | None = Field(default=None, sa_column=Column(Integer, ForeignKey("exercise.id", ondelete="CASCADE"), index=True))
+    updated_at: datetime = Field(default_factory=utcnow, sa_column_kwargs={"default": utcnow, "onupdate": utcnow, "nullable": False})
     
+MAX_BULK_EXERCISE_LOGS = 500
+
 class ExerciseLogCreateReq(ExerciseLogBase):
     exercise_uuid: UUID
 
@@ -1,10 +1,14 @@
 from uuid import UUID
-from sqlmodel import SQLModel, Relationship, Field, Column, Integer, ForeignKey
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlmodel import SQLModel, Relationship, Field, Column, Integer, ForeignKey, Index
 from models.user import UserTableBase
 from models.exercise import ExerciseTableBase
 from models.exercise_log import ExerciseLogTableBase
 from models.workout_exercise import WorkoutExerciseTableBase
 from models.workout import WorkoutTableBase
+from utilities.guid import GUID
+from utilities.timestamps import utcnow
 
 class WorkoutExerciseWorkoutOrderLink(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True, index=True)
@@ -34,7 +38,16 @@ class ExerciseSpecificMuscleLink(SQLModel, table=True):
         if isinstance(other, ExerciseSpecificMuscleLink):
             return (self.exercise_id == other.exercise_id and self.specific_muscle_id == other.specific_muscle_id)
 
+# Weighted full-text document of an exercise. Searches must use this exact expression for
+# Postgres to answer them from the GIN index.
+EXERCISE_SEARCH_VECTOR = "(setweight(to_tsvector('english', name), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B'))"
+
 class Exercise(ExerciseTableBase, table=True):
+    __table_args__ = (
+        Index("ix_exercise_user_id_name", "user_id", "name"),
+        Index("ix_exercise_search", text(EXERCISE_SEARCH_VECTOR), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
     workout_category: 'WorkoutCategory' = Relationship(back_populates="exercises")
     movement_category: 'MovementCategory' = Relationship(back_populates="exercises")
     major_muscle: 'MajorMuscle' = Relationship(back_populates="exercises")
@@ -45,6 +58,12 @@ class Exercise(ExerciseTableBase, table=True):
     user: 'User' = Relationship(back_populates="exercises")
 
 class ExerciseLog(ExerciseLogTableBase, table=True):
+    __table_args__ = (
+        Index("ix_exerciselog_user_id_datetime_completed", "user_id", "datetime_completed", "id"),
+        Index("ix_exerciselog_user_id_exercise_id_datetime_completed", "user_id", "exercise_id", "datetime_completed", "id"),
+        Index("ix_exerciselog_user_id_updated_at", "user_id", "updated_at"),
+    )
+
     user: 'User' = Relationship(back_populates="exercise_logs")
     exercise: 'Exercise' = Relationship(back_populates="exercise_logs")
     
@@ -54,11 +73,52 @@ class User(UserTableBase, table=True):
     exercises: list['Exercise'] = Relationship(back_populates="user")
 
 class WorkoutExercise(WorkoutExerciseTableBase, table=True):
+    __table_args__ = (
+        Index("ix_workoutexercise_user_id_id", "user_id", "id"),
+        Index("ix_workoutexercise_user_id_updated_at", "user_id", "updated_at"),
+    )
+
     workout: list['Workout'] = Relationship(back_populates="workout_exercises", link_model=WorkoutExerciseWorkoutOrderLink)
 
 class Workout(WorkoutTableBase, table=True):
+    __table_args__ = (
+        Index("ix_workout_user_id_name", "user_id", "name", "id"),
+        Index("ix_workout_user_id_updated_at", "user_id", "updated_at"),
+    )
+
     workout_exercises: list['WorkoutExercise'] = Relationship(back_populates="workout", link_model=WorkoutExerciseWorkoutOrderLink)
 
+class DeletedRecord(SQLModel, table=True):
+    """Tombstone of a deleted exercise log, workout or workout exercise, so delta syncs can
+    tell clients to drop it."""
+    __table_args__ = (Index("ix_deletedrecord_user_id_kind_deleted_at", "user_id", "kind", "deleted_at"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False))
+    kind: str
+    uuid: UUID = Field(sa_column=Column(GUID(), nullable=False))
+    deleted_at: datetime = Field(default_factory=utcnow)
+
+class DailyExerciseVolume(SQLModel, table=True):
+    """Sets, reps and tonnage (reps x weight) a user logged of one exercise on one day.
+    Kept in step with the exercise logs inside the transactions that write them."""
+    user_id: int = Field(sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True))
+    day: date = Field(primary_key=True)
+    exercise_id: int = Field(sa_column=Column(Integer, ForeignKey("exercise.id", ondelete="CASCADE"), primary_key=True))
+    sets: int
+    reps: int
+    tonnage: float
+
+class WeeklyMuscleVolume(SQLModel, table=True):
+    """Sets, reps and tonnage a user logged for one major muscle in the ISO week starting on ``week_start`` (a Monday).
+    Logs of exercises without a major muscle are only counted in DailyExerciseVolume."""
+    user_id: int = Field(sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True))
+    week_start: date = Field(primary_key=True)
+    major_muscle_id: int = Field(sa_column=Column(Integer, ForeignKey("majormuscle.id", ondelete="CASCADE"), primary_key=True))
+    sets: int
+    reps: int
+    tonnage: float
+
 class Role(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True, index=True)
     name: str = Field(unique=True, index=True, unique_items=True)
@@ -1,11 +1,12 @@
+from datetime import date, datetime
 from uuid import UUID
 from sqlmodel import SQLModel
+from models.enums import OneRepMaxFormula
 from models.exercise_log import ExerciseLogBase
 from models.exercise import ExerciseBase 
 from models.workout_exercise import WorkoutExerciseBase
 from models.workout import WorkoutBase
 from models.user import UserBase
-from models.relationship_merge import Exercise
 
 
 class ExerciseResponseData(ExerciseBase):
@@ -17,26 +18,22 @@ class ExerciseResponseData(ExerciseBase):
     specific_muscles: list[str] | None
     image_url: str | None
 
-    @classmethod
-    def from_orm(cls, db_obj: Exercise):
-        return cls(
-            uuid = db_obj.uuid,
-            name = db_obj.name,
-            description = db_obj.description,
-            workout_category = db_obj.workout_category.name if db_obj.workout_category else None,
-            movement_category = db_obj.movement_category.name if db_obj.movement_category else None,
-            equipment = db_obj.equipment.name if db_obj.equipment else None,
-            major_muscle = db_obj.major_muscle.name if db_obj.major_muscle else None,
-            specific_muscles = [specific_muscle.name for specific_muscle in db_obj.specific_muscles],
-            image_url = db_obj.image_url
-        )
-
 class ExerciseResponse(SQLModel):
     data: ExerciseResponseData
     detail: str
 
 class ExerciseListResponse(SQLModel):
     data: list[ExerciseResponseData]
+    next_cursor: str | None = None
+    facets: dict[str, dict[str, int]] | None = None
+    detail: str
+
+class ExerciseSuggestion(SQLModel):
+    uuid: UUID
+    name: str
+
+class ExerciseSuggestionListResponse(SQLModel):
+    data: list[ExerciseSuggestion]
     detail: str
 
 class ExerciseLogResponseData(ExerciseLogBase):
@@ -49,6 +46,77 @@ class ExerciseLogResponse(SQLModel):
 
 class ExerciseLogListResponse(SQLModel):
     data: list[ExerciseLogResponseData]
+    next_cursor: str | None = None
+    deleted: list[UUID] | None = None
+    sync_token: str | None = None
+    detail: str
+
+class BulkItemError(SQLModel):
+    index: int
+    detail: str
+
+class ExerciseLogBulkResponse(SQLModel):
+    data: list[ExerciseLogResponseData]
+    errors: list[BulkItemError]
+    detail: str
+
+class BestSet(SQLModel):
+    datetime_completed: datetime
+    reps: int
+    weight: float
+    estimated_1rm: float
+
+class RepRecords(SQLModel):
+    reps: list[int]
+    weight: list[float]
+    datetime_completed: list[datetime]
+
+class AnalyticsSeries(SQLModel):
+    period_start: list[date]
+    sets: list[int]
+    reps: list[int]
+    volume: list[float]
+    best_estimated_1rm: list[float | None]
+
+class DailyAnalyticsSeries(AnalyticsSeries):
+    trend: list[float | None]
+
+class ExerciseAnalyticsResponseData(SQLModel):
+    exercise_uuid: UUID
+    formula: OneRepMaxFormula
+    trend_days: int
+    total_sets: int
+    total_reps: int
+    total_volume: float
+    best_set: BestSet | None
+    rep_records: RepRecords
+    daily: DailyAnalyticsSeries
+    weekly: AnalyticsSeries
+
+class ExerciseAnalyticsResponse(SQLModel):
+    data: ExerciseAnalyticsResponseData
+    detail: str
+
+class DailyVolume(SQLModel):
+    day: date
+    exercise_uuid: UUID
+    sets: int
+    reps: int
+    tonnage: float
+
+class DailyVolumeListResponse(SQLModel):
+    data: list[DailyVolume]
+    detail: str
+
+class WeeklyVolume(SQLModel):
+    week_start: date
+    major_muscle: str
+    sets: int
+    reps: int
+    tonnage: float
+
+class WeeklyVolumeListResponse(SQLModel):
+    data: list[WeeklyVolume]
     detail: str
 
 class WorkoutExerciseResponseData(WorkoutExerciseBase):
@@ -62,6 +130,9 @@ class WorkoutExerciseResponse(SQLModel):
     
 class WorkoutExerciseListResponse(SQLModel):
     data: list[WorkoutExerciseResponseData] 
+    next_cursor: str | None = None
+    deleted: list[UUID] | None = None
+    sync_token: str | None = None
     detail: str
 
 class WorkoutResponseData(WorkoutBase):
@@ -74,6 +145,9 @@ class WorkoutResponse(SQLModel):
 
 class WorkoutListResponse(SQLModel):
     data: list[WorkoutResponseData]
+    next_cursor: str | None = None
+    deleted: list[UUID] | None = None
+    sync_token: str | None = None
     detail: str
 
 class UserResponseData(UserBase):
@@ -87,4 +161,29 @@ class UserResponse(SQLModel):
 
 class UserListResponse(SQLModel):
     data: list[UserResponseData]
+    next_cursor: str | None = None
+    detail: str
+
+class MetricsResponse(SQLModel):
+    data: dict[str, int | float]
+    detail: str
+
+class DatabasePoolMetricsResponse(SQLModel):
+    data: dict[str, dict[str, int | float]]
+    detail: str
+
+class ReferenceOptionsResponse(SQLModel):
+    data: list[str]
+    detail: str
+
+class ReferenceDataResponseData(SQLModel):
+    workout_categories: list[str]
+    movement_categories: list[str]
+    major_muscles: list[str]
+    specific_muscles: list[str]
+    equipment: list[str]
+    band_colors: list[str]
+
+class ReferenceDataResponse(SQLModel):
+    data: ReferenceDataResponseData
     detail: str
@@ -0,0 +1,6 @@
+from sqlmodel import SQLModel, Field
+
+
+class SeedChecksum(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    checksum: str
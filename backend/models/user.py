@@ -4,7 +4,7 @@ from uuid import UUID
 from uuid import uuid4 as new_uuid
 
 from pydantic import field_validator, ConfigDict
-from sqlmodel import SQLModel, Field, Enum as SQLEnum, Column, Relationship
+from sqlmodel import SQLModel, Field, Enum as SQLEnum, Column, Relationship, Integer
 
 from utilities.guid import GUID
 from utilities.hashed_password import HashedPassword
@@ -41,6 +41,8 @@ class UserTableBase(UserBase):
     uuid: UUID | None = Field(default_factory=new_uuid, sa_column=Column(GUID(), unique=True, index=True))
     username: str = Field(unique=True)
     hashed_password: str = Field(sa_column=Column(HashedPassword())) 
+    token_version: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    data_version: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
 
     Config: ClassVar = ConfigDict(arbitrary_types_allowed=True, json_encoders= {HashedPassword: lambda v: str(v)})
 
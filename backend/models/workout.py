@@ -1,5 +1,6 @@
 from uuid import UUID
 from uuid import uuid4 as new_uuid
+from datetime import datetime
 
 from sqlmodel import (
     SQLModel, Field, Relationship,
@@ -7,6 +8,7 @@ from sqlmodel import (
     )
 
 from utilities.guid import GUID
+from utilities.timestamps import utcnow
 
 class WorkoutBase(SQLModel):
     name: str
@@ -15,6 +17,7 @@ class WorkoutTableBase(WorkoutBase):
     id: int | None = Field(default=None, primary_key=True)
     uuid: UUID | None = Field(default_factory=new_uuid, sa_column=Column(GUID(), unique=True, index=True))
     user_id: int = Field(default=None, sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), index=True))
+    updated_at: datetime = Field(default_factory=utcnow, sa_column_kwargs={"default": utcnow, "onupdate": utcnow, "nullable": False})
 class WorkoutCreateReq(WorkoutBase):
     pass
 class WorkoutPatchReq(WorkoutBase):
@@ -1,9 +1,11 @@
 from uuid import UUID
 from uuid import uuid4 as new_uuid
+from datetime import datetime
 
 from sqlmodel import SQLModel, Field, Enum as SQLEnum, Column, ForeignKey, Relationship, Integer
 
 from utilities.guid import GUID
+from utilities.timestamps import utcnow
 
 
 class WorkoutExerciseBase(SQLModel):
@@ -16,6 +18,7 @@ class WorkoutExerciseTableBase(WorkoutExerciseBase):
     uuid: UUID | None = Field(default_factory=new_uuid, sa_column=Column(GUID(), unique=True, index=True))
     exercise_id: int | None = Field(default=None, sa_column=Column(Integer, ForeignKey("exercise.id", ondelete="CASCADE"), index=True))
     user_id: int | None = Field(default=None, sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), index=True))
+    updated_at: datetime = Field(default_factory=utcnow, sa_column_kwargs={"default": utcnow, "onupdate": utcnow, "nullable": False})
     
 
 class WorkoutExerciseCreateReq(WorkoutExerciseBase):
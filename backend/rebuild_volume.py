@@ -0,0 +1,36 @@
+"""Rebuild the daily and weekly training-volume summaries from the exercise logs.
+
+    python rebuild_volume.py                    # every user
+    python rebuild_volume.py --user alice --user bob
+"""
+import argparse
+import logging
+
+from sqlmodel import Session, create_engine, select
+
+from db import postgres_url
+from models.relationship_merge import User
+from utilities.training_volume import rebuild_training_volume
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user", action="append", dest="usernames", metavar="USERNAME", help="only rebuild this user's summaries (repeatable)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = create_engine(postgres_url, echo=False)
+    try:
+        with Session(engine) as session:
+            user_ids = None
+            if args.usernames:
+                user_ids = session.exec(select(User.id).where(User.username.in_(args.usernames))).all()
+                if len(user_ids) != len(set(args.usernames)):
+                    parser.error(f"Unknown users in {sorted(set(args.usernames))}")
+            summarized = rebuild_training_volume(session, user_ids)
+        logging.info("Rebuilt training volume from %d exercise logs.", summarized)
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
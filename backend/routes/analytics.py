@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+from uuid import UUID
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status, Depends, Security
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import get_db
+from models.enums import OneRepMaxFormula
+from models.relationship_merge import DailyExerciseVolume, Exercise, ExerciseLog, MajorMuscle, User, WeeklyMuscleVolume
+from models.responses import DailyVolume, DailyVolumeListResponse, ExerciseAnalyticsResponse, ExerciseAnalyticsResponseData, WeeklyVolume, WeeklyVolumeListResponse
+from utilities.analytics import analyze, load_exercise_history
+from utilities.authorization import check_roles, get_current_user
+from utilities.exercise_catalog import exercise_catalog
+from utilities.timestamps import NaiveUTCDatetime, utcnow
+from utilities.training_volume import MAX_VOLUME_RANGE_DAYS, week_start
+from utilities.user_data_version import conditional_user_list
+
+router = APIRouter()
+
+def volume_range(from_: date | None, to: date | None, default_days: int) -> tuple[date, date]:
+    """``from`` is inclusive and ``to`` exclusive, like the exercise log filters. Defaults to the last ``default_days`` days."""
+    to = to or utcnow().date() + timedelta(days=1)
+    from_ = from_ or to - timedelta(days=default_days)
+    if from_ > to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'.")
+    if (to - from_).days > MAX_VOLUME_RANGE_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"The range must not span more than {MAX_VOLUME_RANGE_DAYS} days.")
+    return from_, to
+
+@router.get("/users/me/analytics/exercises/{exercise_uuid}", response_model=ExerciseAnalyticsResponse, status_code=status.HTTP_200_OK, tags=["User"])
+@check_roles(["User"])
+async def get_exercise_analytics(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, exercise_uuid: UUID, from_: Annotated[NaiveUTCDatetime | None, Query(alias="from", description="Only logs completed at or after this time")] = None, to: Annotated[NaiveUTCDatetime | None, Query(description="Only logs completed before this time")] = None, formula: OneRepMaxFormula = OneRepMaxFormula.EPLEY, trend_days: Annotated[int, Query(ge=1, le=365, description="Days averaged by the rolling estimated 1RM trend")] = 28, session: AsyncSession = Depends(get_db)) -> ExerciseAnalyticsResponse:
+    if from_ is not None and to is not None and from_ > to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'.")
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    exercise_id = await exercise_catalog.exercise_id(exercise_uuid, session)
+    if not exercise_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {exercise_uuid} not found.")
+    filters = []
+    if from_ is not None:
+        filters.append(ExerciseLog.datetime_completed >= from_)
+    if to is not None:
+        filters.append(ExerciseLog.datetime_completed < to)
+    history = await load_exercise_history(session, current_user.id, exercise_id, filters)
+    data = ExerciseAnalyticsResponseData(exercise_uuid=exercise_uuid, **analyze(history, formula, trend_days))
+    return ExerciseAnalyticsResponse(data=data, detail="Exercise analytics fetched successfully.")
+
+@router.get("/users/me/analytics/volume/daily", response_model=DailyVolumeListResponse, status_code=status.HTTP_200_OK, tags=["User"])
+@check_roles(["User"])
+async def get_daily_volume(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, from_: Annotated[date | None, Query(alias="from", description="First day, defaults to 30 days before 'to'")] = None, to: Annotated[date | None, Query(description="Day after the last one, defaults to tomorrow (UTC)")] = None, exercise_uuid: UUID | None = None, session: AsyncSession = Depends(get_db)) -> DailyVolumeListResponse:
+    from_, to = volume_range(from_, to, 30)
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    statement = (
+        select(DailyExerciseVolume.day, Exercise.uuid, DailyExerciseVolume.sets, DailyExerciseVolume.reps, DailyExerciseVolume.tonnage)
+        .join(Exercise, Exercise.id == DailyExerciseVolume.exercise_id)
+        .where(DailyExerciseVolume.user_id == current_user.id, DailyExerciseVolume.day >= from_, DailyExerciseVolume.day < to)
+        .order_by(DailyExerciseVolume.day, Exercise.name, Exercise.id)
+    )
+    if exercise_uuid is not None:
+        exercise_id = await exercise_catalog.exercise_id(exercise_uuid, session)
+        if not exercise_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {exercise_uuid} not found.")
+        statement = statement.where(DailyExerciseVolume.exercise_id == exercise_id)
+    data = [
+        DailyVolume(day=day, exercise_uuid=uuid, sets=sets, reps=reps, tonnage=round(tonnage, 2))
+        for day, uuid, sets, reps, tonnage in (await session.exec(statement)).all()
+    ]
+    return DailyVolumeListResponse(data=data, detail="Daily volume fetched successfully.")
+
+@router.get("/users/me/analytics/volume/weekly", response_model=WeeklyVolumeListResponse, status_code=status.HTTP_200_OK, tags=["User"])
+@check_roles(["User"])
+async def get_weekly_volume(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, from_: Annotated[date | None, Query(alias="from", description="A day of the first ISO week, defaults to 12 weeks before 'to'")] = None, to: Annotated[date | None, Query(description="Weeks starting on or after this day are left out, defaults to tomorrow (UTC)")] = None, session: AsyncSession = Depends(get_db)) -> WeeklyVolumeListResponse:
+    from_, to = volume_range(from_, to, 12 * 7)
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    rows = (await session.exec(
+        select(WeeklyMuscleVolume.week_start, MajorMuscle.name, WeeklyMuscleVolume.sets, WeeklyMuscleVolume.reps, WeeklyMuscleVolume.tonnage)
+        .join(MajorMuscle, MajorMuscle.id == WeeklyMuscleVolume.major_muscle_id)
+        .where(WeeklyMuscleVolume.user_id == current_user.id, WeeklyMuscleVolume.week_start >= week_start(from_), WeeklyMuscleVolume.week_start < to)
+        .order_by(WeeklyMuscleVolume.week_start, MajorMuscle.name)
+    )).all()
+    data = [
+        WeeklyVolume(week_start=week, major_muscle=major_muscle, sets=sets, reps=reps, tonnage=round(tonnage, 2))
+        for week, major_muscle, sets, reps, tonnage in rows
+    ]
+    return WeeklyVolumeListResponse(data=data, detail="Weekly volume fetched successfully.")
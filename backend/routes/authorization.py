@@ -2,7 +2,7 @@ import datetime as dt
 from typing import Annotated
 from fastapi import Depends, APIRouter, Security
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from db import get_db
 from models.relationship_merge import User
 from utilities.authorization import ACCESS_TOKEN_EXPIRE_MINUTES,Token, create_access_token, authenticate_user, get_current_user, check_roles
@@ -10,8 +10,8 @@ from utilities.authorization import ACCESS_TOKEN_EXPIRE_MINUTES,Token, create_ac
 router = APIRouter()
 
 @router.post("/users/login", response_model=Token)
-async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], session: Session = Depends(get_db)):
-    user = authenticate_user(form_data.username, form_data.password, session)
+async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], session: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(form_data.username, form_data.password, session)
     access_token_expires = dt.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": str(user.uuid), "iat": dt.datetime.now(dt.UTC), "scopes": form_data.scopes}, expires_delta=access_token_expires)
+    access_token = create_access_token(user, scopes=form_data.scopes, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,114 +1,178 @@
-from uuid import UUID
-from typing import Annotated
-from functools import lru_cache
+from datetime import datetime
+from uuid import UUID, uuid4
+from typing import Annotated, Any, Sequence
 
-from fastapi import APIRouter, HTTPException, status, Depends, Security
-from sqlmodel import Session, select
+from fastapi import APIRouter, Body, HTTPException, Query, Request, Response, status, Depends, Security
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from db import engine, get_db
+from db import get_db
 
-from models.exercise_log import ExerciseLogCreateReq, ExerciseLogPatchReq
+from models.enums import SyncKind
+from models.exercise_log import MAX_BULK_EXERCISE_LOGS, ExerciseLogCreateReq, ExerciseLogPatchReq
 
-from models.responses import ExerciseLogResponseData, ExerciseLogResponse, ExerciseLogListResponse, ExerciseResponseData
+from models.responses import BulkItemError, ExerciseLogBulkResponse, ExerciseLogResponseData, ExerciseLogResponse, ExerciseLogListResponse, ExerciseResponseData
 from models.relationship_merge import Exercise, ExerciseLog, User
 from utilities.authorization import check_roles, get_current_user
+from utilities.exercise_loader import load_exercise, load_exercise_fields_by_id, load_exercises_for_ids
+from utilities.exercise_catalog import exercise_catalog
+from utilities.fieldsets import FieldSelection, field_selection, sparse_response
+from utilities.pagination import PageParams
+from utilities.sync import SyncParams, record_deletions
+from utilities.timestamps import NaiveUTCDatetime
+from utilities.training_volume import LoggedSet, apply_volume_changes
+from utilities.user_data_version import conditional_user_list, record_user_write
 
 
 router = APIRouter()
 
-@lru_cache(maxsize=128)
-def get_all_exercise_logs_cached(current_user: User, session: Session) -> list[ExerciseLogResponseData]:
-    exercise_logs = session.exec(select(ExerciseLog).where(ExerciseLog.user_id == current_user.id)).all()
-    data = []
-    for exercise_log in exercise_logs:
-        exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise_log.exercise))
-        data.append(ExerciseLogResponseData.model_validate(exercise_log, update={"exercise": exercise_data, "user_uuid": current_user.uuid}))
-    return data
+exercise_log_fields = field_selection(ExerciseLogResponseData, nested_exercise=True)
+
+async def get_all_exercise_logs_data(current_user: User, session: AsyncSession, page: PageParams, fields: FieldSelection = FieldSelection(), filters: Sequence[Any] = ()) -> tuple[list[ExerciseLogResponseData] | list[dict], str | None]:
+    columns = fields.columns(ExerciseLog, ExerciseLog.id, ExerciseLog.datetime_completed, ExerciseLog.exercise_id) if fields.sparse else [ExerciseLog]
+    statement = page.apply(
+        select(*columns).where(ExerciseLog.user_id == current_user.id, *filters),
+        ExerciseLog.datetime_completed, ExerciseLog.id, converters=(datetime.fromisoformat, int)
+    )
+    exercise_logs, next_cursor = page.page((await session.exec(statement)).all(), lambda exercise_log: (exercise_log.datetime_completed, exercise_log.id))
+    if fields.sparse:
+        exercise_ids = {exercise_log.exercise_id for exercise_log in exercise_logs}
+        exercises = await load_exercise_fields_by_id(session, fields.exercise_fields, Exercise.id.in_(exercise_ids)) if exercise_ids and fields.includes("exercise") else {}
+        return [fields.row_data(exercise_log, exercise=exercises.get(exercise_log.exercise_id)) for exercise_log in exercise_logs], next_cursor
+    exercises = await load_exercises_for_ids(session, (exercise_log.exercise_id for exercise_log in exercise_logs))
+    return [ExerciseLogResponseData.model_validate(exercise_log, update={"exercise": exercises[exercise_log.exercise_id]}) for exercise_log in exercise_logs], next_cursor
 
 @router.get("/users/me/exercise_logs", response_model=ExerciseLogListResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def get_all_exercise_logs(current_user: Annotated[User, Security(get_current_user)], session: Session = Depends(get_db)) -> ExerciseLogListResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    data = get_all_exercise_logs_cached(current_user, session)
-    return ExerciseLogListResponse(data=data, detail="Exercise Logs fetched successfully.")
+async def get_all_exercise_logs(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, page: Annotated[PageParams, Depends()], fields: Annotated[FieldSelection, Depends(exercise_log_fields)], sync: Annotated[SyncParams, Depends()], from_: Annotated[NaiveUTCDatetime | None, Query(alias="from", description="Only logs completed at or after this time")] = None, to: Annotated[NaiveUTCDatetime | None, Query(description="Only logs completed before this time")] = None, exercise_uuid: UUID | None = None, session: AsyncSession = Depends(get_db)) -> ExerciseLogListResponse:
+    if from_ is not None and to is not None and from_ > to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must not be after 'to'.")
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    filters = sync.changed(ExerciseLog.updated_at)
+    if from_ is not None:
+        filters.append(ExerciseLog.datetime_completed >= from_)
+    if to is not None:
+        filters.append(ExerciseLog.datetime_completed < to)
+    if exercise_uuid is not None:
+        exercise_id = await exercise_catalog.exercise_id(exercise_uuid, session)
+        if not exercise_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {exercise_uuid} not found.")
+        filters.append(ExerciseLog.exercise_id == exercise_id)
+    data, next_cursor = await get_all_exercise_logs_data(current_user, session, page, fields, filters)
+    deleted = await sync.deleted(session, current_user.id, SyncKind.EXERCISE_LOG)
+    if fields.sparse:
+        return sparse_response(response, data, "Exercise Logs fetched successfully.", next_cursor=next_cursor, deleted=deleted, sync_token=sync.token)
+    return ExerciseLogListResponse(data=data, next_cursor=next_cursor, deleted=deleted, sync_token=sync.token, detail="Exercise Logs fetched successfully.")
 
 @router.get("/users/me/exercise_logs/{exercise_log_uuid:uuid}", response_model=ExerciseLogResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def get_specific_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, session: Session = Depends(get_db)) -> ExerciseLogResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise_log = session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid).where(ExerciseLog.user_id == current_user.id)).first()
+async def get_specific_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, session: AsyncSession = Depends(get_db)) -> ExerciseLogResponse:
+    exercise_log = (await session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid).where(ExerciseLog.user_id == current_user.id))).first()
     if exercise_log is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise log UUID: {exercise_log_uuid} does not exist for user UUID: {current_user.uuid}.")
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise_log.exercise))
+    exercise_data = await load_exercise(session, exercise_log.exercise_id)
     data = ExerciseLogResponseData.model_validate(exercise_log, update={"exercise": exercise_data, "user_uuid": current_user.uuid})
     return ExerciseLogResponse(data=data, detail="Exercise log fetched successfully.")
 
 @router.post("/users/me/exercise_logs", response_model=ExerciseLogResponse, status_code=status.HTTP_201_CREATED, tags=["User"])
 @check_roles(["User"])
-async def create_exercise_log(current_user: Annotated[User, Security(get_current_user)], create_exercise_log_request: ExerciseLogCreateReq, session: Session = Depends(get_db)) -> ExerciseLogResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise = session.exec(select(Exercise).where(Exercise.uuid == create_exercise_log_request.exercise_uuid)).first()
-    if not exercise:
+async def create_exercise_log(current_user: Annotated[User, Security(get_current_user)], create_exercise_log_request: ExerciseLogCreateReq, session: AsyncSession = Depends(get_db)) -> ExerciseLogResponse:
+    exercise_id = await exercise_catalog.exercise_id(create_exercise_log_request.exercise_uuid, session)
+    if not exercise_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {create_exercise_log_request.exercise_uuid} not found.")
     exercise_log = ExerciseLog.model_validate(create_exercise_log_request.model_dump())
-    exercise_log.user = current_user
-    exercise_log.exercise = exercise
+    exercise_log.user_id = current_user.id
+    exercise_log.exercise_id = exercise_id
     session.add(exercise_log)
-    session.commit()
-    session.refresh(exercise_log)
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise_log.exercise))
+    await apply_volume_changes(session, added=[LoggedSet.from_log(exercise_log)])
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(exercise_log)
+    exercise_data = await load_exercise(session, exercise_log.exercise_id)
     data = ExerciseLogResponseData.model_validate(exercise_log, update={"exercise": exercise_data})
-    get_all_exercise_logs_cached.cache_clear()
     return ExerciseLogResponse(data=data, detail="Exercise log created successfully.")
 
+@router.post("/users/me/exercise_logs/bulk", response_model=ExerciseLogBulkResponse, status_code=status.HTTP_201_CREATED, tags=["User"])
+@check_roles(["User"])
+async def create_exercise_logs(current_user: Annotated[User, Security(get_current_user)], create_exercise_log_requests: Annotated[list[ExerciseLogCreateReq], Body(min_length=1, max_length=MAX_BULK_EXERCISE_LOGS)], session: AsyncSession = Depends(get_db)) -> ExerciseLogBulkResponse:
+    """Create the logs of a whole session in one transaction. Logs referencing an unknown
+    exercise are reported in ``errors`` by their position and the rest are still created."""
+    exercise_ids = await exercise_catalog.exercise_ids({request.exercise_uuid for request in create_exercise_log_requests}, session)
+    rows, errors = [], []
+    for index, request in enumerate(create_exercise_log_requests):
+        exercise_id = exercise_ids.get(request.exercise_uuid)
+        if exercise_id is None:
+            errors.append(BulkItemError(index=index, detail=f"Exercise UUID: {request.exercise_uuid} not found."))
+            continue
+        rows.append({**request.model_dump(exclude={"exercise_uuid"}), "uuid": uuid4(), "user_id": current_user.id, "exercise_id": exercise_id})
+    data = []
+    if rows:
+        # RETURNING makes SQLAlchemy batch the rows into multi-row INSERTs ("insertmanyvalues")
+        # instead of one statement per log. The uuids are generated here, so the ids go unused.
+        await session.exec(insert(ExerciseLog.__table__).returning(ExerciseLog.__table__.c.id), params=rows)
+        await apply_volume_changes(session, added=[LoggedSet(row["user_id"], row["exercise_id"], row["datetime_completed"], row["reps"], row["weight"]) for row in rows])
+        record_user_write(current_user)
+        await session.commit()
+        exercises = await load_exercises_for_ids(session, (row["exercise_id"] for row in rows))
+        data = [
+            ExerciseLogResponseData.model_validate(row, update={"exercise": exercises[row["exercise_id"]]})
+            for row in rows
+        ]
+    return ExerciseLogBulkResponse(data=data, errors=errors, detail=f"{len(data)} exercise logs created, {len(errors)} failed.")
+
 @router.put("/users/me/exercise_logs/{exercise_log_uuid:uuid}", response_model=ExerciseLogResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def update_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, create_exercise_log_request: ExerciseLogCreateReq, session: Session = Depends(get_db)) -> ExerciseLogResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise_log = session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid).where(ExerciseLog.user_id == current_user.id)).first()
+async def update_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, create_exercise_log_request: ExerciseLogCreateReq, session: AsyncSession = Depends(get_db)) -> ExerciseLogResponse:
+    exercise_log = (await session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid).where(ExerciseLog.user_id == current_user.id))).first()
     if not exercise_log:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise log UUID: {exercise_log_uuid} not found.")
-    exercise = session.exec(select(Exercise).where(Exercise.uuid == create_exercise_log_request.exercise_uuid)).first()
-    if not exercise:
+    exercise_id = await exercise_catalog.exercise_id(create_exercise_log_request.exercise_uuid, session)
+    if not exercise_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {create_exercise_log_request.exercise_uuid} not found.")
+    before = LoggedSet.from_log(exercise_log)
     for attr, value in create_exercise_log_request.model_dump(exclude={"exercise_uuid"}).items():
         setattr(exercise_log, attr, value)
-    exercise_log.exercise = exercise
-    session.commit()
-    session.refresh(exercise_log)
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise_log.exercise))
+    exercise_log.exercise_id = exercise_id
+    await apply_volume_changes(session, removed=[before], added=[LoggedSet.from_log(exercise_log)])
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(exercise_log)
+    exercise_data = await load_exercise(session, exercise_log.exercise_id)
     data = ExerciseLogResponseData.model_validate(exercise_log, update={"exercise": exercise_data})
-    get_all_exercise_logs_cached.cache_clear()
     return ExerciseLogResponse(data=data, detail="Exercise log updated successfully.")
 
 @router.patch("/users/me/exercise_logs/{exercise_log_uuid:uuid}", response_model=ExerciseLogResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def patch_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, patch_exercise_log_request: ExerciseLogPatchReq, session: Session = Depends(get_db)) -> ExerciseLogResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise_log = session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid)).first()
+async def patch_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, patch_exercise_log_request: ExerciseLogPatchReq, session: AsyncSession = Depends(get_db)) -> ExerciseLogResponse:
+    exercise_log = (await session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid).where(ExerciseLog.user_id == current_user.id))).first()
     if not exercise_log:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise log UUID: {exercise_log_uuid} not found.")
+    before = LoggedSet.from_log(exercise_log)
     if patch_exercise_log_request.exercise_uuid:
-        exercise = session.exec(select(Exercise).where(Exercise.uuid == patch_exercise_log_request.exercise_uuid)).first()
-        if not exercise: 
+        exercise_id = await exercise_catalog.exercise_id(patch_exercise_log_request.exercise_uuid, session)
+        if not exercise_id: 
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {patch_exercise_log_request.exercise_uuid} not found.")
-        exercise_log.exercise = exercise
+        exercise_log.exercise_id = exercise_id
     for attr, value in patch_exercise_log_request.model_dump(exclude_unset=True, exclude={"exercise_uuid"}).items():
         setattr(exercise_log, attr, value)
-    session.commit()
-    session.refresh(exercise_log)
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise_log.exercise))
+    await apply_volume_changes(session, removed=[before], added=[LoggedSet.from_log(exercise_log)])
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(exercise_log)
+    exercise_data = await load_exercise(session, exercise_log.exercise_id)
     data = ExerciseLogResponseData.model_validate(exercise_log, update={"exercise": exercise_data})
-    get_all_exercise_logs_cached.cache_clear()
     return ExerciseLogResponse(data=data, detail="Exercise log updated successfully.")
 
 @router.delete("/users/me/exercise_logs/{exercise_log_uuid:uuid}", status_code=status.HTTP_204_NO_CONTENT, tags=["User"])
 @check_roles(["User"])
-async def delete_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, session: Session = Depends(get_db)):
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise_log = session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid)).first()
+async def delete_exercise_log(current_user: Annotated[User, Security(get_current_user)], exercise_log_uuid: UUID, session: AsyncSession = Depends(get_db)):
+    exercise_log = (await session.exec(select(ExerciseLog).where(ExerciseLog.uuid == exercise_log_uuid).where(ExerciseLog.user_id == current_user.id))).first()
     if not exercise_log:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise Log UUID: {exercise_log_uuid} not found.")
-    session.delete(exercise_log)
-    session.commit()
-    get_all_exercise_logs_cached.cache_clear()
\ No newline at end of file
+    await record_deletions(session, SyncKind.EXERCISE_LOG, [(exercise_log.user_id, exercise_log.uuid)])
+    await apply_volume_changes(session, removed=[LoggedSet.from_log(exercise_log)])
+    await session.delete(exercise_log)
+    record_user_write(current_user)
+    await session.commit()
\ No newline at end of file
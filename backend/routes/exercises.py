@@ -1,228 +1,244 @@
 
 from uuid import UUID
 from typing import Annotated
-from functools import lru_cache
-from fastapi import APIRouter, HTTPException, status, Depends, Security
-from sqlmodel import Session, select, or_ 
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status, Depends, Security
+from sqlalchemy import func, literal_column
+from sqlmodel import select, delete, or_ 
+from sqlmodel.ext.asyncio.session import AsyncSession
 from routes.authorization import get_current_user
 
 
-from db import engine, get_db
+from db import get_db
 
 from models.exercise import ExerciseCreateReq, ExercisePatchReq
 
-from models.responses import ExerciseResponse, ExerciseListResponse, ExerciseResponseData
+from models.responses import ExerciseResponse, ExerciseListResponse, ExerciseResponseData, ExerciseSuggestion, ExerciseSuggestionListResponse
 
-from models.relationship_merge import ExerciseSpecificMuscleLink, WorkoutCategory, MovementCategory, MajorMuscle, SpecificMuscle, Equipment, Exercise, User
+from models.enums import SyncKind
+from models.relationship_merge import EXERCISE_SEARCH_VECTOR, ExerciseSpecificMuscleLink, Exercise, ExerciseLog, User, WorkoutExercise
 
 from utilities.authorization import check_roles
+from utilities.exercise_catalog import exercise_catalog
+from utilities.exercise_loader import build_exercise_data, exercise_sort_key, load_category_maps, load_exercise, load_exercise_fields_by_id, load_exercises_for_ids
+from utilities.facets import FacetFilters
+from utilities.fieldsets import FieldSelection, field_selection, sparse_response
+from utilities.pagination import MAX_PAGE_SIZE, PageParams
+from utilities.reference_data import reference_data
+from utilities.sync import record_deletions, touch_rows_embedding_exercise, touch_workouts_containing
+from utilities.training_volume import move_exercise_volume, remove_exercise_volume
+from utilities.user_data_version import conditional_user_list, record_user_write
 
 router = APIRouter()
 
-@lru_cache(maxsize=128)
-def get_all_exercises_cached(current_user: User, session: Session) -> list[ExerciseResponseData]:
-    exercises = session.exec(select(Exercise).where(or_(Exercise.user_id == current_user.id, Exercise.user_id == None))).all()
-    data = [ExerciseResponseData.from_orm(exercise) for exercise in exercises]
-    data.sort(key=lambda exercise: exercise.name)
-    return data
-
-@lru_cache(maxsize=128)
-def get_user_created_exercises_cached(current_user: User, session: Session) -> list[ExerciseResponseData]:
-    exercises = session.exec(select(Exercise).where(Exercise.user_id == current_user.id)).all()
-    data = [ExerciseResponseData.from_orm(exercise) for exercise in exercises]
-    data.sort(key=lambda exercise: exercise.name)
-    return data
-
-@lru_cache(maxsize=128)
-def get_admin_created_exercises_cached(current_user: User, session: Session) -> list[ExerciseResponseData]:
-    exercises = session.exec(select(Exercise).where(Exercise.user_id == None)).all()
-    data = [ExerciseResponseData.from_orm(exercise) for exercise in exercises]
-    data.sort(key=lambda exercise: exercise.name)
-    return data
-        
-def get_specific_exercise_from_current_user(current_user: User, exercise_uuid: UUID, session: Session) -> Exercise:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
+exercise_fields = field_selection(ExerciseResponseData)
+
+async def get_specific_exercise_from_current_user(current_user: User, exercise_uuid: UUID, session: AsyncSession) -> Exercise:
     current_user_roles = [role.name for role in current_user.roles]
     if "User" in current_user_roles:
-        exercise = session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid).where(Exercise.user_id == current_user.id)).first()
+        exercise = (await session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid).where(Exercise.user_id == current_user.id))).first()
     elif "Admin" in current_user_roles:
-        exercise = session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid).where(Exercise.user_id == None)).first()
+        exercise = (await session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid).where(Exercise.user_id == None))).first()
     if not exercise:
-        if session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid)).first():
+        if (await session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid))).first():
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"User does not have permission to update Exercise UUID: {exercise_uuid}.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {exercise_uuid} not found.")
     return exercise 
 
-def verify_categories(workout_category_id: int, movement_category_id: int, major_muscle_id: int, equipment_id: int, exercise_post_request: ExerciseCreateReq, session: Session):
-    if not workout_category_id:
-        valid_options = session.exec(select(WorkoutCategory.name)).all()
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout category '{exercise_post_request.workout_category}' is not a valid option. These are valid options: {valid_options}")
-    if not movement_category_id:
-        valid_options = session.exec(select(MovementCategory.name)).all()
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Movement category '{exercise_post_request.movement_category}' is not a valid option. These are valid options: {valid_options}")
-    if not major_muscle_id:
-        valid_options = session.exec(select(MajorMuscle.name)).all()
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Major muscle '{exercise_post_request.major_muscle}' is not a valid option. These are valid options: {valid_options}")
-    if not equipment_id:
-        valid_options = session.exec(select(Equipment.name)).all()
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Equipment '{exercise_post_request.equipment}' is not a valid option. These are valid options: {valid_options}")
-    for specific_muscle in exercise_post_request.specific_muscles:
-        specific_muscle_id = session.exec(select(SpecificMuscle.id).where(SpecificMuscle.name == specific_muscle)).first()
-        if not specific_muscle_id:
-            valid_options = session.exec(select(SpecificMuscle.name)).all()
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Specific Muscle '{specific_muscle}' is not a valid option. These are valid options: {valid_options}")
-
-def clear_exercises_cache():
-    get_all_exercises_cached.cache_clear()
-    get_user_created_exercises_cached.cache_clear()
-    get_admin_created_exercises_cached.cache_clear() 
+async def resolve_categories(exercise_request: ExerciseCreateReq, session: AsyncSession) -> tuple[dict[str, int], list[int]]:
+    reference = await reference_data.get(session)
+    category_ids = {
+        "workout_category_id": reference.require_id("workout_category", exercise_request.workout_category),
+        "movement_category_id": reference.require_id("movement_category", exercise_request.movement_category),
+        "major_muscle_id": reference.require_id("major_muscle", exercise_request.major_muscle),
+        "equipment_id": reference.require_id("equipment", exercise_request.equipment),
+    }
+    specific_muscle_ids = [reference.require_id("specific_muscle", specific_muscle) for specific_muscle in exercise_request.specific_muscles]
+    return category_ids, specific_muscle_ids
+
+async def search_exercises_data(current_user: User, q: str, limit: int, session: AsyncSession) -> list[ExerciseResponseData]:
+    """Rank the exercises visible to ``current_user`` against ``q``.
+
+    Postgres ranks with the ``ix_exercise_search`` GIN index, anything else with the
+    inverted index kept alongside the cached catalog.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return await exercise_catalog.search(current_user.id, q, limit, session)
+    vector = literal_column(EXERCISE_SEARCH_VECTOR)
+    query = func.plainto_tsquery("english", q)
+    exercise_ids = (await session.exec(
+        select(Exercise.id)
+        .where(vector.op("@@")(query))
+        .where(or_(Exercise.user_id == None, Exercise.user_id == current_user.id))
+        .order_by(func.ts_rank(vector, query).desc(), Exercise.name, Exercise.uuid)
+        .limit(limit)
+    )).all()
+    exercises = await load_exercises_for_ids(session, exercise_ids)
+    return [exercises[exercise_id] for exercise_id in exercise_ids]
+
+def encoded_exercise_list_response(response: Response, exercises_json: bytes, detail: str) -> Response:
+    """An ExerciseListResponse around a whole pre-encoded list, skipping validation and re-encoding.
+    The envelope comes from the model with an empty list, which the encoded one is spliced into."""
+    envelope = orjson.dumps(ExerciseListResponse(data=[], detail=detail).model_dump(mode="json"))
+    content = envelope.replace(b'"data":[]', b'"data":' + exercises_json, 1)
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
 
 # Exercises
 @router.get("/users/me/exercises", response_model=ExerciseListResponse, status_code=status.HTTP_200_OK, tags=["Admin", "User"])
 @check_roles(["User", "Admin"])
-async def get_all_exercises(current_user: Annotated[User, Security(get_current_user)], session: Session = Depends(get_db), user_created: bool = None, admin_created: bool = None) -> ExerciseListResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
+async def get_all_exercises(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, page: Annotated[PageParams, Depends()], fields: Annotated[FieldSelection, Depends(exercise_fields)], facet_filters: Annotated[FacetFilters, Depends()], session: AsyncSession = Depends(get_db), user_created: bool = None, admin_created: bool = None) -> ExerciseListResponse:
     if user_created and admin_created:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot filter for both user and admin created exercises.")
+    current_user_roles = [role.name for role in current_user.roles]
+    if user_created and "User" not in current_user_roles and "Admin" in current_user_roles:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admins cannot view user created exercises.")
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    if not (fields.sparse or facet_filters.active or page.limit or page.cursor):
+        if user_created:
+            exercises_json = await exercise_catalog.user_exercises_json(current_user.id, session)
+        elif admin_created:
+            exercises_json = await exercise_catalog.admin_exercises_json(session)
+        else:
+            exercises_json = await exercise_catalog.all_exercises_json(current_user.id, session)
+        return encoded_exercise_list_response(response, exercises_json, "Exercises fetched successfully.")
     if not user_created and not admin_created:
-        data = get_all_exercises_cached(current_user, session)
+        data = await exercise_catalog.all_exercises(current_user.id, session)
     if user_created:
-        if "User" in [role.name for role in current_user.roles]:
-            data = get_user_created_exercises_cached(current_user, session)
-        elif "Admin" in [role.name for role in current_user.roles]:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admins cannot view user created exercises.")
+        data = list(await exercise_catalog.user_exercises(current_user.id, session))
     if admin_created:
-        data = get_admin_created_exercises_cached(current_user, session)
-    return ExerciseListResponse(data=data, detail="Exercises fetched successfully.")
+        data = list(await exercise_catalog.admin_exercises(session))
+    facets = None
+    if facet_filters.active:
+        await facet_filters.validate(session)
+        indexes = []
+        if not admin_created:
+            indexes.append(await exercise_catalog.user_facets(current_user.id, session))
+        if not user_created:
+            indexes.append(await exercise_catalog.admin_facets(session))
+        data, facets = facet_filters.apply(*indexes)
+    data, next_cursor = page.slice(data, exercise_sort_key, str, str)
+    if fields.sparse:
+        return sparse_response(response, [exercise.model_dump(include=fields.fields) for exercise in data], "Exercises fetched successfully.", next_cursor=next_cursor, facets=facets)
+    return ExerciseListResponse(data=data, next_cursor=next_cursor, facets=facets, detail="Exercises fetched successfully.")
+
+@router.get("/users/me/exercises/search", response_model=ExerciseListResponse, status_code=status.HTTP_200_OK, tags=["Admin", "User"])
+@check_roles(["User", "Admin"])
+async def search_exercises(current_user: Annotated[User, Security(get_current_user)], q: Annotated[str, Query(min_length=1, max_length=200)], limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 20, session: AsyncSession = Depends(get_db)) -> ExerciseListResponse:
+    data = await search_exercises_data(current_user, q, limit, session)
+    return ExerciseListResponse(data=data, detail=f"{len(data)} exercises found." if len(data) != 1 else f"{len(data)} exercise found.")
+
+@router.get("/users/me/exercises/autocomplete", response_model=ExerciseSuggestionListResponse, status_code=status.HTTP_200_OK, tags=["Admin", "User"])
+@check_roles(["User", "Admin"])
+async def autocomplete_exercises(current_user: Annotated[User, Security(get_current_user)], prefix: Annotated[str, Query(min_length=1, max_length=200)], limit: Annotated[int, Query(ge=1, le=50)] = 10, session: AsyncSession = Depends(get_db)) -> ExerciseSuggestionListResponse:
+    exercises = await exercise_catalog.autocomplete(current_user.id, prefix, limit, session)
+    data = [ExerciseSuggestion(uuid=exercise.uuid, name=exercise.name) for exercise in exercises]
+    return ExerciseSuggestionListResponse(data=data, detail=f"{len(data)} exercises found." if len(data) != 1 else f"{len(data)} exercise found.")
 
 @router.get("/users/me/exercises/{exercise_uuid:uuid}", response_model=ExerciseResponse, status_code=status.HTTP_200_OK, tags=["Admin", "User"])
 @check_roles(["User", "Admin"])
-async def get_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, session: Session = Depends(get_db)) -> ExerciseResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise = session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid)).first()
+async def get_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, response: Response, fields: Annotated[FieldSelection, Depends(exercise_fields)], session: AsyncSession = Depends(get_db)) -> ExerciseResponse:
+    if fields.sparse:
+        exercises = await load_exercise_fields_by_id(session, fields.fields, Exercise.uuid == exercise_uuid)
+        if not exercises:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {exercise_uuid} not found.")
+        return sparse_response(response, next(iter(exercises.values())), "Exercise fetched successfully.")
+    exercise = (await session.exec(select(Exercise).where(Exercise.uuid == exercise_uuid))).first()
     if not exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {exercise_uuid} not found.")
-    data = ExerciseResponseData.from_orm(exercise)
+    data = await load_exercise(session, exercise.id)
     return ExerciseResponse(data=data, detail="Exercise fetched successfully.")
 
 
 @router.post("/users/me/exercises", response_model=ExerciseResponse, status_code=status.HTTP_201_CREATED, tags=["Admin", "User"])
 @check_roles(["User", "Admin"])
-async def add_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_post_request: ExerciseCreateReq, session: Session = Depends(get_db)) -> ExerciseResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    workout_category_id = session.exec(select(WorkoutCategory.id).where(WorkoutCategory.name == exercise_post_request.workout_category)).first()
-    movement_category_id = session.exec(select(MovementCategory.id).where(MovementCategory.name == exercise_post_request.movement_category)).first()
-    major_muscle_id = session.exec(select(MajorMuscle.id).where(MajorMuscle.name == exercise_post_request.major_muscle)).first()
-    equipment_id = session.exec(select(Equipment.id).where(Equipment.name == exercise_post_request.equipment)).first()
-    verify_categories(workout_category_id, movement_category_id, major_muscle_id, equipment_id, exercise_post_request, session)
+async def add_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_post_request: ExerciseCreateReq, session: AsyncSession = Depends(get_db)) -> ExerciseResponse:
+    category_ids, specific_muscle_ids = await resolve_categories(exercise_post_request, session)
     current_user_roles = [role.name for role in current_user.roles]
     exercise = Exercise.model_validate(exercise_post_request.model_dump(
         exclude={"specific_muscles"}),
-        update={"workout_category_id":workout_category_id,
-                "movement_category_id": movement_category_id,
-                "major_muscle_id": major_muscle_id,
-                "equipment_id":equipment_id,
-                "user_id":current_user.id if "User" in current_user_roles else None
-                }
+        update={**category_ids, "user_id": current_user.id if "User" in current_user_roles else None}
         )
     session.add(exercise)
-    session.commit()
-    session.refresh(exercise)
-    for specific_muscle in exercise_post_request.specific_muscles:
-        specific_muscle_id = session.exec(select(SpecificMuscle.id).where(SpecificMuscle.name == specific_muscle)).first()
-        session.add(ExerciseSpecificMuscleLink(exercise_id=exercise.id, specific_muscle_id=specific_muscle_id))
-    session.commit()
-    session.refresh(exercise)
-    data = ExerciseResponseData.from_orm(exercise)
-    clear_exercises_cache()
+    await session.flush()
+    session.add_all([ExerciseSpecificMuscleLink(exercise_id=exercise.id, specific_muscle_id=specific_muscle_id) for specific_muscle_id in specific_muscle_ids])
+    record_user_write(current_user)
+    await session.commit()
+    data = build_exercise_data(exercise, specific_muscle_ids, await load_category_maps(session))
+    exercise_catalog.invalidate(exercise.user_id)
     return ExerciseResponse(data=data, detail=f"Exercise added successfully.")
             
 
 @router.put("/users/me/exercises/{exercise_uuid:uuid}", response_model=ExerciseResponse, status_code=status.HTTP_200_OK, tags=["Admin", "User"]) 
 @check_roles(["User", "Admin"])
-async def update_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, exercise_put_request: ExerciseCreateReq, session: Session = Depends(get_db)) -> ExerciseResponse:
-    exercise = get_specific_exercise_from_current_user(current_user, exercise_uuid, session)
-    for attr,value in exercise_put_request.model_dump(exclude={"workout_category", "movement_category", "equipment", "major_muscle","specific_muscles"}).items():
+async def update_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, exercise_put_request: ExerciseCreateReq, session: AsyncSession = Depends(get_db)) -> ExerciseResponse:
+    exercise = await get_specific_exercise_from_current_user(current_user, exercise_uuid, session)
+    category_ids, specific_muscle_ids = await resolve_categories(exercise_put_request, session)
+    await move_exercise_volume(session, exercise.id, exercise.major_muscle_id, category_ids["major_muscle_id"])
+    for attr, value in exercise_put_request.model_dump(exclude={"workout_category", "movement_category", "equipment", "major_muscle","specific_muscles"}).items():
+        setattr(exercise, attr, value)
+    for attr, value in category_ids.items():
         setattr(exercise, attr, value)
-    workout_category_id = session.exec(select(WorkoutCategory.id).where(WorkoutCategory.name == exercise_put_request.workout_category)).first()
-    movement_category_id = session.exec(select(MovementCategory.id).where(MovementCategory.name == exercise_put_request.movement_category)).first()
-    major_muscle_id = session.exec(select(MajorMuscle.id).where(MajorMuscle.name == exercise_put_request.major_muscle)).first()
-    equipment_id = session.exec(select(Equipment.id).where(Equipment.name == exercise_put_request.equipment)).first()
-    verify_categories(workout_category_id, movement_category_id, major_muscle_id, equipment_id, exercise_put_request, session)
-    exercise.workout_category_id = workout_category_id
-    exercise.movement_category_id = movement_category_id
-    exercise.major_muscle_id = major_muscle_id
-    exercise.equipment_id = equipment_id
-    for specific_muscle in exercise_put_request.specific_muscles:
-        specific_muscle_id = session.exec(select(SpecificMuscle.id).where(SpecificMuscle.name == specific_muscle)).first()
-        if not specific_muscle_id:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Specific Muscle '{specific_muscle}' is not a valid option.")
-    exercise.specific_muscles.clear()
-    for specific_muscle in exercise_put_request.specific_muscles:
-        specific_muscle_id = session.exec(select(SpecificMuscle.id).where(SpecificMuscle.name == specific_muscle)).first()
-        session.add(ExerciseSpecificMuscleLink(specific_muscle_id=specific_muscle_id, exercise_id=exercise.id))
-    session.commit()
-    session.refresh(exercise)
-    data =  ExerciseResponseData.from_orm(exercise)
-    clear_exercises_cache()
+    await session.exec(delete(ExerciseSpecificMuscleLink).where(ExerciseSpecificMuscleLink.exercise_id == exercise.id))
+    session.add_all([ExerciseSpecificMuscleLink(specific_muscle_id=specific_muscle_id, exercise_id=exercise.id) for specific_muscle_id in specific_muscle_ids])
+    await touch_rows_embedding_exercise(session, exercise.id)
+    record_user_write(current_user)
+    await session.commit()
+    data = build_exercise_data(exercise, specific_muscle_ids, await load_category_maps(session))
+    exercise_catalog.invalidate(exercise.user_id)
     return ExerciseResponse(data=data, detail=f"Exercise updated successfully.")
 
 @router.patch("/users/me/exercises/{exercise_uuid:uuid}", response_model=ExerciseResponse, status_code=status.HTTP_200_OK, tags=["Admin", "User"])
 @check_roles(["User", "Admin"])
-async def update_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, exercise_patch_request: ExercisePatchReq, session: Session = Depends(get_db)) -> ExerciseResponse:
-    exercise = get_specific_exercise_from_current_user(current_user, exercise_uuid, session)
-    with session.no_autoflush:
-        for attr, value in exercise_patch_request.model_dump(exclude_unset=True).items():
-            match attr:
-                case "name":
-                    setattr(exercise, attr, value)
-                case "description":
-                    setattr(exercise, attr, value)
-                case "workout_category":
-                    workout_category_id = session.exec(select(WorkoutCategory).where(WorkoutCategory.name == value)).first().id
-                    if not workout_category_id:
-                        valid_options = session.exec(select(WorkoutCategory.name)).all()
-                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout category '{exercise_patch_request.workout_category}' is not a valid option. These are valid options: {valid_options}")
-                    exercise.workout_category_id = workout_category_id
-                case "movement_category":
-                    movement_category_id = session.exec(select(MovementCategory).where(MovementCategory.name == value)).first().id
-                    if not movement_category_id:
-                        valid_options = session.exec(select(MovementCategory.name)).all()
-                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Movement category '{exercise_patch_request.movement_category}' is not a valid option. These are valid options: {valid_options}")
-                    exercise.movement_category_id = movement_category_id
-                case "major_muscle":
-                    major_muscle_id = session.exec(select(MajorMuscle).where(MajorMuscle.name == value)).first().id
-                    if not major_muscle_id:
-                        valid_options = session.exec(select(MajorMuscle.name)).all()
-                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Major muscle '{exercise_patch_request.major_muscle}' is not a valid option. These are valid options: {valid_options}")
-                    exercise.major_muscle_id = major_muscle_id
-                case "equipment":
-                    equipment_id = session.exec(select(Equipment).where(Equipment.name == value)).first().id
-                    if not equipment_id:
-                        valid_options = session.exec(select(Equipment.name)).all()
-                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Equipment '{exercise_patch_request.equipment}' is not a valid option. These are valid options: {valid_options}")
-                    exercise.equipment_id = equipment_id
-                case "specific_muscles":
-                    specific_muscle_objects = []
-                    for specific_muscle in value:
-                        specific_muscle_object = session.exec(select(SpecificMuscle).where(SpecificMuscle.name == value)).first()
-                        if not specific_muscle_object:
-                            valid_options = session.exec(select(SpecificMuscle.name)).all()
-                            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Specific Muscle '{specific_muscle}' is not a valid option. These are valid options: {valid_options}")
-                        specific_muscle_objects.append(specific_muscle_object)
-                    exercise.specific_muscles.clear()
-                    list(map(exercise.specific_muscles.append, specific_muscle_objects))
-    session.commit()
-    session.refresh(exercise)
-    data = ExerciseResponseData.from_orm(exercise)
-    clear_exercises_cache()
+async def update_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, exercise_patch_request: ExercisePatchReq, session: AsyncSession = Depends(get_db)) -> ExerciseResponse:
+    exercise = await get_specific_exercise_from_current_user(current_user, exercise_uuid, session)
+    reference = await reference_data.get(session)
+    specific_muscle_ids = None
+    for attr, value in exercise_patch_request.model_dump(exclude_unset=True).items():
+        match attr:
+            case "name":
+                setattr(exercise, attr, value)
+            case "description":
+                setattr(exercise, attr, value)
+            case "workout_category":
+                exercise.workout_category_id = reference.require_id("workout_category", value)
+            case "movement_category":
+                exercise.movement_category_id = reference.require_id("movement_category", value)
+            case "major_muscle":
+                major_muscle_id = reference.require_id("major_muscle", value)
+                await move_exercise_volume(session, exercise.id, exercise.major_muscle_id, major_muscle_id)
+                exercise.major_muscle_id = major_muscle_id
+            case "equipment":
+                exercise.equipment_id = reference.require_id("equipment", value)
+            case "specific_muscles":
+                specific_muscle_ids = [reference.require_id("specific_muscle", specific_muscle) for specific_muscle in value]
+    if specific_muscle_ids is None:
+        specific_muscle_ids = (await session.exec(select(ExerciseSpecificMuscleLink.specific_muscle_id).where(ExerciseSpecificMuscleLink.exercise_id == exercise.id))).all()
+    else:
+        await session.exec(delete(ExerciseSpecificMuscleLink).where(ExerciseSpecificMuscleLink.exercise_id == exercise.id))
+        session.add_all([ExerciseSpecificMuscleLink(exercise_id=exercise.id, specific_muscle_id=specific_muscle_id) for specific_muscle_id in specific_muscle_ids])
+    await touch_rows_embedding_exercise(session, exercise.id)
+    record_user_write(current_user)
+    await session.commit()
+    data = build_exercise_data(exercise, specific_muscle_ids, reference.names)
+    exercise_catalog.invalidate(exercise.user_id)
     return ExerciseResponse(data=data, detail=f"Exercise patched successfully.")
 
 @router.delete("/users/me/exercises/{exercise_uuid:uuid}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin", "User"])
 @check_roles(["User", "Admin"])
-async def delete_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, session: Session = Depends(get_db)):
-    exercise = get_specific_exercise_from_current_user(current_user, exercise_uuid, session)
-    session.delete(exercise)
-    session.commit()
-    clear_exercises_cache()
+async def delete_exercise(current_user: Annotated[User, Security(get_current_user)], exercise_uuid: UUID, session: AsyncSession = Depends(get_db)):
+    exercise = await get_specific_exercise_from_current_user(current_user, exercise_uuid, session)
+    owner_id = exercise.user_id
+    # Logs and workout exercises of the exercise go with it through ON DELETE CASCADE, so journal them for delta syncs.
+    exercise_logs = (await session.exec(select(ExerciseLog.user_id, ExerciseLog.uuid).where(ExerciseLog.exercise_id == exercise.id))).all()
+    await record_deletions(session, SyncKind.EXERCISE_LOG, exercise_logs)
+    workout_exercises = (await session.exec(select(WorkoutExercise.id, WorkoutExercise.user_id, WorkoutExercise.uuid).where(WorkoutExercise.exercise_id == exercise.id))).all()
+    if workout_exercises:
+        await touch_workouts_containing(session, (workout_exercise.id for workout_exercise in workout_exercises))
+        await record_deletions(session, SyncKind.WORKOUT_EXERCISE, ((workout_exercise.user_id, workout_exercise.uuid) for workout_exercise in workout_exercises))
+    await remove_exercise_volume(session, exercise)
+    await session.delete(exercise)
+    record_user_write(current_user)
+    await session.commit()
+    exercise_catalog.invalidate(owner_id)
 
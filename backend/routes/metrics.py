@@ -0,0 +1,35 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Security, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import db
+from db import get_db
+from models.relationship_merge import User
+from models.responses import DatabasePoolMetricsResponse, MetricsResponse
+from utilities.authorization import check_roles, get_current_user
+from utilities.exercise_catalog import exercise_catalog
+from utilities.hashed_password import password_hasher
+from utilities.pool_metrics import pool_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics/exercise-catalog", response_model=MetricsResponse, status_code=status.HTTP_200_OK, tags=["Admin"])
+@check_roles(["Admin"])
+async def get_exercise_catalog_metrics(current_user: Annotated[User, Security(get_current_user)], session: AsyncSession = Depends(get_db)) -> MetricsResponse:
+    return MetricsResponse(data=exercise_catalog.stats(), detail="Exercise catalog cache metrics fetched successfully.")
+
+@router.get("/metrics/password-hashing", response_model=MetricsResponse, status_code=status.HTTP_200_OK, tags=["Admin"])
+@check_roles(["Admin"])
+async def get_password_hashing_metrics(current_user: Annotated[User, Security(get_current_user)], session: AsyncSession = Depends(get_db)) -> MetricsResponse:
+    return MetricsResponse(data=password_hasher.stats(), detail="Password hashing metrics fetched successfully.")
+
+@router.get("/metrics/database-pool", response_model=DatabasePoolMetricsResponse, status_code=status.HTTP_200_OK, tags=["Admin"])
+@check_roles(["Admin"])
+async def get_database_pool_metrics(current_user: Annotated[User, Security(get_current_user)], session: AsyncSession = Depends(get_db)) -> DatabasePoolMetricsResponse:
+    """Metrics of the primary and, when one is configured, the replica pool. This request's own
+    session may be on either, so the engines are read from ``db`` rather than the session."""
+    engines = {"primary": db.async_engine, "replica": db.replica_async_engine}
+    data = {name: pool_metrics.stats(engine) for name, engine in engines.items() if engine is not None}
+    return DatabasePoolMetricsResponse(data=data, detail="Database pool metrics fetched successfully.")
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from db import get_db
+from models.enums import ReferenceDataKind
+from models.responses import ReferenceDataResponse, ReferenceOptionsResponse
+from utilities.http_cache import cached_json_response
+from utilities.reference_data import REFERENCE_DATA_CACHE_CONTROL, reference_data
+
+router = APIRouter()
+
+# Reference data is the same for everyone, so these routes need no token and can be cached by browsers and CDNs.
+@router.get("/reference-data", response_model=ReferenceDataResponse, status_code=status.HTTP_200_OK)
+async def get_reference_data(request: Request, session: AsyncSession = Depends(get_db)) -> Response:
+    body, etag = (await reference_data.get(session)).payloads[None]
+    return cached_json_response(request, body, etag, REFERENCE_DATA_CACHE_CONTROL)
+
+@router.get("/reference-data/{kind}", response_model=ReferenceOptionsResponse, status_code=status.HTTP_200_OK)
+async def get_reference_options(request: Request, kind: ReferenceDataKind, session: AsyncSession = Depends(get_db)) -> Response:
+    body, etag = (await reference_data.get(session)).payloads[kind]
+    return cached_json_response(request, body, etag, REFERENCE_DATA_CACHE_CONTROL)
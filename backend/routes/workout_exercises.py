@@ -1,127 +1,146 @@
 from uuid import UUID
-from typing import Annotated
-from functools import lru_cache
+from typing import Annotated, Any, Sequence
 
-from fastapi import APIRouter, HTTPException, status, Depends, Security
-from sqlmodel import Session, select
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends, Security
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from db import engine, get_db
+from db import get_db
+from models.enums import SyncKind
 from models.workout_exercise import WorkoutExerciseCreateReq, WorkoutExercisePatchReq
 from models.responses import WorkoutExerciseResponseData, WorkoutExerciseResponse, WorkoutExerciseListResponse, ExerciseResponseData
 from models.relationship_merge import WorkoutExercise, User, Exercise, WorkoutExerciseWorkoutOrderLink
 
 from utilities.authorization import get_current_user, check_roles
+from utilities.exercise_loader import load_exercise_fields_by_id, load_exercises_for_ids
+from utilities.exercise_catalog import exercise_catalog
+from utilities.fieldsets import FieldSelection, field_selection, sparse_response
+from utilities.pagination import PageParams
+from utilities.sync import SyncParams, record_deletions, touch_workouts_containing
+from utilities.user_data_version import conditional_user_list, record_user_write
 
 router = APIRouter()
 
-@lru_cache(maxsize=128)
-def get_all_workout_exericses(current_user: User, session: Session):
-    workout_exercises = session.exec(select(WorkoutExercise).where(WorkoutExercise.user_id == current_user.id)).all()
-    data = []
-    for workout_exercise in workout_exercises:
-        exercise = session.exec(select(Exercise).where(Exercise.id == workout_exercise.exercise_id)).first()
-        exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise))
-        exercise_order = session.exec(select(WorkoutExerciseWorkoutOrderLink.exercise_order).where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id == workout_exercise.id)).first()
-        data.append(WorkoutExerciseResponseData.model_validate(workout_exercise, update={"exercise":exercise_data, "exercise_order":exercise_order}))
-    return data
+async def build_workout_exercises_data(workout_exercises: list[WorkoutExercise], session: AsyncSession) -> list[WorkoutExerciseResponseData]:
+    exercises = await load_exercises_for_ids(session, (workout_exercise.exercise_id for workout_exercise in workout_exercises))
+    exercise_orders = dict((await session.exec(
+        select(WorkoutExerciseWorkoutOrderLink.workout_exercise_id, WorkoutExerciseWorkoutOrderLink.exercise_order)
+        .where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id.in_([workout_exercise.id for workout_exercise in workout_exercises]))
+    )).all()) if workout_exercises else {}
+    return [
+        WorkoutExerciseResponseData.model_validate(workout_exercise, update={"exercise": exercises[workout_exercise.exercise_id], "exercise_order": exercise_orders.get(workout_exercise.id)})
+        for workout_exercise in workout_exercises
+    ]
 
-def clear_workout_exercise_cache():
-    get_all_workout_exericses.cache_clear()
+async def build_sparse_workout_exercises_data(workout_exercises: list, session: AsyncSession, fields: FieldSelection) -> list[dict]:
+    """Only the requested fields, skipping the exercise and order lookups nobody asked for."""
+    exercise_ids = {workout_exercise.exercise_id for workout_exercise in workout_exercises}
+    exercises = await load_exercise_fields_by_id(session, fields.exercise_fields, Exercise.id.in_(exercise_ids)) if exercise_ids and fields.includes("exercise") else {}
+    exercise_orders = dict((await session.exec(
+        select(WorkoutExerciseWorkoutOrderLink.workout_exercise_id, WorkoutExerciseWorkoutOrderLink.exercise_order)
+        .where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id.in_([workout_exercise.id for workout_exercise in workout_exercises]))
+    )).all()) if workout_exercises and fields.includes("exercise_order") else {}
+    return [
+        fields.row_data(workout_exercise, exercise=exercises.get(workout_exercise.exercise_id), exercise_order=exercise_orders.get(workout_exercise.id))
+        for workout_exercise in workout_exercises
+    ]
+
+workout_exercise_fields = field_selection(WorkoutExerciseResponseData, nested_exercise=True)
+
+async def get_all_workout_exercises_data(current_user: User, session: AsyncSession, page: PageParams, fields: FieldSelection = FieldSelection(), filters: Sequence[Any] = ()) -> tuple[list[WorkoutExerciseResponseData] | list[dict], str | None]:
+    columns = fields.columns(WorkoutExercise, WorkoutExercise.id, WorkoutExercise.exercise_id) if fields.sparse else [WorkoutExercise]
+    statement = page.apply(select(*columns).where(WorkoutExercise.user_id == current_user.id, *filters), WorkoutExercise.id, converters=(int,))
+    workout_exercises, next_cursor = page.page((await session.exec(statement)).all(), lambda workout_exercise: (workout_exercise.id,))
+    if fields.sparse:
+        return await build_sparse_workout_exercises_data(workout_exercises, session, fields), next_cursor
+    return await build_workout_exercises_data(workout_exercises, session), next_cursor
 
 #Workout Exercises End Points
 @router.get("/users/me/workout-exercises", response_model=WorkoutExerciseListResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def get_workout_exercises(current_user: Annotated[User, Security(get_current_user)], session: Session = Depends(get_db)) -> WorkoutExerciseListResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    data = get_all_workout_exericses(current_user, session)
-    return WorkoutExerciseListResponse(data=data, detail=f"{len(data)} workout exercises fetched successfully." if len(data) != 1 else f"{len(data)} workout exercise fetched successfully.")
+async def get_workout_exercises(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, page: Annotated[PageParams, Depends()], fields: Annotated[FieldSelection, Depends(workout_exercise_fields)], sync: Annotated[SyncParams, Depends()], session: AsyncSession = Depends(get_db)) -> WorkoutExerciseListResponse:
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    data, next_cursor = await get_all_workout_exercises_data(current_user, session, page, fields, sync.changed(WorkoutExercise.updated_at))
+    deleted = await sync.deleted(session, current_user.id, SyncKind.WORKOUT_EXERCISE)
+    detail = f"{len(data)} workout exercises fetched successfully." if len(data) != 1 else f"{len(data)} workout exercise fetched successfully."
+    if fields.sparse:
+        return sparse_response(response, data, detail, next_cursor=next_cursor, deleted=deleted, sync_token=sync.token)
+    return WorkoutExerciseListResponse(data=data, next_cursor=next_cursor, deleted=deleted, sync_token=sync.token, detail=detail)
 
 @router.get("/users/me/workout-exercises/{workout_exercise_uuid}", response_model=WorkoutExerciseResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def get_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, session: Session = Depends(get_db)) -> WorkoutExerciseResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    workout_exercise = session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id)).first()
+async def get_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, session: AsyncSession = Depends(get_db)) -> WorkoutExerciseResponse:
+    workout_exercise = (await session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id))).first()
     if not workout_exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout Exercise UUID: {workout_exercise_uuid} not found.")
-    exercise = session.exec(select(Exercise).where(Exercise.id == workout_exercise.exercise_id)).first()
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise))
-    exercise_order = session.exec(select(WorkoutExerciseWorkoutOrderLink.exercise_order).where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id == workout_exercise.id)).first()
-    data = WorkoutExerciseResponseData.model_validate(workout_exercise, update={"exercise":exercise_data, "exercise_order":exercise_order})
+    data = (await build_workout_exercises_data([workout_exercise], session))[0]
     return WorkoutExerciseResponse(data=data, detail="Workout Exercise fetched successfully.")
 
 @router.post("/users/me/workout-exercises", response_model=WorkoutExerciseResponse, status_code=status.HTTP_201_CREATED, tags=["User"])
 @check_roles(["User"])
-async def add_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_request: WorkoutExerciseCreateReq, session: Session = Depends(get_db)) -> WorkoutExerciseResponse:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    exercise = session.exec(select(Exercise).where(Exercise.uuid == workout_exercise_request.exercise_uuid)).first()
-    if not exercise:
+async def add_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_request: WorkoutExerciseCreateReq, session: AsyncSession = Depends(get_db)) -> WorkoutExerciseResponse:
+    exercise_id = await exercise_catalog.exercise_id(workout_exercise_request.exercise_uuid, session)
+    if not exercise_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {workout_exercise_request.exercise_uuid} not found.")
-    workout_exercise = WorkoutExercise.model_validate(workout_exercise_request.model_dump(), update={"user_id": current_user.id, "exercise_id": exercise.id})
+    workout_exercise = WorkoutExercise.model_validate(workout_exercise_request.model_dump(), update={"user_id": current_user.id, "exercise_id": exercise_id})
     session.add(workout_exercise)
-    session.commit()
-    session.refresh(workout_exercise)
-    session.refresh(exercise)
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise))
-    exercise_order = session.exec(select(WorkoutExerciseWorkoutOrderLink.exercise_order).where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id == workout_exercise.id)).first()
-    data = WorkoutExerciseResponseData.model_validate(workout_exercise, update={"exercise": exercise_data, "exercise_order":exercise_order})
-    clear_workout_exercise_cache()
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout_exercise)
+    data = (await build_workout_exercises_data([workout_exercise], session))[0]
     return WorkoutExerciseResponse(data=data, detail="Workout Exercise added successfully.")
 
 @router.put("/users/me/workout-exercises/{workout_exercise_uuid}", response_model=WorkoutExerciseResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def update_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, workout_exercise_request: WorkoutExerciseCreateReq, session: Session = Depends(get_db)):
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    workout_exercise = session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id)).first()
+async def update_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, workout_exercise_request: WorkoutExerciseCreateReq, session: AsyncSession = Depends(get_db)):
+    workout_exercise = (await session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id))).first()
     if not workout_exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout Exercise UUID: {workout_exercise_uuid} not found.")
-    exercise = session.exec(select(Exercise).where(Exercise.uuid == workout_exercise_request.exercise_uuid)).first()
-    if not exercise:
+    exercise_id = await exercise_catalog.exercise_id(workout_exercise_request.exercise_uuid, session)
+    if not exercise_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {workout_exercise_request.exercise_uuid} not found.")
     for attr, value in workout_exercise_request.model_dump(exclude={"exercise_uuid"}).items():
         setattr(workout_exercise, attr, value)
-    workout_exercise.exercise_id = exercise.id
+    workout_exercise.exercise_id = exercise_id
     session.add(workout_exercise)
-    session.commit()
-    session.refresh(workout_exercise)
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise))
-    exercise_order = session.exec(select(WorkoutExerciseWorkoutOrderLink.exercise_order).where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id == workout_exercise.id)).first()
-    data = WorkoutExerciseResponseData.model_validate(workout_exercise, update={"exercise":exercise_data, "exercise_order":exercise_order})
-    clear_workout_exercise_cache()
+    await touch_workouts_containing(session, [workout_exercise.id])
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout_exercise)
+    data = (await build_workout_exercises_data([workout_exercise], session))[0]
     return WorkoutExerciseResponse(data=data, detail="Workout Exercise updated successfully.")
 
 @router.patch("/users/me/workout-exercises/{workout_exercise_uuid}", response_model=WorkoutExerciseResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def update_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, workout_exercise_request: WorkoutExercisePatchReq, session: Session = Depends(get_db)):
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    workout_exercise = session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id)).first()
+async def update_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, workout_exercise_request: WorkoutExercisePatchReq, session: AsyncSession = Depends(get_db)):
+    workout_exercise = (await session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id))).first()
     if not workout_exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout Exercise UUID: {workout_exercise_uuid} not found.")
     if workout_exercise_request.exercise_uuid:
-        exercise = session.exec(select(Exercise).where(Exercise.uuid == workout_exercise_request.exercise_uuid)).first() 
-        if not exercise:
+        exercise_id = await exercise_catalog.exercise_id(workout_exercise_request.exercise_uuid, session)
+        if not exercise_id:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Exercise UUID: {workout_exercise_request.exercise_uuid} not found.")
-    else:
-        exercise = session.exec(select(Exercise).where(Exercise.id == workout_exercise.exercise_id)).first()
     for attr, value in workout_exercise_request.model_dump(exclude_unset=True, exclude={"exercise_uuid"}).items():
         setattr(workout_exercise, attr, value)
     if workout_exercise_request.exercise_uuid:
-        workout_exercise.exercise_id = exercise.id
+        workout_exercise.exercise_id = exercise_id
     session.add(workout_exercise)
-    session.commit()
-    session.refresh(workout_exercise)
-    exercise_data = ExerciseResponseData.model_validate(ExerciseResponseData.from_orm(exercise))
-    exercise_order = session.exec(select(WorkoutExerciseWorkoutOrderLink.exercise_order).where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id == workout_exercise.id)).first()
-    data = WorkoutExerciseResponseData.model_validate(workout_exercise, update={"exercise":exercise_data, "exercise_order":exercise_order})
-    clear_workout_exercise_cache()
+    await touch_workouts_containing(session, [workout_exercise.id])
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout_exercise)
+    data = (await build_workout_exercises_data([workout_exercise], session))[0]
     return WorkoutExerciseResponse(data=data, detail="Workout Exercise updated successfully.")
 
 @router.delete("/users/me/workout-exercises/{workout_exercise_uuid}", status_code=status.HTTP_204_NO_CONTENT, tags=["User"]) 
 @check_roles(["User"])
-async def delete_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, session: Session = Depends(get_db)):
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    workout_exercise = session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id)).first()
+async def delete_workout_exercise(current_user: Annotated[User, Security(get_current_user)], workout_exercise_uuid: UUID, session: AsyncSession = Depends(get_db)):
+    workout_exercise = (await session.exec(select(WorkoutExercise).where(WorkoutExercise.uuid == workout_exercise_uuid).where(WorkoutExercise.user_id == current_user.id))).first()
     if not workout_exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout Exercise UUID: {workout_exercise_uuid} not found.")
-    session.delete(workout_exercise)
-    session.commit()
-    clear_workout_exercise_cache()
\ No newline at end of file
+    await touch_workouts_containing(session, [workout_exercise.id])
+    await record_deletions(session, SyncKind.WORKOUT_EXERCISE, [(workout_exercise.user_id, workout_exercise.uuid)])
+    await session.delete(workout_exercise)
+    record_user_write(current_user)
+    await session.commit()
\ No newline at end of file
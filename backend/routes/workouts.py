@@ -1,12 +1,15 @@
 from uuid import uuid4 as new_uuid
 from uuid import UUID 
-from typing import Annotated 
-from functools import lru_cache
+from typing import Annotated, Any, Sequence
+from collections import defaultdict
 
-from fastapi import APIRouter, HTTPException, status, Depends, Security
-from sqlmodel import Session, select, insert, delete, update 
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends, Security
+from sqlmodel import select, insert, delete, update 
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from db import engine, get_db
+from db import get_db
+from models.enums import SyncKind
 from models.workout import (
     WorkoutCreateReq, WorkoutPatchReq, WorkoutAddWorkoutExerciseReq
 )
@@ -15,141 +18,185 @@ from models.responses import (
     ExerciseResponseData, WorkoutExerciseResponseData
 )
 from models.relationship_merge import (
-    WorkoutExercise, Exercise, User, Workout
+    WorkoutExercise, Exercise, User, Workout, WorkoutExerciseWorkoutOrderLink
 )
+from routes.workout_exercises import build_workout_exercises_data
 
 from utilities.authorization import get_current_user, check_roles
+from utilities.fieldsets import FieldSelection, field_selection, sparse_response
+from utilities.pagination import PageParams
+from utilities.sync import SyncParams, record_deletions, touch, touch_workout_exercises_in
+from utilities.user_data_version import conditional_user_list, record_user_write
 
 router = APIRouter()
 
-@lru_cache(maxsize=1000)
-def get_all_exercises_cached(current_user: User, session: Session) -> list[WorkoutResponseData]:
-    current_user = session.exec(select(User).where(User.id == current_user.id)).first()
-    workouts = session.exec(select(Workout).where(Workout.user_id == current_user.id)).all()
-    data = [WorkoutResponseData.model_validate(workout) for workout in workouts]
-    data.sort(key=lambda workout: workout.name)
-    return WorkoutListResponse(data=data, detail=f"{len(workouts)} workouts fetched successfully." if len(workouts) != 1 else f"{len(workouts)} workout fetched successfully.")
+async def load_workout_exercises_data(workout_ids: list[int], session: AsyncSession) -> defaultdict[int, list[WorkoutExerciseResponseData]]:
+    """The workout exercises of each workout, in their exercise order."""
+    rows = (await session.exec(
+        select(WorkoutExerciseWorkoutOrderLink.workout_id, WorkoutExercise)
+        .join(WorkoutExercise, WorkoutExercise.id == WorkoutExerciseWorkoutOrderLink.workout_exercise_id)
+        .where(WorkoutExerciseWorkoutOrderLink.workout_id.in_(workout_ids))
+        .order_by(WorkoutExerciseWorkoutOrderLink.workout_id, WorkoutExerciseWorkoutOrderLink.exercise_order, WorkoutExerciseWorkoutOrderLink.id)
+    )).all() if workout_ids else []
+    workout_exercises_data = await build_workout_exercises_data([workout_exercise for _, workout_exercise in rows], session)
+    workout_exercises_by_workout = defaultdict(list)
+    for (workout_id, _), workout_exercise_data in zip(rows, workout_exercises_data):
+        workout_exercises_by_workout[workout_id].append(workout_exercise_data)
+    return workout_exercises_by_workout
+
+async def build_workouts_data(workouts: list[Workout], session: AsyncSession) -> list[WorkoutResponseData]:
+    workout_exercises_by_workout = await load_workout_exercises_data([workout.id for workout in workouts], session)
+    return [WorkoutResponseData.model_validate(workout, update={"workout_exercises": workout_exercises_by_workout[workout.id]}) for workout in workouts]
+
+async def build_sparse_workouts_data(workouts: list, session: AsyncSession, fields: FieldSelection) -> list[dict]:
+    """Only the requested fields, skipping the workout exercise lookups unless they were asked for."""
+    workout_exercises_by_workout = await load_workout_exercises_data([workout.id for workout in workouts], session) if fields.includes("workout_exercises") else {}
+    return [fields.row_data(workout, workout_exercises=workout_exercises_by_workout.get(workout.id, [])) for workout in workouts]
+
+workout_fields = field_selection(WorkoutResponseData)
+
+async def get_all_workouts_data(current_user: User, session: AsyncSession, page: PageParams, fields: FieldSelection = FieldSelection(), filters: Sequence[Any] = ()) -> tuple[list[WorkoutResponseData] | list[dict], str | None]:
+    columns = fields.columns(Workout, Workout.id, Workout.name) if fields.sparse else [Workout]
+    statement = page.apply(select(*columns).where(Workout.user_id == current_user.id, *filters), Workout.name, Workout.id, converters=(str, int))
+    workouts, next_cursor = page.page((await session.exec(statement)).all(), lambda workout: (workout.name, workout.id))
+    if fields.sparse:
+        return await build_sparse_workouts_data(workouts, session, fields), next_cursor
+    return await build_workouts_data(workouts, session), next_cursor
 
 # Workout End Points
 @router.get("/users/me/workouts", response_model=WorkoutListResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def get_workouts(current_user: Annotated[User, Security(get_current_user)], session: Session = Depends(get_db)) -> WorkoutListResponse:
-    return get_all_exercises_cached(current_user, session)
+async def get_workouts(current_user: Annotated[User, Security(get_current_user)], request: Request, response: Response, page: Annotated[PageParams, Depends()], fields: Annotated[FieldSelection, Depends(workout_fields)], sync: Annotated[SyncParams, Depends()], session: AsyncSession = Depends(get_db)) -> WorkoutListResponse:
+    if (not_modified := conditional_user_list(request, response, current_user)) is not None:
+        return not_modified
+    data, next_cursor = await get_all_workouts_data(current_user, session, page, fields, sync.changed(Workout.updated_at))
+    deleted = await sync.deleted(session, current_user.id, SyncKind.WORKOUT)
+    detail = f"{len(data)} workouts fetched successfully." if len(data) != 1 else f"{len(data)} workout fetched successfully."
+    if fields.sparse:
+        return sparse_response(response, data, detail, next_cursor=next_cursor, deleted=deleted, sync_token=sync.token)
+    return WorkoutListResponse(data=data, next_cursor=next_cursor, deleted=deleted, sync_token=sync.token, detail=detail)
     
 @router.get("/users/me/workouts/{workout_uuid:uuid}", response_model=WorkoutResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def get_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, session: Session = Depends(get_db)) -> WorkoutResponse:
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def get_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, session: AsyncSession = Depends(get_db)) -> WorkoutResponse:
+    workout = (await session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout UUID: {workout_uuid} not found.")
-    data = WorkoutResponseData.model_validate(workout)
+    data = (await build_workouts_data([workout], session))[0]
     return WorkoutResponse(data=data, detail="Workout fetched successfully.")
 
 @router.post("/users/me/workouts", response_model=WorkoutResponse, status_code=status.HTTP_201_CREATED, tags=["User"])
 @check_roles(["User"])
-async def create_workout(current_user: Annotated[User, Security(get_current_user)], workout_request: WorkoutCreateReq, session: Session = Depends(get_db)) -> WorkoutResponse:
+async def create_workout(current_user: Annotated[User, Security(get_current_user)], workout_request: WorkoutCreateReq, session: AsyncSession = Depends(get_db)) -> WorkoutResponse:
     workout = Workout.model_validate(workout_request.model_dump(), update={"user_id": current_user.id})
     session.add(workout)
-    session.commit()
-    session.refresh(workout)
-    data = WorkoutResponseData.model_validate(workout)
-    get_all_exercises_cached.cache_clear()
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout)
+    data = (await build_workouts_data([workout], session))[0]
     return WorkoutResponse(data=data, detail="Workout added successfully.")
 
 @router.put("/users/me/workouts/{workout_uuid:uuid}", response_model=WorkoutResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def update_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_request: WorkoutCreateReq, session: Session = Depends(get_db)) -> WorkoutResponse:
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def update_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_request: WorkoutCreateReq, session: AsyncSession = Depends(get_db)) -> WorkoutResponse:
+    workout = (await session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail= f"Workout UUID: {workout_uuid} not found.")
     for attr, value in workout_request.model_dump().items():
         setattr(workout, attr, value)
-    session.commit()
-    session.refresh(workout)
-    data = WorkoutResponseData.model_validate(workout)
-    get_all_exercises_cached.cache_clear()
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout)
+    data = (await build_workouts_data([workout], session))[0]
     return WorkoutResponse(data=data, detail="Workout updated successfully.")
 
 @router.patch("/users/me/workouts/{workout_uuid:uuid}", response_model=WorkoutResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def patch_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_request: WorkoutPatchReq, session: Session = Depends(get_db)) -> WorkoutResponse:
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def patch_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_request: WorkoutPatchReq, session: AsyncSession = Depends(get_db)) -> WorkoutResponse:
+    workout = (await session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail= f"Workout UUID: {workout_uuid} not found.")
     for attr, value in workout_request.model_dump(exclude_unset=True).items():
         setattr(workout, attr, value)
-    session.commit()
-    session.refresh(workout)
-    data = WorkoutResponseData.model_validate(workout)
-    get_all_exercises_cached.cache_clear()
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout)
+    data = (await build_workouts_data([workout], session))[0]
     return WorkoutResponse(data=data, detail="Workout updated successfully.")
 
 @router.delete("/users/me/workouts/{workout_uuid:uuid}", status_code=status.HTTP_204_NO_CONTENT, tags=["User"])
 @check_roles(["User"])
-async def delete_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, session: Session = Depends(get_db)):
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def delete_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, session: AsyncSession = Depends(get_db)):
+    workout = (await session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout UUID: {workout_uuid} not found.")
-    session.delete(workout)
-    session.commit()
-    get_all_exercises_cached.cache_clear()
+    await touch_workout_exercises_in(session, workout.id)
+    await record_deletions(session, SyncKind.WORKOUT, [(workout.user_id, workout.uuid)])
+    await session.delete(workout)
+    record_user_write(current_user)
+    await session.commit()
 
 
 # Workout Exercise End Points
 @router.post("/users/me/workouts/{workout_uuid:uuid}/workout_exercises", response_model=WorkoutResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def link_workout_exercise_to_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_add_workout_exercise_request: WorkoutAddWorkoutExerciseReq, session: Session = Depends(get_db)) -> WorkoutResponse:
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def link_workout_exercise_to_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_add_workout_exercise_request: WorkoutAddWorkoutExerciseReq, session: AsyncSession = Depends(get_db)) -> WorkoutResponse:
+    workout = (await session.exec(select(Workout).options(selectinload(Workout.workout_exercises)).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail= f"Workout UUID: {workout_uuid} not found.") 
-    workout_exercise = session.exec(select(WorkoutExercise) .where(WorkoutExercise.uuid == workout_add_workout_exercise_request.workout_exercise_uuid)).first()
+    workout_exercise = (await session.exec(select(WorkoutExercise) .where(WorkoutExercise.uuid == workout_add_workout_exercise_request.workout_exercise_uuid))).first()
     if not workout_exercise:
        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail= f"Workout Exercise UUID: {workout_uuid} not found.") 
     workout_exercise.exercise_order = len(workout.workout_exercises) + 1
     workout.workout_exercises.append(workout_exercise)
-    session.commit()
-    session.refresh(workout)
-    session.refresh(workout_exercise)
-    data = WorkoutResponseData.model_validate(workout)
-    get_all_exercises_cached.cache_clear()
+    touch(workout, workout_exercise)
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout, ["workout_exercises"])
+    await session.refresh(workout_exercise)
+    data = (await build_workouts_data([workout], session))[0]
     return WorkoutResponse(data=data, detail="Added workout exercise succesfully.")
 
 @router.patch("/users/me/workouts/{workout_uuid:uuid}/workout_exercises/{workout_exercise_uuid:uuid}", response_model=WorkoutResponse, status_code=status.HTTP_200_OK, tags=["User"])
 @check_roles(["User"])
-async def reorder_workout_exercise_in_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_exercise_uuid: UUID, new_order: int, session: Session = Depends(get_db)) -> WorkoutResponse:
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def reorder_workout_exercise_in_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_exercise_uuid: UUID, new_order: int, session: AsyncSession = Depends(get_db)) -> WorkoutResponse:
+    workout = (await session.exec(select(Workout).options(selectinload(Workout.workout_exercises)).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout UUID: {workout_uuid} not found.")
-    workout_exercise = session.exec(select(WorkoutExercise).where(WorkoutExercise.workout_id == workout.id).where(WorkoutExercise.uuid == workout_exercise_uuid)).first()
+    workout_exercise = (await session.exec(select(WorkoutExercise).where(WorkoutExercise.workout_id == workout.id).where(WorkoutExercise.uuid == workout_exercise_uuid))).first()
     if not workout_exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout Exercise UUID: {workout_uuid} not found.")
     if new_order < 1 or new_order > len(workout.workout_exercises):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"New order must be between 1 and {len(workout.workout_exercises)}.")
     workout.workout_exercises.remove(workout_exercise)
     workout.workout_exercises.insert(new_order - 1, workout_exercise)
-    session.commit()
-    session.refresh(workout)
+    touch(workout)
+    await touch_workout_exercises_in(session, workout.id)
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout, ["workout_exercises"])
     for index, exercise in enumerate(workout.workout_exercises):
         exercise.exercise_order = index + 1
-    session.commit()
-    data = WorkoutResponseData.model_validate(workout)
-    get_all_exercises_cached.cache_clear()
+    await session.commit()
+    data = (await build_workouts_data([workout], session))[0]
     return WorkoutResponse(data=data, detail="Workout exercise reordered successfully.")
 
 @router.delete("/users/me/workouts/{workout_uuid:uuid}/workout_exercises/{workout_exercise_uuid:uuid}", status_code=status.HTTP_204_NO_CONTENT, tags=["User"])
 @check_roles(["User"])
-async def unlink_workout_exercise_from_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_exercise_uuid: UUID, session: Session = Depends(get_db)):
-    workout = session.exec(select(Workout).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id)).first()
+async def unlink_workout_exercise_from_workout(current_user: Annotated[User, Security(get_current_user)], workout_uuid: UUID, workout_exercise_uuid: UUID, session: AsyncSession = Depends(get_db)):
+    workout = (await session.exec(select(Workout).options(selectinload(Workout.workout_exercises)).where(Workout.uuid == workout_uuid).where(Workout.user_id == current_user.id))).first()
     if not workout:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout UUID: {workout_uuid} not found.")
-    workout_exercise = session.exec(select(WorkoutExercise).where(WorkoutExercise.workout_id == workout.id).where(WorkoutExercise.uuid == workout_exercise_uuid)).first()
+    workout_exercise = (await session.exec(select(WorkoutExercise).where(WorkoutExercise.workout_id == workout.id).where(WorkoutExercise.uuid == workout_exercise_uuid))).first()
     if not workout_exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Workout Exercise UUID: {workout_uuid} not found.")
     workout.workout_exercises.remove(workout_exercise)
-    get_all_exercises_cached.cache_clear()
-    session.commit()
-    session.refresh(workout)
+    touch(workout, workout_exercise)
+    await touch_workout_exercises_in(session, workout.id)
+    record_user_write(current_user)
+    await session.commit()
+    await session.refresh(workout, ["workout_exercises"])
     for index, exercise in enumerate(workout.workout_exercises):
         exercise.exercise_order = index + 1
-    session.commit()
+    await session.commit()
     
\ No newline at end of file
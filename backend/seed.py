@@ -0,0 +1,21 @@
+"""Migrate the database to the latest schema and seed the exercise catalog.
+
+    python seed.py           # skipped while the seed file is unchanged
+    python seed.py --force   # re-check every row against the seed file
+"""
+import argparse
+import logging
+
+from db import seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="seed even if the seed file has not changed")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    seed_database(force_seed=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 # Set ngrok authtoken
 ngrok authtoken $NGROK_AUTHTOKEN
 
+# Seed the exercise catalog, skipped when the seed file is unchanged
+python seed.py
+
 # Start uvicorn
 uvicorn main:app --host 0.0.0.0 --port 8000 &
 
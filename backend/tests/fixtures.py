@@ -10,18 +10,23 @@ from fastapi.security import SecurityScopes
 from fastapi import HTTPException, Depends, status
 from db import Session, SQLModel, create_engine, get_db
 from sqlmodel.pool import StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import select, insert
 from models.relationship_merge import Exercise, User, WorkoutCategory, MovementCategory, MajorMuscle, SpecificMuscle, Equipment, BandColor, Role
 from sqlite3 import Connection as SQLite3Connection
 from sqlalchemy import event
-from utilities.authorization import get_current_user, oauth2_scheme, SECRET_KEY, ALGORITHM, TokenData
+from utilities.authorization import get_current_user, oauth2_scheme, SECRET_KEY, ALGORITHM, TokenData, token_versions
+from utilities.exercise_catalog import exercise_catalog
+from utilities.reference_data import reference_data
+from utilities.pool_metrics import pool_metrics
 from main import app
 
 def set_sqlite_pragma(dbapi_connection, connection_record):
-    if isinstance(dbapi_connection, SQLite3Connection):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 def build_database(engine):
     with open("exercise_json/new_exercise_json.json", 'r') as file:
@@ -52,47 +57,35 @@ def build_database(engine):
     
 
 @pytest.fixture
-def session():
-    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+def database_path(tmp_path):
+    return tmp_path / "test.db"
+
+@pytest.fixture
+def session(database_path):
+    engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False}, poolclass=StaticPool)
     event.listen(engine, "connect", set_sqlite_pragma)
     SQLModel.metadata.create_all(engine)
-    return build_database(engine) 
+    yield build_database(engine)
+    engine.dispose()
 
 @pytest.fixture
-def client(session: Session):
-    def get_db_override():
-        return session
-    
-    def override_get_current_user(security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]):
-        if security_scopes.scopes:
-            authenticate_value = f"Bearer scope={security_scopes.scopes}"
-        else:
-            authenticate_value = "Bearer"
-        credentials_exception = HTTPException( status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": authenticate_value},
-        )
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_uuid: UUID = UUID(payload.get("sub"))
-            if user_uuid is None:
-                raise credentials_exception
-            token_scopes = payload.get("scopes", [])
-            token_data = TokenData(user_uuid=user_uuid, scopes=token_scopes)
-        except (JWTError, ValidationError):
-            raise credentials_exception
-        user = session.exec(select(User).where(User.uuid == token_data.user_uuid)).first()
-        if user is None:
-            raise credentials_exception
-        for scope in security_scopes.scopes:
-            if scope not in token_data.scopes:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Not enough permissions",
-                    headers={"WWW-Authenticate": authenticate_value},
-                )
-        return user
+def async_engine(database_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragma)
+    return engine
+
+@pytest.fixture
+def client(session: Session, async_engine):
+    async def get_db_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
     
+    pool_metrics.watch(async_engine)
     app.dependency_overrides[get_db] = get_db_override
-    app.dependency_overrides[get_current_user] = override_get_current_user
+    exercise_catalog.clear()
+    reference_data.clear()
+    token_versions.clear()
+    pool_metrics.clear()
 
     client = TestClient(app)
     admin_data = {
@@ -120,6 +113,7 @@ def client(session: Session):
     client.post("/users/register", json=user_data).json()
     user: User = session.exec(select(User).where(User.username == "admin")).first()
     user.roles = [session.exec(select(Role).where(Role.name == "Admin")).first()]
+    session.commit()
 
 
     yield client
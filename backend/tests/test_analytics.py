@@ -0,0 +1,171 @@
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
+from uuid import uuid4
+from fastapi.testclient import TestClient
+import numpy as np
+from db import Session
+from models.enums import OneRepMaxFormula
+from utilities.analytics import estimated_1rm, week_starts
+from utilities.training_volume import rebuild_training_volume
+
+def test_estimated_1rm_formulas():
+    reps = np.array([0, 1, 5, 10, 40])
+    weight = np.array([100.0, 100.0, 100.0, 100.0, 100.0])
+    epley = estimated_1rm(reps, weight, OneRepMaxFormula.EPLEY)
+    brzycki = estimated_1rm(reps, weight, OneRepMaxFormula.BRZYCKI)
+    assert np.isnan(epley[0]) and np.isnan(brzycki[0]) and np.isnan(brzycki[4])
+    assert np.allclose(epley[1:], [100.0, 100 * (1 + 5 / 30), 100 * (1 + 10 / 30), 100 * (1 + 40 / 30)])
+    assert np.allclose(brzycki[1:4], [100.0, 100 * 36 / 32, 100 * 36 / 27])
+
+def test_week_starts_are_mondays():
+    days = np.array(["2024-01-01", "2024-01-03", "2024-01-07", "2024-01-08"], dtype="datetime64[D]")
+    assert week_starts(days).astype(str).tolist() == ["2024-01-01", "2024-01-01", "2024-01-01", "2024-01-08"]
+
+def test_exercise_analytics(client_full_db: TestClient):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    other_exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][1]["uuid"]
+    logs = [
+        ("2024-01-01T10:00:00", 5, 100.0),
+        ("2024-01-01T10:05:00", 1, 110.0),
+        ("2024-01-03T09:00:00", 8, 90.0),
+        ("2024-01-09T18:00:00", 5, 105.0),
+    ]
+    response = client_full_db.post("/users/me/exercise_logs/bulk", json=[
+        {"datetime_completed": completed, "exercise_uuid": exercise_uuid, "reps": reps, "weight": weight} for completed, reps, weight in logs
+    ] + [{"datetime_completed": "2024-01-02T10:00:00", "exercise_uuid": other_exercise_uuid, "reps": 3, "weight": 500.0}])
+    assert response.status_code == 201
+
+    response = client_full_db.get(f"/users/me/analytics/exercises/{exercise_uuid}", params={"trend_days": 7})
+    assert response.status_code == 200
+    assert response.json() == {
+        "data": {
+            "exercise_uuid": exercise_uuid,
+            "formula": "epley",
+            "trend_days": 7,
+            "total_sets": 4,
+            "total_reps": 19,
+            "total_volume": 1855.0,
+            "best_set": {"datetime_completed": "2024-01-09T18:00:00", "reps": 5, "weight": 105.0, "estimated_1rm": 122.5},
+            "rep_records": {
+                "reps": [1, 5, 8],
+                "weight": [110.0, 105.0, 90.0],
+                "datetime_completed": ["2024-01-01T10:05:00", "2024-01-09T18:00:00", "2024-01-03T09:00:00"],
+            },
+            "daily": {
+                "period_start": ["2024-01-01", "2024-01-03", "2024-01-09"],
+                "sets": [2, 1, 1],
+                "reps": [6, 8, 5],
+                "volume": [610.0, 720.0, 525.0],
+                "best_estimated_1rm": [116.67, 114.0, 122.5],
+                "trend": [116.67, 115.33, 118.25],
+            },
+            "weekly": {
+                "period_start": ["2024-01-01", "2024-01-08"],
+                "sets": [3, 1],
+                "reps": [14, 5],
+                "volume": [1330.0, 525.0],
+                "best_estimated_1rm": [116.67, 122.5],
+            },
+        },
+        "detail": "Exercise analytics fetched successfully.",
+    }
+
+    response = client_full_db.get(f"/users/me/analytics/exercises/{exercise_uuid}", params={"from": "2024-01-02T00:00:00", "to": "2024-01-09T00:00:00", "formula": "brzycki"})
+    data = response.json()["data"]
+    assert data["total_sets"] == 1
+    assert data["best_set"]["estimated_1rm"] == 111.72
+    assert data["weekly"]["period_start"] == ["2024-01-01"]
+
+def test_exercise_analytics_errors(client_full_db: TestClient):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    response = client_full_db.get(f"/users/me/analytics/exercises/{exercise_uuid}")
+    assert response.status_code == 200
+    assert response.json()["data"]["best_set"] is None
+    assert response.json()["data"]["daily"]["trend"] == []
+
+    missing_uuid = uuid4()
+    response = client_full_db.get(f"/users/me/analytics/exercises/{missing_uuid}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": f"Exercise UUID: {missing_uuid} not found."}
+
+    response = client_full_db.get(f"/users/me/analytics/exercises/{exercise_uuid}", params={"from": "2024-02-01T00:00:00", "to": "2024-01-01T00:00:00"})
+    assert response.status_code == 400
+
+def test_training_volume_summaries(client_full_db: TestClient, session: Session):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    own_exercise_uuid = client_full_db.post("/users/me/exercises", json={
+        "name": "Banded Chest Press",
+        "description": "Banded Chest Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    }).json()["data"]["uuid"]
+    log_uuid = client_full_db.post("/users/me/exercise_logs", json={"datetime_completed": "2024-01-01T10:00:00", "exercise_uuid": exercise_uuid, "reps": 5, "weight": 100.0}).json()["data"]["uuid"]
+    bulk_uuids = [log["uuid"] for log in client_full_db.post("/users/me/exercise_logs/bulk", json=[
+        {"datetime_completed": "2024-01-01T11:00:00", "exercise_uuid": exercise_uuid, "reps": 5, "weight": 100.0},
+        {"datetime_completed": "2024-01-02T10:00:00", "exercise_uuid": own_exercise_uuid, "reps": 10, "weight": 20.0},
+        {"datetime_completed": "2024-01-09T10:00:00", "exercise_uuid": exercise_uuid, "reps": 3, "weight": 120.0},
+    ]).json()["data"]]
+    client_full_db.put(f"/users/me/exercise_logs/{log_uuid}", json={"datetime_completed": "2024-01-03T10:00:00", "exercise_uuid": exercise_uuid, "reps": 8, "weight": 90.0})
+    client_full_db.patch(f"/users/me/exercise_logs/{bulk_uuids[2]}", json={"reps": 4})
+    client_full_db.delete(f"/users/me/exercise_logs/{bulk_uuids[0]}")
+
+    params = {"from": "2024-01-01", "to": "2024-01-15"}
+    daily = client_full_db.get("/users/me/analytics/volume/daily", params=params).json()
+    assert daily == {
+        "data": [
+            {"day": "2024-01-02", "exercise_uuid": own_exercise_uuid, "sets": 1, "reps": 10, "tonnage": 200.0},
+            {"day": "2024-01-03", "exercise_uuid": exercise_uuid, "sets": 1, "reps": 8, "tonnage": 720.0},
+            {"day": "2024-01-09", "exercise_uuid": exercise_uuid, "sets": 1, "reps": 4, "tonnage": 480.0},
+        ],
+        "detail": "Daily volume fetched successfully."
+    }
+    assert client_full_db.get("/users/me/analytics/volume/weekly", params=params).json()["data"] == [
+        {"week_start": "2024-01-01", "major_muscle": "Chest", "sets": 2, "reps": 18, "tonnage": 920.0},
+        {"week_start": "2024-01-08", "major_muscle": "Chest", "sets": 1, "reps": 4, "tonnage": 480.0},
+    ]
+
+    client_full_db.patch(f"/users/me/exercises/{own_exercise_uuid}", json={"major_muscle": "Shoulders"})
+    weekly = client_full_db.get("/users/me/analytics/volume/weekly", params=params).json()
+    assert weekly["data"] == [
+        {"week_start": "2024-01-01", "major_muscle": "Chest", "sets": 1, "reps": 8, "tonnage": 720.0},
+        {"week_start": "2024-01-01", "major_muscle": "Shoulders", "sets": 1, "reps": 10, "tonnage": 200.0},
+        {"week_start": "2024-01-08", "major_muscle": "Chest", "sets": 1, "reps": 4, "tonnage": 480.0},
+    ]
+
+    # Rebuilding from the logs gives the same summaries as maintaining them incrementally.
+    assert rebuild_training_volume(session) == 3
+    assert client_full_db.get("/users/me/analytics/volume/daily", params=params).json() == daily
+    assert client_full_db.get("/users/me/analytics/volume/weekly", params=params).json() == weekly
+
+    client_full_db.delete(f"/users/me/exercises/{own_exercise_uuid}")
+    assert [row["day"] for row in client_full_db.get("/users/me/analytics/volume/daily", params=params).json()["data"]] == ["2024-01-03", "2024-01-09"]
+    assert [row["major_muscle"] for row in client_full_db.get("/users/me/analytics/volume/weekly", params=params).json()["data"]] == ["Chest", "Chest"]
+
+    response = client_full_db.get("/users/me/analytics/volume/daily", params={"from": "2020-01-01", "to": "2024-01-01"})
+    assert response.status_code == 400
+
+def test_training_volume_of_other_users_is_left_alone(client_full_db: TestClient, client_login):
+    client = client_login("user", "user")
+    exercise_uuid = client.get("/users/me/exercises").json()["data"][0]["uuid"]
+    exercise_log_uuid = client.post("/users/me/exercise_logs", json={"datetime_completed": "2024-01-01T10:00:00", "exercise_uuid": exercise_uuid, "reps": 5, "weight": 100.0}).json()["data"]["uuid"]
+    params = {"from": "2024-01-01", "to": "2024-01-08"}
+    daily = client.get("/users/me/analytics/volume/daily", params=params).json()
+    weekly = client.get("/users/me/analytics/volume/weekly", params=params).json()
+
+    client = client_login("ZeroCool", "hackers")
+    assert client.patch(f"/users/me/exercise_logs/{exercise_log_uuid}", json={"reps": 50, "datetime_completed": "2024-01-02T10:00:00"}).status_code == 404
+    assert client.delete(f"/users/me/exercise_logs/{exercise_log_uuid}").status_code == 404
+    assert client.get("/users/me/analytics/volume/daily", params=params).json()["data"] == []
+
+    client = client_login("user", "user")
+    assert client.get("/users/me/analytics/volume/daily", params=params).json() == daily
+    assert client.get("/users/me/analytics/volume/weekly", params=params).json() == weekly
+    assert daily["data"] == [{"day": "2024-01-01", "exercise_uuid": exercise_uuid, "sets": 1, "reps": 5, "tonnage": 500.0}]
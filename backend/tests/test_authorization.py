@@ -1,10 +1,19 @@
-from tests.fixtures import session, client, client_full_db, client_login 
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login 
+import asyncio
+import threading
 import pytest
 from uuid import UUID
 from fastapi.testclient import TestClient
 from httpx import Response
+from fastapi import HTTPException
 from db import Session
 from sqlmodel import select
+from bcrypt import checkpw
+from jose import jwt
+from sqlalchemy import event
+from models.relationship_merge import User
+from utilities.hashed_password import PasswordHasherPool, hash_password, password_hasher
+from utilities.authorization import SECRET_KEY, ALGORITHM
 
 def test_register(client: TestClient):
     response: Response = client.post("/users/register", json={
@@ -35,4 +44,108 @@ def test_login(client: TestClient):
     assert response.status_code == 200
     assert "access_token" in response_dict
     assert "token_type" in response_dict
-    assert response_dict["token_type"] == "bearer"
\ No newline at end of file
+    assert response_dict["token_type"] == "bearer"
+def test_login_rejected_when_password_pool_is_saturated(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    rejected = password_hasher.rejected
+    response: Response = client.post("/users/login", data={"username": "user", "password": "user"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.rejected == rejected + 1
+
+def test_failed_password_checks_are_not_counted_as_completed():
+    completed, failed = password_hasher.completed, password_hasher.failed
+    with pytest.raises(ValueError):
+        asyncio.run(password_hasher.verify("user", "not a bcrypt hash"))
+    assert (password_hasher.completed, password_hasher.failed) == (completed, failed + 1)
+    assert asyncio.run(password_hasher.verify("user", hash_password("user")))
+    assert (password_hasher.completed, password_hasher.failed) == (completed + 1, failed + 1)
+
+def test_cancelled_password_hash_still_counts_against_admission():
+    pool = PasswordHasherPool(max_workers=1, max_pending=2)
+    release = threading.Event()
+    async def abandon_then_retry():
+        abandoned = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        abandoned.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await abandoned
+        assert pool.pending == 1
+        queued = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exception:
+            await pool.run(release.wait, 5)
+        assert exception.value.status_code == 503
+        release.set()
+        await queued
+    asyncio.run(abandon_then_retry())
+    pool._executor.shutdown(wait=True)
+    assert (pool.pending, pool.completed, pool.failed, pool.rejected) == (0, 2, 0, 1)
+
+def test_change_password_is_hashed_once(client_login, session: Session):
+    client: TestClient = client_login("user", "user")
+    response: Response = client.patch("/users/me/change_password", json={"password": "new_password"})
+    assert response.status_code == 200
+    response = client.post("/users/login", data={"username": "user", "password": "new_password"})
+    assert response.status_code == 200
+    hashed_password = session.exec(select(User.hashed_password).where(User.username == "user")).first()
+    assert checkpw(b"new_password", hashed_password.encode())
+
+def test_access_token_carries_roles_and_version(client: TestClient):
+    response: Response = client.post("/users/login", data={"username": "admin", "password": "admin"})
+    payload = jwt.decode(response.json()["access_token"], SECRET_KEY, algorithms=[ALGORITHM])
+    assert payload["roles"] == ["Admin"]
+    assert payload["ver"] == 0
+
+def test_check_roles_reads_roles_from_token(client_login, async_engine):
+    client: TestClient = client_login("user", "user")
+    client.get("/users/me/exercises")
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    engine = async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        response: Response = client.get("/users/all")
+        assert response.status_code == 403
+        assert len(statements) == 1
+        statements.clear()
+        response = client.get("/users/me")
+        assert response.status_code == 200
+        assert len([statement for statement in statements if "FROM user" in statement]) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+def test_role_change_revokes_tokens(client_login, session: Session):
+    client: TestClient = client_login("user", "user")
+    user_token = client.headers["Authorization"]
+    user_uuid = client.get("/users/me").json()["data"]["uuid"]
+    client = client_login("admin", "admin")
+    response: Response = client.patch(f"/users/{user_uuid}/change_roles", json={"roles": ["Admin"]})
+    assert response.status_code == 200
+    response = client.get("/users/me", headers={"Authorization": user_token})
+    assert response.status_code == 401
+    client = client_login("user", "user")
+    assert client.get("/users/all").status_code == 200
+
+def test_password_change_revokes_tokens(client_login):
+    client: TestClient = client_login("user", "user")
+    old_token = client.headers["Authorization"]
+    client.patch("/users/me/change_password", json={"password": "new_password"})
+    response: Response = client.get("/users/me", headers={"Authorization": old_token})
+    assert response.status_code == 401
+
+def test_revocations_bump_the_stored_token_version(client_login, session: Session):
+    client: TestClient = client_login("user", "user")
+    user_uuid = client.get("/users/me").json()["data"]["uuid"]
+    client.patch("/users/me/change_password", json={"password": "new_password"})
+    client = client_login("user", "new_password")
+    client.patch("/users/me/change_password", json={"password": "user"})
+    session.expire_all()
+    user = session.exec(select(User).where(User.username == "user")).one()
+    assert user.token_version == 2
+    client = client_login("user", "user")
+    user_token = client.headers["Authorization"]
+    client = client_login("admin", "admin")
+    assert client.delete(f"/users/{user_uuid}").status_code == 204
+    assert client.get("/users/me", headers={"Authorization": user_token}).status_code == 401
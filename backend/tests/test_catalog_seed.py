@@ -0,0 +1,83 @@
+import json
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlmodel import SQLModel, Session, create_engine, select, func
+from sqlmodel.pool import StaticPool
+from models.relationship_merge import Exercise, ExerciseSpecificMuscleLink, SpecificMuscle, Role, BandColor
+from utilities.catalog_seed import seed_catalog, load_seed_data
+from db import migrate_database
+
+
+@pytest.fixture
+def empty_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+def count(engine, model) -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(model)).one()
+
+def test_seed_catalog_from_empty_database(empty_engine):
+    exercise_data = load_seed_data()
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(empty_engine, "before_cursor_execute", count_statement)
+    report = seed_catalog(empty_engine)
+    event.remove(empty_engine, "before_cursor_execute", count_statement)
+    assert report.exercises == len(exercise_data) == count(empty_engine, Exercise)
+    assert report.specific_muscle_links == sum(len(exercise["specificMuscles"]) for exercise in exercise_data) == count(empty_engine, ExerciseSpecificMuscleLink)
+    assert count(empty_engine, Role) == 2
+    assert count(empty_engine, BandColor) == 7
+    assert len(statements) < 50
+    assert report.timings["total"] < 5
+
+def test_seed_catalog_skips_unchanged_seed_file(empty_engine, tmp_path):
+    assert not seed_catalog(empty_engine).skipped
+    assert seed_catalog(empty_engine).skipped
+    seed_file = tmp_path / "seed.json"
+    seed_file.write_text(json.dumps(load_seed_data()[:1] + [{**load_seed_data()[0], "name": "New Exercise"}]))
+    report = seed_catalog(empty_engine, path=str(seed_file))
+    assert not report.skipped
+    assert report.exercises == 1
+    assert seed_catalog(empty_engine, path=str(seed_file)).skipped
+
+def test_seed_catalog_is_idempotent_and_fills_gaps(empty_engine):
+    seed_catalog(empty_engine)
+    assert seed_catalog(empty_engine, force=True).exercises == 0
+    with Session(empty_engine) as session:
+        exercise = session.exec(select(Exercise).where(Exercise.name == "3/4 Sit-Up")).one()
+        exercise_uuid = exercise.uuid
+        session.delete(exercise)
+        session.exec(ExerciseSpecificMuscleLink.__table__.delete().where(ExerciseSpecificMuscleLink.exercise_id == exercise.id))
+        abdominals = session.exec(select(SpecificMuscle.id).where(SpecificMuscle.name == "Abdominals")).one()
+        other = session.exec(select(Exercise).where(Exercise.name == "45° Side Bend")).one()
+        session.exec(ExerciseSpecificMuscleLink.__table__.delete().where(ExerciseSpecificMuscleLink.exercise_id == other.id))
+        session.commit()
+    report = seed_catalog(empty_engine, force=True)
+    assert report.reference_rows == 0
+    assert report.exercises == 1
+    assert report.specific_muscle_links == 3 + len(load_seed_data()[1]["specificMuscles"])
+    with Session(empty_engine) as session:
+        exercise = session.exec(select(Exercise).where(Exercise.name == "3/4 Sit-Up")).one()
+        assert exercise.uuid != exercise_uuid
+        assert abdominals in session.exec(select(ExerciseSpecificMuscleLink.specific_muscle_id).where(ExerciseSpecificMuscleLink.exercise_id == exercise.id)).all()
+
+def test_migrate_database_stamps_new_and_upgrades_existing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrate.db'}")
+    migrate_database(engine)
+    with engine.connect() as connection:
+        head = connection.execute(text("SELECT version_num FROM alembic_version")).scalar_one()
+    assert "dailyexercisevolume" in inspect(engine).get_table_names()
+    # A second run finds nothing to do instead of failing on tables create_all already made.
+    migrate_database(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE dailyexercisevolume"))
+        connection.execute(text("DROP TABLE weeklymusclevolume"))
+        connection.execute(text("UPDATE alembic_version SET version_num = 'f2c6b8d3e519'"))
+    migrate_database(engine)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar_one() == head
+    assert {"dailyexercisevolume", "weeklymusclevolume"} <= set(inspect(engine).get_table_names())
+    engine.dispose()
@@ -1,18 +1,24 @@
-from tests.fixtures import session, client, client_full_db, client_login
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
+from datetime import datetime, timedelta
 from uuid import UUID
 from fastapi.testclient import TestClient
 from httpx import Response
 from db import Session
+from sqlalchemy import event, text
 from sqlmodel import select
 from models.relationship_merge import ExerciseLog, Exercise, User
+from utilities.pagination import encode_cursor
 
 def test_empty_get_exercise_logs(client_login: TestClient):
     client: TestClient = client_login("user", "user")
     response: Response = client.get(f"/users/me/exercise_logs")
     response_dict: dict[str, object] = response.json()
     assert response.status_code == 200
+    assert response_dict.pop("sync_token")
     assert response_dict == {
         "data": [],
+        "next_cursor": None,
+        "deleted": None,
         "detail": "Exercise Logs fetched successfully."
         }
 
@@ -172,4 +178,218 @@ def test_delete_exercise(client_full_db: TestClient, session: Session):
     assert response.status_code == 404
     assert response_dict == {
         "detail": f"Exercise Log UUID: {exercise_log_uuid} not found."
-        }
\ No newline at end of file
+        }
+def test_post_exercise_log_uses_exercise_uuid_map(client_full_db: TestClient, async_engine):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    response = client_full_db.post("/users/me/exercise_logs", json={
+        "datetime_completed": "2022-01-01T12:00:00",
+        "exercise_uuid": exercise_uuid,
+        "reps": 10,
+        "weight": 145.0
+        })
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 201
+    assert not any(statement.startswith("SELECT exercise.id \nFROM exercise \nWHERE exercise.uuid") for statement in statements)
+    response = client_full_db.post("/users/me/exercise_logs", json={
+        "datetime_completed": "2022-01-01T12:00:00",
+        "exercise_uuid": str(UUID(int=0)),
+        "reps": 10,
+        "weight": 145.0
+        })
+    assert response.status_code == 404
+
+def test_uuid_stored_as_bytes_on_sqlite(client_full_db: TestClient, session: Session):
+    exercise = session.exec(select(Exercise)).first()
+    stored = session.exec(text("SELECT uuid FROM exercise WHERE id = :id"), params={"id": exercise.id}).one()[0]
+    assert stored == exercise.uuid.bytes
+    assert session.exec(select(Exercise.id).where(Exercise.uuid == exercise.uuid)).one() == exercise.id
+
+def test_exercise_logs_keyset_pagination(client_full_db: TestClient):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    for day in (5, 3, 3, 1, 4):
+        client_full_db.post("/users/me/exercise_logs", json={
+            "datetime_completed": f"2022-01-0{day}T12:00:00",
+            "exercise_uuid": exercise_uuid,
+            "reps": day,
+            "weight": 100.0
+            })
+    full = client_full_db.get("/users/me/exercise_logs").json()
+    assert full["next_cursor"] is None
+    assert [exercise_log["reps"] for exercise_log in full["data"]] == [1, 3, 3, 4, 5]
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client_full_db.get("/users/me/exercise_logs", params=params).json()
+        pages.append([exercise_log["uuid"] for exercise_log in response["data"]])
+        cursor = response["next_cursor"]
+        if cursor is None:
+            break
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == [exercise_log["uuid"] for exercise_log in full["data"]]
+    assert client_full_db.get("/users/me/exercise_logs", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client_full_db.get("/users/me/exercise_logs", params={"limit": 0}).status_code == 422
+
+def test_exercise_logs_sparse_fieldsets(client_full_db: TestClient, async_engine):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    client_full_db.post("/users/me/exercise_logs", json={
+        "datetime_completed": "2022-01-01T12:00:00",
+        "exercise_uuid": exercise_uuid,
+        "reps": 10,
+        "weight": 145.0
+        })
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    response = client_full_db.get("/users/me/exercise_logs", params={"fields": "reps,exercise.uuid"})
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 200
+    exercise_log = response.json()["data"][0]
+    assert set(exercise_log) == {"uuid", "reps", "exercise"}
+    assert exercise_log["reps"] == 10
+    assert exercise_log["exercise"] == {"uuid": exercise_uuid}
+    assert not any("exercisespecificmusclelink" in statement for statement in statements)
+    response = client_full_db.get("/users/me/exercise_logs", params={"fields": "reps"})
+    assert set(response.json()["data"][0]) == {"uuid", "reps"}
+    response = client_full_db.get("/users/me/exercise_logs", params={"fields": "reps,exercise.colour"})
+    assert response.status_code == 400
+
+def test_exercise_logs_time_range_filters(client_full_db: TestClient, session: Session):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuids = [exercise["uuid"] for exercise in client_full_db.get("/users/me/exercises").json()["data"][:2]]
+    for day in range(1, 8):
+        client_full_db.post("/users/me/exercise_logs", json={
+            "datetime_completed": f"2022-01-0{day}T12:00:00",
+            "exercise_uuid": exercise_uuids[day % 2],
+            "reps": day,
+            "weight": 100.0
+            })
+    response = client_full_db.get("/users/me/exercise_logs", params={"from": "2022-01-03T00:00:00", "to": "2022-01-06T00:00:00"})
+    assert response.status_code == 200
+    assert [exercise_log["reps"] for exercise_log in response.json()["data"]] == [3, 4, 5]
+    response = client_full_db.get("/users/me/exercise_logs", params={"from": "2022-01-03T00:00:00", "exercise_uuid": exercise_uuids[0]})
+    assert [exercise_log["reps"] for exercise_log in response.json()["data"]] == [4, 6]
+    response = client_full_db.get("/users/me/exercise_logs", params={"from": "2022-01-03T00:00:00", "limit": 2})
+    second = client_full_db.get("/users/me/exercise_logs", params={"from": "2022-01-03T00:00:00", "limit": 2, "cursor": response.json()["next_cursor"]})
+    assert [exercise_log["reps"] for exercise_log in second.json()["data"]] == [5, 6]
+    assert client_full_db.get("/users/me/exercise_logs", params={"from": "2022-01-06T00:00:00", "to": "2022-01-03T00:00:00"}).status_code == 400
+    assert client_full_db.get("/users/me/exercise_logs", params={"exercise_uuid": str(UUID(int=0))}).status_code == 404
+    plan = session.exec(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM exerciselog WHERE user_id = 1 AND exercise_id = 1 AND datetime_completed >= '2022-01-03' ORDER BY datetime_completed, id"
+    )).all()
+    assert any("ix_exerciselog_user_id_exercise_id_datetime_completed" in row[-1] for row in plan)
+
+def test_exercise_logs_store_tz_aware_times_as_utc(client_full_db: TestClient):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    response = client_full_db.post("/users/me/exercise_logs", json={"datetime_completed": "2022-01-01T14:00:00+02:00", "exercise_uuid": exercise_uuid, "reps": 5, "weight": 100.0})
+    assert response.status_code == 201
+    assert response.json()["data"]["datetime_completed"] == "2022-01-01T12:00:00"
+    response = client_full_db.patch(f"/users/me/exercise_logs/{response.json()['data']['uuid']}", json={"datetime_completed": "2022-01-02T12:00:00Z"})
+    assert response.json()["data"]["datetime_completed"] == "2022-01-02T12:00:00"
+    response = client_full_db.get("/users/me/exercise_logs", params={"from": "2022-01-02T13:00:00+02:00", "to": "2022-01-02T12:00:01Z"})
+    assert response.status_code == 200
+    assert [exercise_log["datetime_completed"] for exercise_log in response.json()["data"]] == ["2022-01-02T12:00:00"]
+    response = client_full_db.get(f"/users/me/analytics/exercises/{exercise_uuid}", params={"from": "2022-01-02T11:00:00Z", "to": "2022-01-02T15:00:00+02:00"})
+    assert response.json()["data"]["total_sets"] == 1
+
+def test_bulk_create_exercise_logs(client_full_db: TestClient, async_engine):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuids = [exercise["uuid"] for exercise in client_full_db.get("/users/me/exercises").json()["data"]]
+    exercise_logs = [{
+        "datetime_completed": f"2022-01-01T12:{minute:02d}:00",
+        "exercise_uuid": exercise_uuids[minute % len(exercise_uuids)],
+        "reps": minute,
+        "weight": 100.0
+        } for minute in range(25)]
+    exercise_logs[3]["exercise_uuid"] = str(UUID(int=0))
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    response = client_full_db.post("/users/me/exercise_logs/bulk", json=exercise_logs)
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 201
+    response_dict = response.json()
+    assert response_dict["errors"] == [{"index": 3, "detail": f"Exercise UUID: {UUID(int=0)} not found."}]
+    assert [exercise_log["reps"] for exercise_log in response_dict["data"]] == [minute for minute in range(25) if minute != 3]
+    assert all(exercise_log["exercise"]["uuid"] == exercise_uuids[exercise_log["reps"] % len(exercise_uuids)] for exercise_log in response_dict["data"])
+    assert len([statement for statement in statements if statement.startswith("INSERT INTO exerciselog")]) == 1
+    assert len(statements) < 12
+    stored = client_full_db.get("/users/me/exercise_logs").json()["data"]
+    assert sorted(exercise_log["uuid"] for exercise_log in stored) == sorted(exercise_log["uuid"] for exercise_log in response_dict["data"])
+    assert client_full_db.post("/users/me/exercise_logs/bulk", json=[]).status_code == 422
+
+def test_exercise_logs_delta_sync(client_full_db: TestClient, monkeypatch):
+    monkeypatch.setattr("utilities.sync.SYNC_OVERLAP", timedelta(0))
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    def create_exercise_log(reps: int) -> str:
+        return client_full_db.post("/users/me/exercise_logs", json={
+            "datetime_completed": "2022-01-01T12:00:00",
+            "exercise_uuid": exercise_uuid,
+            "reps": reps,
+            "weight": 100.0
+            }).json()["data"]["uuid"]
+    patched, deleted, unchanged = create_exercise_log(1), create_exercise_log(2), create_exercise_log(3)
+    full = client_full_db.get("/users/me/exercise_logs").json()
+    assert full["deleted"] is None
+    client_full_db.patch(f"/users/me/exercise_logs/{patched}", json={"reps": 10})
+    client_full_db.delete(f"/users/me/exercise_logs/{deleted}")
+    created = create_exercise_log(4)
+    delta = client_full_db.get("/users/me/exercise_logs", params={"since": full["sync_token"]}).json()
+    assert sorted(exercise_log["uuid"] for exercise_log in delta["data"]) == sorted([patched, created])
+    assert unchanged not in [exercise_log["uuid"] for exercise_log in delta["data"]]
+    assert delta["deleted"] == [deleted]
+    empty = client_full_db.get("/users/me/exercise_logs", params={"since": delta["sync_token"]}).json()
+    assert empty["data"] == [] and empty["deleted"] == []
+    assert client_full_db.get("/users/me/exercise_logs", params={"since": "not-a-token"}).status_code == 400
+    assert client_full_db.get("/users/me/exercise_logs", params={"since": encode_cursor(datetime(2000, 1, 1))}).status_code == 410
+
+def test_exercise_rename_reaches_delta_syncs(client_full_db: TestClient, client_login, monkeypatch):
+    monkeypatch.setattr("utilities.sync.SYNC_OVERLAP", timedelta(0))
+    client = client_login("user", "user")
+    exercise_uuid = client.get("/users/me/exercises").json()["data"][0]["uuid"]
+    exercise_log_uuid = client.post("/users/me/exercise_logs", json={"datetime_completed": "2022-01-01T12:00:00", "exercise_uuid": exercise_uuid, "reps": 5, "weight": 100.0}).json()["data"]["uuid"]
+    workout_exercise_uuid = client.post("/users/me/workout-exercises", json={"planned_sets": 3, "planned_reps": 10, "planned_resistance_weight": 100.0, "exercise_uuid": exercise_uuid}).json()["data"]["uuid"]
+    exercise_logs_token = client.get("/users/me/exercise_logs").json()["sync_token"]
+    workout_exercises_token = client.get("/users/me/workout-exercises").json()["sync_token"]
+
+    client = client_login("admin", "admin")
+    assert client.patch(f"/users/me/exercises/{exercise_uuid}", json={"name": "Renamed Press"}).status_code == 200
+    client = client_login("user", "user")
+    delta = client.get("/users/me/exercise_logs", params={"since": exercise_logs_token}).json()["data"]
+    assert [(exercise_log["uuid"], exercise_log["exercise"]["name"]) for exercise_log in delta] == [(exercise_log_uuid, "Renamed Press")]
+    delta = client.get("/users/me/workout-exercises", params={"since": workout_exercises_token}).json()["data"]
+    assert [(workout_exercise["uuid"], workout_exercise["exercise"]["name"]) for workout_exercise in delta] == [(workout_exercise_uuid, "Renamed Press")]
+
+def test_exercise_logs_of_other_users_cannot_be_patched_or_deleted(client_full_db: TestClient, client_login):
+    client = client_login("user", "user")
+    exercise_uuid = client.get("/users/me/exercises").json()["data"][0]["uuid"]
+    exercise_log_uuid = client.post("/users/me/exercise_logs", json={"datetime_completed": "2022-01-01T12:00:00", "exercise_uuid": exercise_uuid, "reps": 5, "weight": 100.0}).json()["data"]["uuid"]
+    sync_token = client.get("/users/me/exercise_logs").json()["sync_token"]
+
+    client = client_login("ZeroCool", "hackers")
+    response = client.patch(f"/users/me/exercise_logs/{exercise_log_uuid}", json={"reps": 50})
+    assert response.status_code == 404
+    assert response.json() == {"detail": f"Exercise log UUID: {exercise_log_uuid} not found."}
+    assert client.delete(f"/users/me/exercise_logs/{exercise_log_uuid}").status_code == 404
+
+    client = client_login("user", "user")
+    assert client.get(f"/users/me/exercise_logs/{exercise_log_uuid}").json()["data"]["reps"] == 5
+    response = client.get("/users/me/exercise_logs", params={"since": sync_token})
+    assert response.json()["deleted"] == []
@@ -1,11 +1,17 @@
-from tests.fixtures import session, client, client_full_db, client_login 
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login 
+import asyncio
 import pytest
 from uuid import UUID
 from fastapi.testclient import TestClient
 from httpx import Response
 from db import Session
 from sqlmodel import select
-from models.relationship_merge import Exercise
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.relationship_merge import Exercise, ExerciseSpecificMuscleLink, SpecificMuscle
+from models.responses import ExerciseListResponse
+from utilities.exercise_catalog import exercise_catalog
+from utilities.exercise_loader import load_exercises
 
 def test_get_empty_exercises(client_login: TestClient):
     client = client_login("admin", "admin")
@@ -65,6 +71,8 @@ def test_get_exercises(client_full_db: TestClient, session: Session):
             "image_url": None
         },
         ],
+        'next_cursor': None,
+        'facets': None,
         'detail': 'Exercises fetched successfully.'
     }
 
@@ -190,3 +198,241 @@ def test_delete_exercise(client_full_db: TestClient, session: Session):
     exercise_uuid: str = str(session.exec(select(Exercise).where(Exercise.uuid == UUID(response_dict['data'][1]['uuid']))).first().uuid)  
     response: Response = client_full_db.delete(f"/users/me/exercises/{exercise_uuid}")
     assert response.status_code == 204
+
+def test_exercise_catalog_cache(client_full_db: TestClient):
+    stats = exercise_catalog.stats()
+    client_full_db.get("/users/me/exercises")
+    client_full_db.get("/users/me/exercises")
+    assert exercise_catalog.stats()["hits"] > stats["hits"]
+    new_exercise = {
+        "name": "Cable Chest Fly",
+        "description": "Cable Chest Fly Description",
+        "workout_category": "Upper",
+        "movement_category": "Fly",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    }
+    client_full_db.post("/users/me/exercises", json=new_exercise)
+    assert exercise_catalog.stats()["catalog_version"] == stats["catalog_version"] + 1
+    response: Response = client_full_db.get("/users/me/exercises")
+    assert [exercise["name"] for exercise in response.json()["data"]] == [
+        "Barbell Chest Press", "Cable Chest Fly", "Dumbbell Chest Fly", "Dumbbell Chest Press"
+    ]
+
+def test_exercise_catalog_user_overlay(client_full_db: TestClient, client_login):
+    client = client_login("user", "user")
+    catalog_version = exercise_catalog.stats()["catalog_version"]
+    new_exercise = {
+        "name": "Banded Chest Press",
+        "description": "Banded Chest Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    }
+    client.post("/users/me/exercises", json=new_exercise)
+    assert exercise_catalog.stats()["catalog_version"] == catalog_version
+    response: Response = client.get("/users/me/exercises")
+    assert [exercise["name"] for exercise in response.json()["data"]] == [
+        "Banded Chest Press", "Barbell Chest Press", "Dumbbell Chest Fly", "Dumbbell Chest Press"
+    ]
+    response = client.get("/users/me/exercises", params={"user_created": True})
+    assert [exercise["name"] for exercise in response.json()["data"]] == ["Banded Chest Press"]
+    client = client_login("admin", "admin")
+    response = client.get("/users/me/exercises")
+    assert "Banded Chest Press" not in [exercise["name"] for exercise in response.json()["data"]]
+
+def test_load_exercises_query_count_is_constant(client_full_db: TestClient, session: Session, async_engine):
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    async def load_admin_exercises():
+        async with AsyncSession(async_engine) as async_session:
+            return await load_exercises(async_session, Exercise.user_id == None)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        assert len(asyncio.run(load_admin_exercises())) == 3
+        statements.clear()
+        assert len(asyncio.run(load_admin_exercises())) == 3
+        small_catalog_queries = len(statements)
+        workout_category_id, movement_category_id, major_muscle_id, equipment_id = session.exec(
+            select(Exercise.workout_category_id, Exercise.movement_category_id, Exercise.major_muscle_id, Exercise.equipment_id)
+        ).first()
+        specific_muscle_ids = session.exec(select(SpecificMuscle.id)).all()[:3]
+        for index in range(50):
+            exercise = Exercise(name=f"Exercise {index}", description="Description", workout_category_id=workout_category_id,
+                                movement_category_id=movement_category_id, major_muscle_id=major_muscle_id, equipment_id=equipment_id)
+            session.add(exercise)
+            session.flush()
+            session.add_all(ExerciseSpecificMuscleLink(exercise_id=exercise.id, specific_muscle_id=specific_muscle_id) for specific_muscle_id in specific_muscle_ids)
+        session.commit()
+        statements.clear()
+        exercises = asyncio.run(load_admin_exercises())
+        assert len(exercises) == 53
+        assert len(statements) == small_catalog_queries
+        assert all(len(exercise.specific_muscles) >= 2 for exercise in exercises)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+def test_exercise_write_path_uses_reference_data(client_full_db: TestClient, async_engine):
+    new_exercise = {
+        "name": "Cable Chest Fly",
+        "description": "Cable Chest Fly Description",
+        "workout_category": "Upper",
+        "movement_category": "Fly",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest", "Triceps"]
+    }
+    client_full_db.get("/users/me/exercises")
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response: Response = client_full_db.post("/users/me/exercises", json=new_exercise)
+        assert response.status_code == 201
+        assert response.json()["data"]["specific_muscles"] == ["Middle Chest", "Triceps"]
+        assert response.json()["data"]["movement_category"] == "Fly"
+        exercise_statements = [statement for statement in statements if "exercise" in statement]
+        assert len(exercise_statements) == 2
+        assert all(statement.startswith("INSERT") for statement in exercise_statements)
+        assert not any(f"FROM {table}" in statement for table in ("workoutcategory", "movementcategory", "majormuscle", "equipment", "specificmuscle") for statement in statements)
+        statements.clear()
+        response = client_full_db.patch(f"/users/me/exercises/{response.json()['data']['uuid']}", json={"equipment": "Barbell"})
+        assert response.status_code == 200
+        assert response.json()["data"]["equipment"] == "Barbell"
+        assert response.json()["data"]["specific_muscles"] == ["Middle Chest", "Triceps"]
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    response = client_full_db.patch(f"/users/me/exercises/{response.json()['data']['uuid']}", json={"equipment": "Trampoline"})
+    assert response.status_code == 404
+    assert response.json()["detail"].startswith("Equipment 'Trampoline' is not a valid option. These are valid options: ['")
+
+def test_exercises_keyset_pagination(client_full_db: TestClient):
+    full = client_full_db.get("/users/me/exercises").json()["data"]
+    response: Response = client_full_db.get("/users/me/exercises", params={"limit": 2})
+    first = response.json()
+    assert first["data"] == full[:2]
+    assert first["next_cursor"] is not None
+    second = client_full_db.get("/users/me/exercises", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert second["data"] == full[2:4]
+    assert second["next_cursor"] is None
+
+def test_exercises_sparse_fieldsets(client_full_db: TestClient):
+    full = client_full_db.get("/users/me/exercises").json()["data"]
+    response: Response = client_full_db.get("/users/me/exercises", params={"fields": "name"})
+    assert response.status_code == 200
+    assert response.json()["data"] == [{"uuid": exercise["uuid"], "name": exercise["name"]} for exercise in full]
+    response = client_full_db.get(f"/users/me/exercises/{full[0]['uuid']}", params={"fields": "name,specific_muscles"})
+    assert response.json()["data"] == {key: full[0][key] for key in ("uuid", "name", "specific_muscles")}
+    response = client_full_db.get("/users/me/exercises", params={"fields": "name,weight"})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Fields ['weight'] are not valid options.")
+
+def test_search_exercises(client_full_db: TestClient, client_login):
+    client = client_login("user", "user")
+    client.post("/users/me/exercises", json={
+        "name": "Banded Chest Press",
+        "description": "Banded Chest Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    })
+    response: Response = client.get("/users/me/exercises/search", params={"q": "Chest PRESS"})
+    assert response.status_code == 200
+    assert sorted(exercise["name"] for exercise in response.json()["data"]) == ["Banded Chest Press", "Barbell Chest Press", "Dumbbell Chest Press"]
+    response = client.get("/users/me/exercises/search", params={"q": "dumbbell fly"})
+    assert [exercise["name"] for exercise in response.json()["data"]] == ["Dumbbell Chest Fly"]
+    response = client.get("/users/me/exercises/search", params={"q": "chest", "limit": 2})
+    assert len(response.json()["data"]) == 2
+    assert client.get("/users/me/exercises/search", params={"q": "trampoline"}).json()["data"] == []
+    assert client.get("/users/me/exercises/search", params={"q": ""}).status_code == 422
+    client = client_login("admin", "admin")
+    response = client.get("/users/me/exercises/search", params={"q": "banded"})
+    assert response.json()["data"] == []
+
+def test_autocomplete_exercises(client_full_db: TestClient, client_login, async_engine):
+    client = client_login("user", "user")
+    client.post("/users/me/exercises", json={
+        "name": "Dumbbell Bench Press",
+        "description": "Dumbbell Bench Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    })
+    client.get("/users/me/exercises/autocomplete", params={"prefix": "d"})
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    response: Response = client.get("/users/me/exercises/autocomplete", params={"prefix": "dumbbell "})
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 200
+    assert [exercise["name"] for exercise in response.json()["data"]] == ["Dumbbell Bench Press", "Dumbbell Chest Fly", "Dumbbell Chest Press"]
+    assert set(response.json()["data"][0]) == {"uuid", "name"}
+    assert not any("FROM exercise" in statement for statement in statements)
+    response = client.get("/users/me/exercises/autocomplete", params={"prefix": "DUMBBELL C", "limit": 1})
+    assert [exercise["name"] for exercise in response.json()["data"]] == ["Dumbbell Chest Fly"]
+    assert client.get("/users/me/exercises/autocomplete", params={"prefix": "z"}).json()["data"] == []
+
+def test_exercise_facets(client_full_db: TestClient, client_login):
+    client = client_login("user", "user")
+    client.post("/users/me/exercises", json={
+        "name": "Banded Chest Press",
+        "description": "Banded Chest Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    })
+    response: Response = client.get("/users/me/exercises", params={"equipment": "Dumbbell", "movement_category": "Press"})
+    assert response.status_code == 200
+    response_dict = response.json()
+    assert [exercise["name"] for exercise in response_dict["data"]] == ["Banded Chest Press", "Dumbbell Chest Press"]
+    assert response_dict["facets"]["equipment"] == {"Barbell": 1, "Dumbbell": 2}
+    assert response_dict["facets"]["movement_category"] == {"Fly": 1, "Press": 2}
+    assert response_dict["facets"]["specific_muscles"] == {"Middle Chest": 2, "Triceps": 1}
+    response = client.get("/users/me/exercises", params={"specific_muscles": ["Middle Chest", "Triceps"]})
+    assert len(response.json()["data"]) == 4
+    response = client.get("/users/me/exercises", params={"specific_muscles": ["Middle Chest", "Triceps"], "specific_muscles_match": "all"})
+    assert "Banded Chest Press" not in [exercise["name"] for exercise in response.json()["data"]]
+    assert len(response.json()["data"]) == 3
+    response = client.get("/users/me/exercises", params={"user_created": True, "facet_counts": True})
+    assert [exercise["name"] for exercise in response.json()["data"]] == ["Banded Chest Press"]
+    assert response.json()["facets"]["workout_category"] == {"Upper": 1}
+    assert client.get("/users/me/exercises").json()["facets"] is None
+    response = client.get("/users/me/exercises", params={"equipment": "Trampoline"})
+    assert response.status_code == 404
+
+def test_exercise_list_served_from_encoded_catalog(client_full_db: TestClient, client_login):
+    client = client_login("user", "user")
+    client.post("/users/me/exercises", json={
+        "name": "Banded Chest Press",
+        "description": "Banded Chest Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    })
+    for params in ({}, {"user_created": True}, {"admin_created": True}):
+        encoded: Response = client.get("/users/me/exercises", params=params)
+        assert encoded.headers["content-type"] == "application/json"
+        assert "etag" in encoded.headers
+        validated = client.get("/users/me/exercises", params={**params, "limit": 500}).json()
+        assert encoded.json() == validated
+        assert ExerciseListResponse.model_validate(encoded.json()).model_dump(mode="json") == encoded.json()
+    assert [exercise["name"] for exercise in client.get("/users/me/exercises").json()["data"]] == [
+        "Banded Chest Press", "Barbell Chest Press", "Dumbbell Chest Fly", "Dumbbell Chest Press"
+    ]
+    exercise_uuid = client.get("/users/me/exercises", params={"user_created": True}).json()["data"][0]["uuid"]
+    client.patch(f"/users/me/exercises/{exercise_uuid}", json={"name": "Banded Floor Press"})
+    assert "Banded Floor Press" in [exercise["name"] for exercise in client.get("/users/me/exercises").json()["data"]]
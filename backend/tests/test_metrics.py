@@ -0,0 +1,83 @@
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
+import asyncio
+import logging
+from fastapi.testclient import TestClient
+from httpx import Response
+import db
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from utilities.pool_metrics import PoolMetrics, TimedQueuePool
+
+def test_get_exercise_catalog_metrics(client_full_db: TestClient):
+    client_full_db.get("/users/me/exercises")
+    client_full_db.get("/users/me/exercises")
+    response: Response = client_full_db.get("/metrics/exercise-catalog")
+    response_dict: dict[str, object] = response.json()
+    assert response.status_code == 200
+    assert response_dict["detail"] == "Exercise catalog cache metrics fetched successfully."
+    assert response_dict["data"]["catalog_size"] == 3
+    assert response_dict["data"]["hits"] >= 1
+    assert set(response_dict["data"]) == {"catalog_version", "catalog_size", "cached_users", "max_users", "hits", "misses", "evictions"}
+
+def test_get_exercise_catalog_metrics_forbidden_for_users(client_login):
+    client: TestClient = client_login("user", "user")
+    response: Response = client.get("/metrics/exercise-catalog")
+    assert response.status_code == 403
+
+def test_get_password_hashing_metrics(client_login):
+    client: TestClient = client_login("admin", "admin")
+    response: Response = client.get("/metrics/password-hashing")
+    response_dict: dict[str, object] = response.json()
+    assert response.status_code == 200
+    assert response_dict["detail"] == "Password hashing metrics fetched successfully."
+    assert response_dict["data"]["completed"] >= 3
+    assert response_dict["data"]["queue_depth"] == 0
+    assert set(response_dict["data"]) == {"workers", "max_pending", "in_flight", "queue_depth", "completed", "failed", "rejected"}
+
+def test_get_database_pool_metrics(client_login, async_engine, tmp_path, monkeypatch):
+    client: TestClient = client_login("admin", "admin")
+    monkeypatch.setattr(db, "async_engine", async_engine)
+    response: Response = client.get("/metrics/database-pool")
+    response_dict: dict[str, object] = response.json()
+    assert response.status_code == 200
+    assert response_dict["detail"] == "Database pool metrics fetched successfully."
+    assert set(response_dict["data"]) == {"primary"}
+    assert response_dict["data"]["primary"]["checkouts"] >= 3
+    assert response_dict["data"]["primary"]["slow_checkouts"] == 0
+    assert set(response_dict["data"]["primary"]) == {"checkouts", "average_wait_ms", "max_wait_ms", "slow_checkouts", "warning_threshold_ms"}
+
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=TimedQueuePool, pool_size=2)
+    monkeypatch.setattr(db, "replica_async_engine", replica_engine)
+    response = client.get("/metrics/database-pool")
+    assert set(response.json()["data"]) == {"primary", "replica"}
+    assert response.json()["data"]["replica"] == {
+        "checkouts": 0, "average_wait_ms": 0.0, "max_wait_ms": 0.0, "slow_checkouts": 0, "warning_threshold_ms": 100.0,
+        "pool_size": 2, "in_use": 0, "idle": 0, "overflow": 0,
+    }
+
+def test_pool_metrics_warns_on_slow_checkout(database_path, caplog):
+    metrics = PoolMetrics(warning_seconds=0.05)
+    async def contend():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=5)
+        metrics.watch(engine)
+        async with AsyncSession(engine) as first, AsyncSession(engine) as second:
+            assert metrics.stats(engine)["checkouts"] == 0
+            await first.exec(select(1))
+            in_use = metrics.stats(engine)["in_use"]
+            waiting = asyncio.create_task(second.exec(select(1)))
+            await asyncio.sleep(0.1)
+            await first.close()
+            await waiting
+            stats = metrics.stats(engine)
+        await engine.dispose()
+        return in_use, stats
+    with caplog.at_level(logging.WARNING, logger="utilities.pool_metrics"):
+        in_use, stats = asyncio.run(contend())
+    assert in_use == 1
+    assert stats["checkouts"] == 2
+    assert stats["slow_checkouts"] == 1
+    assert stats["max_wait_ms"] >= 100
+    assert stats["pool_size"] == 1
+    assert stats["overflow"] == 0
+    assert "Waited" in caplog.text
@@ -0,0 +1,84 @@
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
+import sqlite3
+import time
+import pytest
+from fastapi.testclient import TestClient
+from httpx import Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+import db
+from db import get_db
+from main import app
+from tests.fixtures import set_sqlite_pragma
+from utilities.authorization import token_versions
+from utilities.read_routing import ReadYourWrites, read_your_writes
+
+
+@pytest.fixture
+def client_with_replica(client_login, async_engine, database_path, tmp_path, monkeypatch):
+    client: TestClient = client_login("user", "user")
+    replica_path = tmp_path / "replica.db"
+    with sqlite3.connect(database_path) as primary, sqlite3.connect(replica_path) as replica:
+        primary.backup(replica)
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{replica_path}", poolclass=NullPool)
+    event.listen(replica_engine.sync_engine, "connect", set_sqlite_pragma)
+    monkeypatch.setattr(db, "async_engine", async_engine)
+    monkeypatch.setattr(db, "replica_async_engine", replica_engine)
+    app.dependency_overrides.pop(get_db)
+    read_your_writes.clear()
+    yield client
+    read_your_writes.clear()
+
+def test_reads_go_to_replica_outside_read_your_writes_window(client_with_replica: TestClient):
+    workout_data = {"name": "Back Day", "description": "Back Day Description"}
+    response: Response = client_with_replica.post("/users/me/workouts", json=workout_data)
+    assert response.status_code == 201
+    response = client_with_replica.get("/users/me/workouts")
+    assert [workout["name"] for workout in response.json()["data"]] == ["Back Day"]
+    read_your_writes.clear()
+    response = client_with_replica.get("/users/me/workouts")
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+
+def test_reads_use_primary_without_replica(client_with_replica: TestClient, monkeypatch):
+    monkeypatch.setattr(db, "replica_async_engine", None)
+    client_with_replica.post("/users/me/workouts", json={"name": "Back Day", "description": "Back Day Description"})
+    read_your_writes.clear()
+    response: Response = client_with_replica.get("/users/me/workouts")
+    assert [workout["name"] for workout in response.json()["data"]] == ["Back Day"]
+
+def test_read_your_writes_window_expires():
+    tracker = ReadYourWrites(window=0.05)
+    assert tracker.use_replica("user")
+    tracker.record_write("user")
+    assert not tracker.use_replica("user")
+    assert tracker.use_replica("other")
+    time.sleep(0.06)
+    assert tracker.use_replica("user")
+    tracker.record_write(None)
+    assert tracker.use_replica(None)
+
+def test_shared_caches_are_not_built_from_a_lagging_replica(client_with_replica: TestClient, client_login):
+    # The replica was copied when the fixture started and never catches up.
+    client = client_login("admin", "admin")
+    response: Response = client.post("/users/me/exercises", json={
+        "name": "Banded Chest Press",
+        "description": "Banded Chest Press Description",
+        "workout_category": "Upper",
+        "movement_category": "Press",
+        "equipment": "Dumbbell",
+        "major_muscle": "Chest",
+        "specific_muscles": ["Middle Chest"]
+    })
+    assert response.status_code == 201
+    client = client_login("user", "user")
+    read_your_writes.clear()
+    assert "Banded Chest Press" in [exercise["name"] for exercise in client.get("/users/me/exercises").json()["data"]]
+    assert [exercise["name"] for exercise in client.get("/users/me/exercises/search", params={"q": "banded"}).json()["data"]] == ["Banded Chest Press"]
+
+    old_token = client.headers["Authorization"]
+    client.patch("/users/me/change_password", json={"password": "new_password"})
+    read_your_writes.clear()
+    token_versions.clear()
+    assert client.get("/users/me", headers={"Authorization": old_token}).status_code == 401
@@ -0,0 +1,44 @@
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
+from fastapi.testclient import TestClient
+from httpx import Response
+from sqlalchemy import event
+from sqlmodel import Session, select
+from models.relationship_merge import WorkoutCategory, BandColor
+
+
+def test_get_reference_data(client: TestClient, session: Session):
+    response: Response = client.get("/reference-data")
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["etag"].startswith('"')
+    data = response.json()["data"]
+    assert data["workout_categories"] == list(session.exec(select(WorkoutCategory.name).order_by(WorkoutCategory.id)).all())
+    assert data["band_colors"] == list(session.exec(select(BandColor.name).order_by(BandColor.id)).all())
+    assert set(data) == {"workout_categories", "movement_categories", "major_muscles", "specific_muscles", "equipment", "band_colors"}
+    assert response.json()["detail"] == "Reference data fetched successfully."
+
+def test_get_reference_options(client: TestClient):
+    combined = client.get("/reference-data").json()["data"]
+    response: Response = client.get("/reference-data/specific-muscles")
+    assert response.status_code == 200
+    assert response.json() == {"data": combined["specific_muscles"], "detail": "Specific muscles fetched successfully."}
+    assert client.get("/reference-data/roles").status_code == 422
+
+def test_reference_data_not_modified(client: TestClient, async_engine):
+    response: Response = client.get("/reference-data/equipment")
+    etag = response.headers["etag"]
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get("/reference-data/equipment", headers={"If-None-Match": etag})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert statements == []
+    assert client.get("/reference-data/equipment", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/reference-data/equipment", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert client.get("/reference-data", headers={"If-None-Match": etag}).status_code == 200
@@ -1,4 +1,4 @@
-from tests.fixtures import session, client, client_full_db, client_login
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
 from fastapi.testclient import TestClient
 from httpx import Response
 from db import Session
@@ -26,6 +26,7 @@ def test_get_one_user(client_login: TestClient, session: Session):
                 "gender":"male"
                 }
             ],
+        'next_cursor': None,
         'detail': '1 user fetched successfully.',
         }
 
@@ -92,6 +93,7 @@ def test_get_users(client_full_db: TestClient, session: Session):
                 ]
                 }
             ],
+        'next_cursor': None,
         'detail': '4 users fetched successfully.'
     }
 
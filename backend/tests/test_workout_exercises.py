@@ -1,4 +1,4 @@
-from tests.fixtures import session, client, client_full_db, client_login
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
 import pytest
 from fastapi.testclient import TestClient
 from httpx import Response
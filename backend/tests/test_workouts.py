@@ -1,11 +1,13 @@
-from tests.fixtures import session, client, client_full_db, client_login
+from tests.fixtures import session, async_engine, database_path, client, client_full_db, client_login
+from datetime import timedelta
 from uuid import UUID
 import pytest
 from fastapi.testclient import TestClient
 from httpx import Response
 from db import Session
+from sqlalchemy import event
 from sqlmodel import select
-from models.relationship_merge import Workout, User
+from models.relationship_merge import Workout, User, WorkoutExercise, WorkoutExerciseWorkoutOrderLink
 
 
 
@@ -77,7 +79,7 @@ def test_post_workout(client_full_db: TestClient, session: Session):
         "workout_exercises": []
     }
     assert response_dict['detail'] == "Workout added successfully."
-    assert session.exec(select(Workout).where(Workout.uuid == UUID(response_dict['data']['uuid']))).first().model_dump() == {
+    assert session.exec(select(Workout).where(Workout.uuid == UUID(response_dict['data']['uuid']))).first().model_dump(exclude={"updated_at"}) == {
         "id": session.exec(select(Workout).where(Workout.uuid == UUID(response_dict['data']['uuid']))).first().id,
         "uuid": UUID(response_dict['data']['uuid']),
         "name": "Leg Day",
@@ -108,7 +110,7 @@ def test_put_workout(client_full_db: TestClient, session: Session):
         "workout_exercises": []
     }
     assert response_dict['detail'] == "Workout updated successfully."
-    assert session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first().model_dump() == {
+    assert session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first().model_dump(exclude={"updated_at"}) == {
         "id": session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first().id,
         "uuid": UUID(workout_uuid),
         "name": "Leg Day",
@@ -134,7 +136,7 @@ def test_patch_workout(client_full_db: TestClient, session: Session):
         "workout_exercises": []
     }
     assert response_dict['detail'] == "Workout updated successfully."
-    assert session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first().model_dump() == {
+    assert session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first().model_dump(exclude={"updated_at"}) == {
         "id": session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first().id,
         "uuid": UUID(workout_uuid),
         "name": "Arm Day",
@@ -152,4 +154,102 @@ def test_delete_workout(client_full_db: TestClient, session: Session):
     workout_uuid = client_full_db.post(f"/users/me/workouts", json=workout_data).json()["data"]["uuid"]
     response: Response = client_full_db.delete(f"/users/me/workouts/{workout_uuid}")
     assert response.status_code == 204
-    assert not session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first()
\ No newline at end of file
+    assert not session.exec(select(Workout).where(Workout.uuid == UUID(workout_uuid))).first()
+
+def test_get_workouts_not_modified(client_login, async_engine):
+    client: TestClient = client_login("user", "user")
+    response: Response = client.get("/users/me/workouts")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get("/users/me/workouts", headers={"If-None-Match": etag})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not any("FROM workout" in statement for statement in statements)
+    client.post("/users/me/workouts", json={"name": "Back Day", "description": "Back Day Description"})
+    response = client.get("/users/me/workouts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert [workout["name"] for workout in response.json()["data"]] == ["Back Day"]
+    assert client.get("/users/me/workout-exercises", headers={"If-None-Match": etag}).status_code == 200
+
+def test_list_etags_change_with_catalog_and_user_writes(client_full_db: TestClient, client_login):
+    user_client: TestClient = client_login("user", "user")
+    etags = {path: user_client.get(path).headers["etag"] for path in ("/users/me/exercises", "/users/me/exercise_logs", "/users/me/workout-exercises")}
+    for path, etag in etags.items():
+        assert user_client.get(path, headers={"If-None-Match": etag}).status_code == 304
+    exercise_uuid = user_client.get("/users/me/exercises").json()["data"][0]["uuid"]
+    admin_client: TestClient = client_login("admin", "admin")
+    assert admin_client.patch(f"/users/me/exercises/{exercise_uuid}", json={"description": "New Description"}).status_code == 200
+    user_client = client_login("user", "user")
+    for path, etag in etags.items():
+        assert user_client.get(path, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_workouts_delta_sync(client_full_db: TestClient, monkeypatch):
+    monkeypatch.setattr("utilities.sync.SYNC_OVERLAP", timedelta(0))
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    workout_uuids = [
+        client_full_db.post("/users/me/workouts", json={"name": name, "description": f"{name} Description"}).json()["data"]["uuid"]
+        for name in ("Back Day", "Chest Day", "Leg Day")
+    ]
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    workout_exercise_uuids = [
+        client_full_db.post("/users/me/workout-exercises", json={"planned_sets": 3, "planned_reps": reps, "planned_resistance_weight": 80, "exercise_uuid": exercise_uuid}).json()["data"]["uuid"]
+        for reps in (8, 10)
+    ]
+    workouts_token = client_full_db.get("/users/me/workouts").json()["sync_token"]
+    workout_exercises_token = client_full_db.get("/users/me/workout-exercises").json()["sync_token"]
+    client_full_db.patch(f"/users/me/workouts/{workout_uuids[0]}", json={"description": "Pull Day"})
+    client_full_db.delete(f"/users/me/workouts/{workout_uuids[2]}")
+    client_full_db.patch(f"/users/me/workout-exercises/{workout_exercise_uuids[0]}", json={"planned_reps": 12})
+    client_full_db.delete(f"/users/me/workout-exercises/{workout_exercise_uuids[1]}")
+    delta = client_full_db.get("/users/me/workouts", params={"since": workouts_token}).json()
+    assert [workout["uuid"] for workout in delta["data"]] == [workout_uuids[0]]
+    assert delta["deleted"] == [workout_uuids[2]]
+    delta = client_full_db.get("/users/me/workout-exercises", params={"since": workout_exercises_token}).json()
+    assert [workout_exercise["uuid"] for workout_exercise in delta["data"]] == [workout_exercise_uuids[0]]
+    assert delta["deleted"] == [workout_exercise_uuids[1]]
+
+def test_workouts_sparse_fieldsets(client_full_db: TestClient, session: Session, async_engine):
+    response = client_full_db.post("/users/login", data={"username": "user", "password": "user"})
+    client_full_db.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    exercise_uuid = client_full_db.get("/users/me/exercises").json()["data"][0]["uuid"]
+    workout_uuid = client_full_db.post("/users/me/workouts", json={"name": "Back Day", "description": "Back Day Description"}).json()["data"]["uuid"]
+    workout_exercise_uuid = client_full_db.post("/users/me/workout-exercises", json={
+        "planned_sets": 3,
+        "planned_reps": 10,
+        "planned_resistance_weight": 100.0,
+        "exercise_uuid": exercise_uuid
+    }).json()["data"]["uuid"]
+    session.add(WorkoutExerciseWorkoutOrderLink(
+        id=1,
+        workout_id=session.exec(select(Workout.id).where(Workout.uuid == UUID(workout_uuid))).one(),
+        workout_exercise_id=session.exec(select(WorkoutExercise.id).where(WorkoutExercise.uuid == UUID(workout_exercise_uuid))).one(),
+        exercise_order=1,
+    ))
+    session.commit()
+    statements = []
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    response = client_full_db.get("/users/me/workouts", params={"fields": "name"})
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count_statement)
+    assert response.status_code == 200
+    assert response.json()["data"] == [{"uuid": workout_uuid, "name": "Back Day"}]
+    assert response.json()["detail"] == "1 workout fetched successfully."
+    assert not any("workoutexercise" in statement for statement in statements)
+    response = client_full_db.get("/users/me/workouts", params={"fields": "workout_exercises"})
+    workout = response.json()["data"][0]
+    assert set(workout) == {"uuid", "workout_exercises"}
+    assert workout["workout_exercises"] == client_full_db.get("/users/me/workouts").json()["data"][0]["workout_exercises"]
+    assert workout["workout_exercises"][0]["uuid"] == workout_exercise_uuid
+    response = client_full_db.get("/users/me/workouts", params={"fields": "name,colour"})
+    assert response.status_code == 400
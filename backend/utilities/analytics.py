@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Sequence
+
+import numpy as np
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.enums import OneRepMaxFormula
+from models.relationship_merge import ExerciseLog
+
+DECIMALS = 2
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class ExerciseHistory:
+    """One exercise's logs as parallel arrays, in completion order."""
+
+    completed: np.ndarray
+    reps: np.ndarray
+    weight: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple[Any, int, float]]) -> "ExerciseHistory":
+        if not rows:
+            return cls(np.empty(0, dtype="datetime64[us]"), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        completed, reps, weight = zip(*rows)
+        # Several times faster than letting NumPy convert the datetime objects itself.
+        return cls(
+            np.fromiter(((moment - EPOCH) // MICROSECOND for moment in completed), dtype=np.int64, count=len(rows)).view("datetime64[us]"),
+            np.fromiter(reps, dtype=np.int64, count=len(rows)),
+            np.fromiter(weight, dtype=np.float64, count=len(rows)),
+        )
+
+
+async def load_exercise_history(session: AsyncSession, user_id: int, exercise_id: int, filters: Sequence[Any] = ()) -> ExerciseHistory:
+    """Only the three columns the analytics need, read in the order of the (user, exercise, time) index."""
+    rows = (await session.exec(
+        select(ExerciseLog.datetime_completed, ExerciseLog.reps, ExerciseLog.weight)
+        .where(ExerciseLog.user_id == user_id, ExerciseLog.exercise_id == exercise_id, *filters)
+        .order_by(ExerciseLog.datetime_completed, ExerciseLog.id)
+    )).all()
+    return ExerciseHistory.from_rows(rows)
+
+
+def estimated_1rm(reps: np.ndarray, weight: np.ndarray, formula: OneRepMaxFormula) -> np.ndarray:
+    """Estimated one-rep max of every set, NaN where the formula does not apply."""
+    valid = reps >= 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if formula == OneRepMaxFormula.BRZYCKI:
+            valid &= reps < 37
+            estimates = weight * 36 / (37 - reps)
+        else:
+            estimates = weight * (1 + reps / 30)
+    return np.where(valid, np.where(reps == 1, weight, estimates), np.nan)
+
+
+def week_starts(days: np.ndarray) -> np.ndarray:
+    """The Monday of each day's week. Day 0 of datetime64 is a Thursday."""
+    return days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+
+
+def rolling_mean(days: np.ndarray, values: np.ndarray, window_days: int) -> np.ndarray:
+    """Mean of the non-NaN ``values`` over the trailing ``window_days`` calendar days of each of the sorted, distinct ``days``."""
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    ends = np.arange(1, len(days) + 1)
+    starts = np.searchsorted(days, days - np.timedelta64(window_days - 1, "D"), side="left")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (sums[ends] - sums[starts]) / (counts[ends] - counts[starts])
+
+
+def rounded(values: np.ndarray) -> list[float | None]:
+    return [None if value != value else value for value in np.round(values, DECIMALS).tolist()]
+
+
+def group_starts(keys: np.ndarray) -> np.ndarray:
+    """Where each run of equal values starts in the sorted ``keys``."""
+    if not len(keys):
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+
+def period_series(keys: np.ndarray, reps: np.ndarray, volume: np.ndarray, estimates: np.ndarray) -> tuple[dict[str, list], np.ndarray, np.ndarray]:
+    """Sets, reps, volume and best estimated 1RM per period of the sorted period ``keys``,
+    plus the periods and their unrounded best estimates."""
+    starts = group_starts(keys)
+    periods, best = keys[starts], np.fmax.reduceat(estimates, starts)
+    return {
+        "period_start": periods.tolist(),
+        "sets": np.diff(np.append(starts, len(keys))).tolist(),
+        "reps": np.add.reduceat(reps, starts).tolist(),
+        "volume": rounded(np.add.reduceat(volume, starts)),
+        "best_estimated_1rm": rounded(best),
+    }, periods, best
+
+
+def rep_records(history: ExerciseHistory) -> dict[str, list]:
+    """The heaviest set for every rep count, the earliest one on ties."""
+    positions = np.flatnonzero(history.reps >= 1)
+    positions = positions[np.lexsort((positions, -history.weight[positions], history.reps[positions]))]
+    records = positions[group_starts(history.reps[positions])]
+    return {
+        "reps": history.reps[records].tolist(),
+        "weight": rounded(history.weight[records]),
+        "datetime_completed": history.completed[records].tolist(),
+    }
+
+
+def analyze(history: ExerciseHistory, formula: OneRepMaxFormula, trend_days: int) -> dict[str, Any]:
+    """Totals, best set, rep records and daily and weekly series of ``history``.
+
+    The daily ``trend`` is the mean of the daily best estimated 1RMs over the trailing ``trend_days`` days.
+    """
+    estimates = estimated_1rm(history.reps, history.weight, formula)
+    volume = history.reps * history.weight
+    days = history.completed.astype("datetime64[D]")
+    daily, daily_days, daily_best = period_series(days, history.reps, volume, estimates)
+    weekly, _, _ = period_series(week_starts(days), history.reps, volume, estimates)
+    daily["trend"] = rounded(rolling_mean(daily_days, daily_best, trend_days))
+    best_set = None
+    if not np.isnan(estimates).all():
+        best = int(np.nanargmax(estimates))
+        best_set = {
+            "datetime_completed": history.completed[best].item(),
+            "reps": int(history.reps[best]),
+            "weight": float(history.weight[best]),
+            "estimated_1rm": round(float(estimates[best]), DECIMALS),
+        }
+    return {
+        "formula": formula,
+        "trend_days": trend_days,
+        "total_sets": len(history.reps),
+        "total_reps": int(history.reps.sum()),
+        "total_volume": round(float(volume.sum()), DECIMALS),
+        "best_set": best_set,
+        "rep_records": rep_records(history),
+        "daily": daily,
+        "weekly": weekly,
+    }
@@ -1,16 +1,20 @@
 from uuid import UUID
 import datetime as dt
+import inspect
+import time
+from threading import Lock
 from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
-from sqlmodel import SQLModel, Session, select
-from sqlalchemy.orm import joinedload
+from sqlmodel import SQLModel, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from pydantic import ValidationError
 from jose import JWTError, jwt
-from bcrypt import checkpw
 from decouple import config
-from db import engine
 from models.relationship_merge import User
+from utilities.hashed_password import password_hasher
+from utilities.read_routing import primary_session
 from functools import wraps
 
 from db import get_db
@@ -18,6 +22,7 @@ from db import get_db
 SECRET_KEY = str(config("SECRET_KEY"))
 ALGORITHM = str(config("ALGORITHM"))
 ACCESS_TOKEN_EXPIRE_MINUTES = int(config("ACCESS_TOKEN_EXPIRE_MINUTES"))
+TOKEN_VERSION_CACHE_SECONDS = float(config("TOKEN_VERSION_CACHE_SECONDS", default=30))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login", scopes={})
 
@@ -28,34 +33,85 @@ class Token(SQLModel):
 class TokenData(SQLModel):
     user_uuid: UUID | None = None
     scopes: list[str] = []
+    roles: list[str] = []
+    token_version: int | None = None
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+class TokenVersionCache:
+    """Remembers each user's current token_version so validating a token does not need a query.
 
-def get_user(user_uuid: UUID, session: Session) -> User:
-    user = session.exec(select(User).where(User.uuid == user_uuid)).first()
+    Entries expire after ``ttl`` seconds so a version bumped by another worker is picked up.
+    Versions are read from the primary, so a lagging replica cannot bring back a revoked token.
+    """
+
+    def __init__(self, ttl: float = TOKEN_VERSION_CACHE_SECONDS):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._versions: dict[UUID, tuple[int | None, float]] = {}
+
+    async def get(self, user_uuid: UUID, session: AsyncSession) -> int | None:
+        with self._lock:
+            cached = self._versions.get(user_uuid)
+        if cached is not None and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        async with primary_session(session) as primary:
+            version = (await primary.exec(select(User.token_version).where(User.uuid == user_uuid))).first()
+        self.set(user_uuid, version)
+        return version
+
+    def set(self, user_uuid: UUID, version: int | None) -> None:
+        with self._lock:
+            self._versions[user_uuid] = (version, time.monotonic())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+
+token_versions = TokenVersionCache()
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def get_user(user_uuid: UUID, session: AsyncSession) -> User:
+    user = (await session.exec(select(User).options(selectinload(User.roles)).where(User.uuid == user_uuid))).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-def authenticate_user(username: str, password: str, session: Session) -> User:
-    user_uuid = session.exec(select(User.uuid).where(User.username == username)).first()
-    user = get_user(user_uuid, session)
-    if not verify_password(password, user.hashed_password):
+async def authenticate_user(username: str, password: str, session: AsyncSession) -> User:
+    user_uuid = (await session.exec(select(User.uuid).where(User.username == username))).first()
+    user = await get_user(user_uuid, session)
+    if not await verify_password(password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     return user
 
-def create_access_token(data: dict, expires_delta: dt.timedelta | None = None) -> str:
-    to_encode = data.copy()
+def create_access_token(user: User, scopes: list[str] | None = None, expires_delta: dt.timedelta | None = None) -> str:
+    now = dt.datetime.now(dt.UTC)
     if expires_delta:
-        expire = dt.datetime.now(dt.UTC) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = dt.datetime.now(dt.UTC) + dt.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = now + dt.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = {
+        "sub": str(user.uuid),
+        "iat": now,
+        "exp": expire,
+        "scopes": scopes or [],
+        "roles": [role.name for role in user.roles],
+        "ver": user.token_version,
+    }
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)]):
+async def revoke_user_tokens(user: User, session: AsyncSession) -> None:
+    """Invalidate every token issued to ``user`` so far and commit, together with the change that
+    requires it, e.g. new roles, a new password or deleting the user. The version is bumped in SQL
+    so concurrent revocations all count, and only cached once the commit went through."""
+    version = (await session.exec(
+        update(User).where(User.id == user.id).values(token_version=User.token_version + 1).returning(User.token_version)
+    )).scalar_one_or_none()
+    await session.commit()
+    token_versions.set(user.uuid, version)
+
+async def get_token_data(security_scopes: SecurityScopes, token: Annotated[str, Depends(oauth2_scheme)], session: AsyncSession = Depends(get_db)) -> TokenData:
     if security_scopes.scopes:
         authenticate_value = f"Bearer scope={security_scopes.scopes}"
     else:
@@ -67,40 +123,40 @@ async def get_current_user(security_scopes: SecurityScopes, token: Annotated[str
         user_uuid: UUID = UUID(payload.get("sub"))
         if user_uuid is None:
             raise credentials_exception
-        token_scopes = payload.get("scopes", [])
-        token_data = TokenData(user_uuid=user_uuid, scopes=token_scopes)
-    except (JWTError, ValidationError):
+        token_data = TokenData(user_uuid=user_uuid, scopes=payload.get("scopes", []), roles=payload.get("roles", []), token_version=payload.get("ver"))
+    except (JWTError, ValidationError, TypeError, ValueError):
         raise credentials_exception
-    with Session(engine) as session:
-        user = get_user(token_data.user_uuid, session) 
-        if user is None:
-            raise credentials_exception
-        for scope in security_scopes.scopes:
-            if scope not in token_data.scopes:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Not enough permissions",
-                    headers={"WWW-Authenticate": authenticate_value},
-                )
-        return user
+    if token_data.token_version is None or token_data.token_version != await token_versions.get(token_data.user_uuid, session):
+        raise credentials_exception
+    for scope in security_scopes.scopes:
+        if scope not in token_data.scopes:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not enough permissions",
+                headers={"WWW-Authenticate": authenticate_value},
+            )
+    return token_data
+
+async def get_current_user(token_data: Annotated[TokenData, Security(get_token_data)], session: AsyncSession = Depends(get_db)) -> User:
+    """Load the authenticated user and their roles once, in the request's own session."""
+    user = (await session.exec(select(User).options(joinedload(User.roles)).where(User.uuid == token_data.user_uuid))).unique().first()
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+    return user
 
 def check_roles(allowed_roles: list[str]):
+    """Only let users holding one of ``allowed_roles`` call the route.
+
+    Roles are read from the access token claims, so the check does not touch the database.
+    """
     def decorator(func):
         @wraps(func)
-        async def wrapper(*args, **kwargs):
-            session: Session = kwargs.get('session')
-            if session is None:
-                raise ValueError("Session must be provided")
-            current_user: User = kwargs.get("current_user")
-            current_user: User = session.exec(select(User).options(joinedload(User.roles)).where(User.uuid == current_user.uuid)).first()
-            if current_user is None:
-                    current_user = await get_current_user(*args, **kwargs)
-            if current_user is None:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication credentials were not provided")
-            user_roles = set(role.name for role in current_user.roles)
-            if not any(role in user_roles for role in allowed_roles):
+        async def wrapper(*args, token_data: TokenData, **kwargs):
+            if not any(role in token_data.roles for role in allowed_roles):
                 raise HTTPException(status_code=403, detail="Not enough permissions")
             return await func(*args, **kwargs)
+        signature = inspect.signature(func)
+        token_data_parameter = inspect.Parameter("token_data", inspect.Parameter.KEYWORD_ONLY, annotation=Annotated[TokenData, Security(get_token_data)])
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), token_data_parameter])
         return wrapper
     return decorator
-
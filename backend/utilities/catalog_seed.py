@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import uuid4 as new_uuid
+
+from sqlalchemy import Connection, Engine, insert, select, update
+
+from models.relationship_merge import (
+    Exercise, ExerciseSpecificMuscleLink, WorkoutCategory, MovementCategory, MajorMuscle, SpecificMuscle,
+    Equipment, BandColor, Role
+)
+from models.seed import SeedChecksum
+from utilities.exercise_catalog import exercise_catalog
+from utilities.reference_data import reference_data
+
+SEED_FILE = "exercise_json/new_exercise_json.json"
+SEED_NAME = "exercise_catalog"
+ROLES = ("User", "Admin")
+BAND_COLORS = ("Yellow", "Red", "Green", "Black", "Purple", "Orange", "Gray")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SeedReport:
+    """What a seeding run inserted and how long each phase took, in seconds."""
+    skipped: bool = False
+    reference_rows: int = 0
+    exercises: int = 0
+    specific_muscle_links: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        timings = ", ".join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in self.timings.items())
+        if self.skipped:
+            return f"Seed data unchanged, skipped seeding ({timings})"
+        return (f"Seeded {self.reference_rows} reference rows, {self.exercises} exercises and "
+                f"{self.specific_muscle_links} specific muscle links ({timings})")
+
+
+def load_seed_data(path: str = SEED_FILE) -> list[dict[str, Any]]:
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def _insert_missing_names(connection: Connection, model: type, names: set[str]) -> tuple[dict[str, int], int]:
+    """Insert the names ``model`` does not have yet. Returns its complete name -> id map and
+    how many rows were inserted."""
+    ids = dict(connection.execute(select(model.name, model.id)).all())
+    missing = sorted(names - ids.keys())
+    if missing:
+        connection.execute(insert(model), [{"name": name} for name in missing])
+        ids = dict(connection.execute(select(model.name, model.id)).all())
+    return ids, len(missing)
+
+
+def seed_catalog(engine: Engine, path: str = SEED_FILE, force: bool = False) -> SeedReport:
+    """Bring the reference tables and admin exercise catalog in line with the seed file.
+
+    Everything already in the database is loaded up front and only the difference is inserted,
+    with one batched statement per table, inside a single transaction. The file's checksum is
+    stored with it, and the whole run is skipped while the file is unchanged unless ``force``.
+    """
+    report = SeedReport()
+    started = time.perf_counter()
+    with open(path, 'rb') as file:
+        raw_data = file.read()
+    checksum = hashlib.sha256(raw_data).hexdigest()
+
+    with engine.begin() as connection:
+        stored_checksum = connection.execute(select(SeedChecksum.checksum).where(SeedChecksum.name == SEED_NAME)).scalar()
+        if stored_checksum == checksum and not force:
+            report.skipped = True
+            report.timings["total"] = time.perf_counter() - started
+            logger.info("%s", report)
+            return report
+        exercises = {}
+        for exercise in json.loads(raw_data):
+            exercises.setdefault(exercise["name"].title(), exercise)
+        report.timings["load"] = time.perf_counter() - started
+
+        phase_started = time.perf_counter()
+        reference_names = {
+            WorkoutCategory: {exercise["workoutCategory"].title() for exercise in exercises.values()},
+            MovementCategory: {exercise["movementCategory"].title() for exercise in exercises.values()},
+            MajorMuscle: {exercise["majorMuscle"].title() for exercise in exercises.values()},
+            Equipment: {exercise["equipment"].title() for exercise in exercises.values()},
+            SpecificMuscle: {specific_muscle.title() for exercise in exercises.values() for specific_muscle in exercise["specificMuscles"]},
+            Role: set(ROLES),
+            BandColor: set(BAND_COLORS),
+        }
+        ids = {}
+        for model, names in reference_names.items():
+            ids[model], inserted = _insert_missing_names(connection, model, names)
+            report.reference_rows += inserted
+        report.timings["reference"] = time.perf_counter() - phase_started
+
+        phase_started = time.perf_counter()
+        exercise_ids = dict(connection.execute(select(Exercise.name, Exercise.id).where(Exercise.user_id == None)).all())
+        new_exercises = [
+            {
+                "uuid": new_uuid(),
+                "name": name,
+                "description": " ".join(exercise["description"]),
+                "image_url": exercise.get("gifUrl", None),
+                "workout_category_id": ids[WorkoutCategory][exercise["workoutCategory"].title()],
+                "movement_category_id": ids[MovementCategory][exercise["movementCategory"].title()],
+                "major_muscle_id": ids[MajorMuscle][exercise["majorMuscle"].title()],
+                "equipment_id": ids[Equipment][exercise["equipment"].title()],
+            }
+            for name, exercise in exercises.items() if name not in exercise_ids
+        ]
+        if new_exercises:
+            connection.execute(insert(Exercise), new_exercises)
+            exercise_ids = dict(connection.execute(select(Exercise.name, Exercise.id).where(Exercise.user_id == None)).all())
+        report.exercises = len(new_exercises)
+        report.timings["exercises"] = time.perf_counter() - phase_started
+
+        phase_started = time.perf_counter()
+        existing_links = set(connection.execute(
+            select(ExerciseSpecificMuscleLink.exercise_id, ExerciseSpecificMuscleLink.specific_muscle_id)
+            .join(Exercise, Exercise.id == ExerciseSpecificMuscleLink.exercise_id)
+            .where(Exercise.user_id == None)
+        ).all())
+        new_links = [
+            {"exercise_id": exercise_id, "specific_muscle_id": specific_muscle_id}
+            for exercise_id, specific_muscle_id in sorted({
+                (exercise_ids[name], ids[SpecificMuscle][specific_muscle.title()])
+                for name, exercise in exercises.items() for specific_muscle in exercise["specificMuscles"]
+            } - existing_links)
+        ]
+        if new_links:
+            connection.execute(insert(ExerciseSpecificMuscleLink), new_links)
+        report.specific_muscle_links = len(new_links)
+        report.timings["links"] = time.perf_counter() - phase_started
+
+        if stored_checksum is None:
+            connection.execute(insert(SeedChecksum).values(name=SEED_NAME, checksum=checksum))
+        elif stored_checksum != checksum:
+            connection.execute(update(SeedChecksum).where(SeedChecksum.name == SEED_NAME).values(checksum=checksum))
+    if report.reference_rows:
+        reference_data.invalidate()
+    if report.exercises or report.specific_muscle_links:
+        exercise_catalog.bump_catalog_version()
+    report.timings["total"] = time.perf_counter() - started
+    logger.info("%s", report)
+    return report
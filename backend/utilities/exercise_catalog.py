@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from heapq import merge
+from threading import Lock
+from uuid import UUID
+
+import orjson
+from decouple import config
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.relationship_merge import Exercise
+from models.responses import ExerciseResponseData
+from utilities.exercise_loader import exercise_sort_key, load_exercises_by_id
+from utilities.facets import FacetIndex
+from utilities.read_routing import primary_session
+from utilities.search_index import PrefixIndex, SearchIndex, complete_prefix, top_matches
+
+EXERCISE_CACHE_MAX_USERS = int(config("EXERCISE_CACHE_MAX_USERS", default=1024))
+EXERCISE_UUID_MAP = config("EXERCISE_UUID_MAP", default=True, cast=bool)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Exercises sorted by ``exercise_sort_key``, with the indexes built over them and each
+    exercise pre-encoded as JSON."""
+
+    version: int
+    exercises: tuple[ExerciseResponseData, ...]
+    ids: dict[UUID, int]
+    search: SearchIndex = field(repr=False)
+    prefixes: PrefixIndex = field(repr=False)
+    facets: FacetIndex = field(repr=False)
+    encoded: tuple[bytes, ...] = field(repr=False)
+    json: bytes = field(repr=False)
+
+    @classmethod
+    def build(cls, version: int, exercises: dict[int, ExerciseResponseData]) -> "CatalogSnapshot":
+        ordered = tuple(sorted(exercises.values(), key=exercise_sort_key))
+        encoded = tuple(orjson.dumps(exercise.model_dump(mode="json")) for exercise in ordered)
+        return cls(
+            version, ordered, {exercise.uuid: exercise_id for exercise_id, exercise in exercises.items()},
+            SearchIndex(ordered), PrefixIndex(ordered), FacetIndex(ordered), encoded, b"[" + b",".join(encoded) + b"]"
+        )
+
+
+class ExerciseCatalogCache:
+    """Process-wide cache of exercise response data.
+
+    Admin created exercises are shared by every user, so they are built once into an
+    immutable snapshot tagged with ``catalog_version``. Exercises a user created for
+    themselves live in a small per-user overlay tagged with that user's version. Writes
+    bump the matching version instead of flushing the whole cache.
+
+    The snapshot also maps admin exercise uuids to ids, so write paths referencing a
+    seeded exercise can skip the ``uuid`` lookup when ``uuid_map`` is enabled, and holds
+    the search, autocomplete and facet indexes and the pre-encoded JSON list, which are
+    rebuilt along with it. The JSON of a user's merged list is kept until either side changes.
+    Snapshots are always loaded from the primary, never from a replica that may lag the version.
+    """
+
+    def __init__(self, max_users: int = EXERCISE_CACHE_MAX_USERS, uuid_map: bool = EXERCISE_UUID_MAP):
+        self.max_users = max_users
+        self.uuid_map = uuid_map
+        self._lock = Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.catalog_version = 0
+            self._catalog: CatalogSnapshot | None = None
+            self._user_versions: dict[int, int] = {}
+            self._user_overlays: OrderedDict[int, CatalogSnapshot] = OrderedDict()
+            self._merged_json: dict[int, tuple[int, int, bytes]] = {}
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def user_version(self, user_id: int) -> int:
+        return self._user_versions.get(user_id, 0)
+
+    def bump_catalog_version(self) -> int:
+        with self._lock:
+            self.catalog_version += 1
+            self._catalog = None
+            return self.catalog_version
+
+    def bump_user_version(self, user_id: int) -> int:
+        with self._lock:
+            version = self._user_versions.get(user_id, 0) + 1
+            self._user_versions[user_id] = version
+            self._user_overlays.pop(user_id, None)
+            self._merged_json.pop(user_id, None)
+            return version
+
+    def invalidate(self, user_id: int | None) -> None:
+        """Bump the version that owns an exercise: the shared catalog for admin created
+        exercises (``user_id`` is None) or the overlay of the user that created it."""
+        if user_id is None:
+            self.bump_catalog_version()
+        else:
+            self.bump_user_version(user_id)
+
+    async def _admin_catalog(self, session: AsyncSession) -> CatalogSnapshot:
+        with self._lock:
+            version = self.catalog_version
+            if self._catalog is not None and self._catalog.version == version:
+                self.hits += 1
+                return self._catalog
+            self.misses += 1
+        async with primary_session(session) as primary:
+            catalog = CatalogSnapshot.build(version, await load_exercises_by_id(primary, Exercise.user_id == None))
+        with self._lock:
+            if version == self.catalog_version:
+                self._catalog = catalog
+        return catalog
+
+    async def admin_facets(self, session: AsyncSession) -> FacetIndex:
+        return (await self._admin_catalog(session)).facets
+
+    async def user_facets(self, user_id: int, session: AsyncSession) -> FacetIndex:
+        return (await self._user_overlay(user_id, session)).facets
+
+    async def admin_exercises(self, session: AsyncSession) -> tuple[ExerciseResponseData, ...]:
+        return (await self._admin_catalog(session)).exercises
+
+    async def exercise_id(self, exercise_uuid: UUID, session: AsyncSession) -> int | None:
+        """Id of the exercise with ``exercise_uuid``, from the admin snapshot when possible."""
+        if self.uuid_map:
+            exercise_id = (await self._admin_catalog(session)).ids.get(exercise_uuid)
+            if exercise_id is not None:
+                return exercise_id
+        return (await session.exec(select(Exercise.id).where(Exercise.uuid == exercise_uuid))).first()
+
+    async def _user_overlay(self, user_id: int, session: AsyncSession) -> CatalogSnapshot:
+        with self._lock:
+            version = self._user_versions.get(user_id, 0)
+            overlay = self._user_overlays.get(user_id)
+            if overlay is not None and overlay.version == version:
+                self._user_overlays.move_to_end(user_id)
+                self.hits += 1
+                return overlay
+            self.misses += 1
+        async with primary_session(session) as primary:
+            overlay = CatalogSnapshot.build(version, await load_exercises_by_id(primary, Exercise.user_id == user_id))
+        with self._lock:
+            if version == self._user_versions.get(user_id, 0):
+                self._user_overlays[user_id] = overlay
+                self._user_overlays.move_to_end(user_id)
+                while len(self._user_overlays) > self.max_users:
+                    evicted, _ = self._user_overlays.popitem(last=False)
+                    self._merged_json.pop(evicted, None)
+                    self.evictions += 1
+        return overlay
+
+    async def exercise_ids(self, exercise_uuids: set[UUID], session: AsyncSession) -> dict[UUID, int]:
+        """Like ``exercise_id`` for many uuids, with a single query for those not in the admin snapshot."""
+        exercise_ids = {}
+        if self.uuid_map:
+            catalog_ids = (await self._admin_catalog(session)).ids
+            exercise_ids = {exercise_uuid: catalog_ids[exercise_uuid] for exercise_uuid in exercise_uuids if exercise_uuid in catalog_ids}
+        missing = exercise_uuids - exercise_ids.keys()
+        if missing:
+            exercise_ids.update((await session.exec(select(Exercise.uuid, Exercise.id).where(Exercise.uuid.in_(missing)))).all())
+        return exercise_ids
+
+    async def user_exercises(self, user_id: int, session: AsyncSession) -> tuple[ExerciseResponseData, ...]:
+        return (await self._user_overlay(user_id, session)).exercises
+
+    async def all_exercises(self, user_id: int, session: AsyncSession) -> list[ExerciseResponseData]:
+        return list(merge(await self.admin_exercises(session), await self.user_exercises(user_id, session), key=exercise_sort_key))
+
+    async def admin_exercises_json(self, session: AsyncSession) -> bytes:
+        return (await self._admin_catalog(session)).json
+
+    async def user_exercises_json(self, user_id: int, session: AsyncSession) -> bytes:
+        return (await self._user_overlay(user_id, session)).json
+
+    async def all_exercises_json(self, user_id: int, session: AsyncSession) -> bytes:
+        """``all_exercises`` as a JSON array, spliced from the pre-encoded exercises of both sides."""
+        catalog = await self._admin_catalog(session)
+        overlay = await self._user_overlay(user_id, session)
+        if not overlay.exercises:
+            return catalog.json
+        with self._lock:
+            merged = self._merged_json.get(user_id)
+            if merged is not None and merged[:2] == (catalog.version, overlay.version):
+                return merged[2]
+        pairs = merge(zip(catalog.exercises, catalog.encoded), zip(overlay.exercises, overlay.encoded), key=lambda pair: exercise_sort_key(pair[0]))
+        body = b"[" + b",".join(encoded for _, encoded in pairs) + b"]"
+        with self._lock:
+            if user_id in self._user_overlays:
+                self._merged_json[user_id] = (catalog.version, overlay.version, body)
+        return body
+
+    async def search(self, user_id: int, query: str, limit: int, session: AsyncSession) -> list[ExerciseResponseData]:
+        """The best ``limit`` matches for ``query`` among the exercises ``all_exercises`` returns."""
+        return top_matches(query, limit, (await self._admin_catalog(session)).search, (await self._user_overlay(user_id, session)).search)
+
+    async def autocomplete(self, user_id: int, prefix: str, limit: int, session: AsyncSession) -> list[ExerciseResponseData]:
+        """The first ``limit`` exercises by name starting with ``prefix`` among those ``all_exercises`` returns."""
+        return complete_prefix(prefix, limit, (await self._admin_catalog(session)).prefixes, (await self._user_overlay(user_id, session)).prefixes)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "catalog_version": self.catalog_version,
+                "catalog_size": len(self._catalog.exercises) if self._catalog else 0,
+                "cached_users": len(self._user_overlays),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+exercise_catalog = ExerciseCatalogCache()
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from typing import Any, Iterable
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.relationship_merge import Exercise, ExerciseSpecificMuscleLink
+from models.responses import ExerciseResponseData
+from utilities.reference_data import reference_data
+
+
+async def load_category_maps(session: AsyncSession) -> dict[str, dict[int, str]]:
+    return (await reference_data.get(session)).names
+
+
+def build_exercise_data(exercise: Any, specific_muscle_ids: Iterable[int], category_maps: dict[str, dict[int, str]]) -> ExerciseResponseData:
+    """Build ExerciseResponseData from an Exercise (or a row with its columns) without any queries."""
+    specific_muscle_names = category_maps["specific_muscle"]
+    return ExerciseResponseData(
+        uuid = exercise.uuid,
+        name = exercise.name,
+        description = exercise.description,
+        workout_category = category_maps["workout_category"].get(exercise.workout_category_id),
+        movement_category = category_maps["movement_category"].get(exercise.movement_category_id),
+        equipment = category_maps["equipment"].get(exercise.equipment_id),
+        major_muscle = category_maps["major_muscle"].get(exercise.major_muscle_id),
+        specific_muscles = [specific_muscle_names[specific_muscle_id] for specific_muscle_id in specific_muscle_ids],
+        image_url = exercise.image_url
+    )
+
+
+async def load_exercises_by_id(session: AsyncSession, *whereclause: Any) -> dict[int, ExerciseResponseData]:
+    """Build ExerciseResponseData keyed by exercise id for every exercise matching ``whereclause``.
+
+    Uses one exercise query, one link table query and the cached category maps no matter
+    how many exercises match, instead of lazy loading five relationships per exercise.
+    """
+    rows = (await session.exec(
+        select(
+            Exercise.id, Exercise.uuid, Exercise.name, Exercise.description, Exercise.image_url,
+            Exercise.workout_category_id, Exercise.movement_category_id, Exercise.major_muscle_id, Exercise.equipment_id
+        ).where(*whereclause)
+    )).all()
+    if not rows:
+        return {}
+    links = (await session.exec(
+        select(ExerciseSpecificMuscleLink.exercise_id, ExerciseSpecificMuscleLink.specific_muscle_id)
+        .where(ExerciseSpecificMuscleLink.exercise_id.in_(select(Exercise.id).where(*whereclause)))
+    )).all()
+    category_maps = await load_category_maps(session)
+    specific_muscle_ids: dict[int, list[int]] = defaultdict(list)
+    for exercise_id, specific_muscle_id in links:
+        specific_muscle_ids[exercise_id].append(specific_muscle_id)
+    return {row.id: build_exercise_data(row, specific_muscle_ids[row.id], category_maps) for row in rows}
+
+
+# Exercise response fields backed by a category id column, and the category map that names them.
+CATEGORY_FIELDS = {
+    "workout_category": "workout_category_id",
+    "movement_category": "movement_category_id",
+    "major_muscle": "major_muscle_id",
+    "equipment": "equipment_id",
+}
+
+
+async def load_exercise_fields_by_id(session: AsyncSession, fields: frozenset[str], *whereclause: Any) -> dict[int, dict[str, Any]]:
+    """Like load_exercises_by_id, but only ``fields`` of each exercise, as dicts.
+
+    Only the needed columns are selected, and the link table is only read when
+    ``specific_muscles`` is requested.
+    """
+    columns = [Exercise.id, *(getattr(Exercise, field) for field in ("uuid", "name", "description", "image_url") if field in fields)]
+    columns += [getattr(Exercise, CATEGORY_FIELDS[field]) for field in CATEGORY_FIELDS if field in fields]
+    rows = (await session.exec(select(*columns).where(*whereclause))).all()
+    if not rows:
+        return {}
+    category_maps = await load_category_maps(session) if fields & {*CATEGORY_FIELDS, "specific_muscles"} else {}
+    specific_muscle_ids: dict[int, list[int]] = defaultdict(list)
+    if "specific_muscles" in fields:
+        links = (await session.exec(
+            select(ExerciseSpecificMuscleLink.exercise_id, ExerciseSpecificMuscleLink.specific_muscle_id)
+            .where(ExerciseSpecificMuscleLink.exercise_id.in_(select(Exercise.id).where(*whereclause)))
+        )).all()
+        for exercise_id, specific_muscle_id in links:
+            specific_muscle_ids[exercise_id].append(specific_muscle_id)
+    data = {}
+    for row in rows:
+        exercise = {}
+        for field in fields:
+            if field in CATEGORY_FIELDS:
+                exercise[field] = category_maps[field].get(getattr(row, CATEGORY_FIELDS[field]))
+            elif field == "specific_muscles":
+                exercise[field] = [category_maps["specific_muscle"][specific_muscle_id] for specific_muscle_id in specific_muscle_ids[row.id]]
+            else:
+                exercise[field] = getattr(row, field)
+        data[row.id] = exercise
+    return data
+
+
+def exercise_sort_key(exercise: ExerciseResponseData) -> tuple[str, str]:
+    """Exercise lists are ordered by name, with the uuid breaking ties so pages never overlap."""
+    return exercise.name, str(exercise.uuid)
+
+
+async def load_exercises(session: AsyncSession, *whereclause: Any) -> list[ExerciseResponseData]:
+    data = list((await load_exercises_by_id(session, *whereclause)).values())
+    data.sort(key=exercise_sort_key)
+    return data
+
+
+async def load_exercises_for_ids(session: AsyncSession, exercise_ids: Iterable[int]) -> dict[int, ExerciseResponseData]:
+    exercise_ids = set(exercise_ids)
+    if not exercise_ids:
+        return {}
+    return await load_exercises_by_id(session, Exercise.id.in_(exercise_ids))
+
+
+async def load_exercise(session: AsyncSession, exercise_id: int) -> ExerciseResponseData:
+    return (await load_exercises_by_id(session, Exercise.id == exercise_id))[exercise_id]
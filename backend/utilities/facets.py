@@ -0,0 +1,127 @@
+from heapq import merge
+from typing import Sequence
+
+from fastapi import Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.enums import FacetMatch
+from models.responses import ExerciseResponseData
+from utilities.exercise_loader import exercise_sort_key
+from utilities.reference_data import reference_data
+
+# Exercise response fields that can be filtered on, and the reference data kind naming their values.
+FACETS = {
+    "workout_category": "workout_category",
+    "movement_category": "movement_category",
+    "major_muscle": "major_muscle",
+    "equipment": "equipment",
+    "specific_muscles": "specific_muscle",
+}
+
+
+class FacetIndex:
+    """One bitset per facet value over a sorted tuple of exercises.
+
+    Bit ``i`` of a value's bitset is set when the ``i``th exercise has that value, so a
+    filter is a few integer ANDs and ORs and a count is a ``bit_count``.
+    """
+
+    def __init__(self, exercises: Sequence[ExerciseResponseData]):
+        self.exercises = tuple(exercises)
+        self.everything = (1 << len(self.exercises)) - 1
+        self.bits: dict[str, dict[str, int]] = {facet: {} for facet in FACETS}
+        for position, exercise in enumerate(self.exercises):
+            bit = 1 << position
+            for facet in FACETS:
+                values = getattr(exercise, facet)
+                for value in (values or ()) if facet == "specific_muscles" else (values,):
+                    if value is not None:
+                        self.bits[facet][value] = self.bits[facet].get(value, 0) | bit
+
+    def facet_mask(self, facet: str, values: Sequence[str], match: FacetMatch = FacetMatch.ANY) -> int:
+        facet_bits = self.bits[facet]
+        if match == FacetMatch.ALL:
+            mask = self.everything
+            for value in values:
+                mask &= facet_bits.get(value, 0)
+            return mask
+        mask = 0
+        for value in values:
+            mask |= facet_bits.get(value, 0)
+        return mask
+
+    def select(self, mask: int) -> list[ExerciseResponseData]:
+        """The exercises whose bits are set in ``mask``, in snapshot order."""
+        selected = []
+        while mask:
+            lowest = mask & -mask
+            selected.append(self.exercises[lowest.bit_length() - 1])
+            mask ^= lowest
+        return selected
+
+
+class FacetFilters:
+    """Facet query parameters of the exercise list.
+
+    Values of one facet are ORed, different facets are ANDed. ``specific_muscles_match=all``
+    only keeps exercises working every listed specific muscle. Counts are returned whenever
+    a filter is given or ``facet_counts`` is set, and count each facet's values with the
+    other facets' filters applied.
+    """
+
+    def __init__(
+        self,
+        workout_category: list[str] | None = Query(default=None),
+        movement_category: list[str] | None = Query(default=None),
+        major_muscle: list[str] | None = Query(default=None),
+        equipment: list[str] | None = Query(default=None),
+        specific_muscles: list[str] | None = Query(default=None),
+        specific_muscles_match: FacetMatch = Query(default=FacetMatch.ANY),
+        facet_counts: bool = Query(default=False)
+    ):
+        self.selection = {
+            facet: values for facet, values in (
+                ("workout_category", workout_category),
+                ("movement_category", movement_category),
+                ("major_muscle", major_muscle),
+                ("equipment", equipment),
+                ("specific_muscles", specific_muscles),
+            ) if values
+        }
+        self.specific_muscles_match = specific_muscles_match
+        self.facet_counts = facet_counts
+
+    @property
+    def active(self) -> bool:
+        return bool(self.selection) or self.facet_counts
+
+    async def validate(self, session: AsyncSession) -> None:
+        reference = await reference_data.get(session)
+        for facet, values in self.selection.items():
+            for value in values:
+                reference.require_id(FACETS[facet], value)
+
+    def _masks(self, index: FacetIndex) -> dict[str, int]:
+        return {
+            facet: index.facet_mask(facet, values, self.specific_muscles_match if facet == "specific_muscles" else FacetMatch.ANY)
+            for facet, values in self.selection.items()
+        }
+
+    def apply(self, *indexes: FacetIndex) -> tuple[list[ExerciseResponseData], dict[str, dict[str, int]]]:
+        """Filter the exercises of ``indexes`` and count every facet value, merged in name order."""
+        selected = []
+        counts: dict[str, dict[str, int]] = {facet: {} for facet in FACETS}
+        for index in indexes:
+            masks = self._masks(index)
+            mask = index.everything
+            for facet_mask in masks.values():
+                mask &= facet_mask
+            selected.append(index.select(mask))
+            for facet in FACETS:
+                others = index.everything
+                for other, facet_mask in masks.items():
+                    if other != facet:
+                        others &= facet_mask
+                for value, bits in index.bits[facet].items():
+                    counts[facet][value] = counts[facet].get(value, 0) + (bits & others).bit_count()
+        return list(merge(*selected, key=exercise_sort_key)), {facet: dict(sorted(values.items())) for facet, values in counts.items()}
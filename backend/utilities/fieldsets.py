@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from fastapi import HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel import SQLModel
+
+from models.responses import ExerciseResponseData
+
+EXERCISE_FIELDS = frozenset(ExerciseResponseData.model_fields)
+
+
+@dataclass(frozen=True)
+class FieldSelection:
+    """The parsed ``fields`` query parameter.
+
+    ``fields`` holds the requested top-level fields and ``exercise`` the fields of the nested
+    exercise, or None when the client did not narrow them down. ``uuid`` is always returned.
+    """
+
+    fields: frozenset[str] | None = None
+    exercise: frozenset[str] | None = None
+
+    @property
+    def sparse(self) -> bool:
+        return self.fields is not None
+
+    @property
+    def exercise_fields(self) -> frozenset[str]:
+        return EXERCISE_FIELDS if self.exercise is None else self.exercise
+
+    def includes(self, field: str) -> bool:
+        return self.fields is None or field in self.fields
+
+    def columns(self, model: type[SQLModel], *always: Any) -> list[Any]:
+        """``always`` plus the requested fields that are plain columns of ``model``."""
+        names = {column.key for column in always}
+        return [*always, *(getattr(model, field) for field in sorted(self.fields or ()) if field in model.__table__.columns and field not in names)]
+
+    def row_data(self, row: Any, **related: Any) -> dict[str, Any]:
+        """The requested fields of ``row``, taking ``related`` fields (like the nested exercise) from the keyword arguments."""
+        return {field: related[field] if field in related else getattr(row, field) for field in self.fields}
+
+
+def field_selection(model: type[SQLModel], nested_exercise: bool = False) -> Callable[..., FieldSelection]:
+    """Dependency parsing ``fields`` for responses made of ``model``.
+
+    ``fields=uuid,name`` picks top-level fields. Endpoints with a nested exercise also take
+    ``exercise.<field>``, so ``fields=reps,exercise.uuid`` returns the exercise as a bare reference.
+    """
+    allowed = frozenset(model.model_fields)
+
+    def dependency(fields: str | None = Query(default=None, description="Comma separated fields to return, e.g. uuid,name")) -> FieldSelection:
+        if fields is None:
+            return FieldSelection()
+        top, exercise = {"uuid"}, set()
+        for field in filter(None, (field.strip() for field in fields.split(","))):
+            if nested_exercise and field.startswith("exercise."):
+                exercise.add(field.removeprefix("exercise."))
+                top.add("exercise")
+            else:
+                top.add(field)
+        invalid = sorted((top - allowed) | {f"exercise.{field}" for field in exercise - EXERCISE_FIELDS})
+        if invalid:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Fields {invalid} are not valid options. These are valid options: {sorted(allowed)}")
+        return FieldSelection(frozenset(top), frozenset(exercise | {"uuid"}) if exercise else None)
+
+    return dependency
+
+
+def sparse_response(response: Response, data: Iterable[dict[str, Any]] | dict[str, Any], detail: str, **extra: Any) -> JSONResponse:
+    """Serialize a sparse payload directly, keeping the headers the route set on ``response``."""
+    return JSONResponse(jsonable_encoder({"data": data, **extra, "detail": detail}), headers=dict(response.headers))
@@ -2,31 +2,32 @@ from typing import Any
 from uuid import UUID
 from sqlalchemy import Dialect
 from sqlalchemy.sql.type_api import TypeEngine
-from sqlalchemy.types import TypeDecorator, CHAR
-from sqlalchemy.dialects.sqlite import VARCHAR
+from sqlalchemy.types import TypeDecorator, BINARY
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
 
-    Uses CHAR(32) as the database type for the GUID.
+    Uses PostgreSQL's native UUID type, and a 16 byte BINARY column on other databases.
     """
 
-    impl = CHAR
+    impl = BINARY(16)
     cache_ok = True
-    
+
     def load_dialect_impl(self, dialect: Dialect) -> TypeEngine[Any]:
-        return dialect.type_descriptor(VARCHAR(36))
-    
-    def process_bind_param(self, value: Any | None, dialect: Dialect) -> str | None:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PostgresUUID(as_uuid=True))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value: Any | None, dialect: Dialect) -> UUID | bytes | None:
         if value is None:
             return value
         elif isinstance(value, UUID):
-            return str(value)
+            return value if dialect.name == "postgresql" else value.bytes
         raise ValueError("Value needs to be a UUID instance.")
-    
+
     def process_result_value(self, value: Any | None, dialect: Dialect) -> UUID | None:
-        """Convert string from SQLite to Python UUID."""
-        if value is None:
+        """Convert the stored value to a Python UUID."""
+        if value is None or isinstance(value, UUID):
             return value
-        return UUID(value)
-
+        return UUID(bytes=value)
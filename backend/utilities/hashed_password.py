@@ -1,10 +1,94 @@
-from typing import Any
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, TypeVar
+
+from decouple import config
+from fastapi import HTTPException, status
 from sqlalchemy import Dialect
 from sqlalchemy.sql.type_api import TypeEngine
 from sqlalchemy.types import TypeDecorator
 from sqlalchemy.dialects.sqlite import VARCHAR
 
-from bcrypt import hashpw, gensalt
+from bcrypt import hashpw, gensalt, checkpw
+
+PASSWORD_HASH_WORKERS = int(config("PASSWORD_HASH_WORKERS", default=min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(config("PASSWORD_HASH_MAX_PENDING", default=32))
+
+T = TypeVar("T")
+
+
+class PasswordHash(str):
+    """A bcrypt hash that has already been computed, so HashedPassword stores it as is."""
+
+
+def hash_password(plain_password: str) -> PasswordHash:
+    return PasswordHash(hashpw(plain_password.encode(), gensalt()).decode("utf-8"))
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+class PasswordHasherPool:
+    """Runs bcrypt on a small dedicated thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL, so the workers hash in parallel. Once ``max_pending`` operations
+    are running or queued, new ones are rejected with a 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many password requests in progress. Try again shortly.", headers={"Retry-After": "1"})
+            self.pending += 1
+        # Settled when the executor is done with the call, not when the caller stops waiting: a call
+        # abandoned by a disconnected client keeps its place in the admission bound while it still runs.
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def hash(self, plain_password: str) -> PasswordHash:
+        return await self.run(hash_password, plain_password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(check_password, plain_password, hashed_password)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": min(self.pending, self.max_workers),
+                "queue_depth": max(self.pending - self.max_workers, 0),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+
+password_hasher = PasswordHasherPool()
+
 
 class HashedPassword(TypeDecorator):
    
@@ -17,7 +101,9 @@ class HashedPassword(TypeDecorator):
     def process_bind_param(self, value: str | None, dialect: Dialect) -> str | None:
         if value is None:
             return value
-        return hashpw(value.encode(), gensalt()).decode("utf-8")
+        if not isinstance(value, PasswordHash):
+            value = hash_password(value)
+        return str(value)
     
     def process_result_value(self, value: str | None, dialect: Dialect) -> str | None:
         return value
@@ -0,0 +1,29 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a serialized response body."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names ``etag``."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def cached_json_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """Serve already serialized JSON, or a bodyless 304 when the client has this version."""
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": cache_control})
@@ -0,0 +1,79 @@
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Callable, Sequence, TypeVar
+
+from decouple import config
+from fastapi import HTTPException, Query, status
+from sqlalchemy import tuple_
+
+MAX_PAGE_SIZE = int(config("MAX_PAGE_SIZE", default=500))
+
+T = TypeVar("T")
+
+
+class PageParams:
+    """``limit`` and ``cursor`` query parameters shared by the list endpoints.
+
+    Without ``limit`` a list is returned whole, as it always was. ``cursor`` is the
+    ``next_cursor`` of the previous page.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str | None = Query(default=None)
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    def after(self, *converters: Callable[[Any], Any]) -> tuple | None:
+        """The sort key of the last item on the previous page, converted back with ``converters``."""
+        if self.cursor is None:
+            return None
+        try:
+            return decode_cursor(self.cursor, *converters)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+    def apply(self, statement, *columns, converters: Sequence[Callable[[Any], Any]]):
+        """Order ``statement`` by ``columns``, skip to the cursor and fetch one row past the page."""
+        after = self.after(*converters)
+        if after is not None:
+            statement = statement.where(tuple_(*columns) > tuple_(*after))
+        statement = statement.order_by(*columns)
+        if self.limit is not None:
+            statement = statement.limit(self.limit + 1)
+        return statement
+
+    def page(self, items: Sequence[T], key: Callable[[T], tuple]) -> tuple[list[T], str | None]:
+        """Cut a list fetched with ``apply`` down to the page and build the next cursor."""
+        if self.limit is None or len(items) <= self.limit:
+            return list(items), None
+        items = list(items[:self.limit])
+        return items, encode_cursor(*key(items[-1]))
+
+    def slice(self, items: Sequence[T], key: Callable[[T], tuple], *converters: Callable[[Any], Any]) -> tuple[list[T], str | None]:
+        """Page through a list already sorted by ``key`` in memory."""
+        after = self.after(*converters)
+        start = bisect_right(items, after, key=key) if after is not None else 0
+        end = start + self.limit + 1 if self.limit is not None else len(items)
+        return self.page(items[start:end], key)
+
+
+def encode_cursor(*values: Any) -> str:
+    body = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(body.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *converters: Callable[[Any], Any]) -> tuple:
+    """The values ``encode_cursor`` encoded, converted back with ``converters``. Raises ValueError if ``cursor`` is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(converters):
+            raise ValueError
+        return tuple(converter(value) for converter, value in zip(converters, values))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"Malformed cursor: {cursor!r}")
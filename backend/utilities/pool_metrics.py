@@ -0,0 +1,99 @@
+import logging
+import time
+from contextvars import ContextVar
+from threading import Lock
+from weakref import WeakKeyDictionary, WeakSet
+
+from decouple import config
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_WAIT_WARNING_SECONDS = float(config("DB_POOL_WAIT_WARNING_SECONDS", default=0.1))
+
+logger = logging.getLogger(__name__)
+
+# When the checkout being made in this context started, so the checkout event can tell how long it waited.
+_checkout_started: ContextVar[float | None] = ContextVar("checkout_started", default=None)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Marks when each checkout starts. The pool events only fire once a connection has been
+    handed out, so on their own they cannot tell how long the checkout waited."""
+
+    def connect(self):
+        token = _checkout_started.set(time.perf_counter())
+        try:
+            return super().connect()
+        finally:
+            _checkout_started.reset(token)
+
+
+class PoolMetrics:
+    """Records how long requests wait to get a database connection out of each engine's pool.
+
+    Checkouts are recorded from the ``checkout`` events of the engines passed to ``watch``, so
+    only requests that actually use the database check out a connection. Waits are timed on
+    ``TimedQueuePool``s, and the ones longer than ``warning_seconds`` are logged with the pool
+    status, so an exhausted pool shows up before checkouts start timing out.
+    """
+
+    def __init__(self, warning_seconds: float = DB_POOL_WAIT_WARNING_SECONDS):
+        self.warning_seconds = warning_seconds
+        self._lock = Lock()
+        self._watched: WeakSet[Engine] = WeakSet()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            # Checkouts, total wait, longest wait and slow checkouts of each engine.
+            self._counters: WeakKeyDictionary[Engine, list] = WeakKeyDictionary()
+
+    def watch(self, engine: Engine | AsyncEngine) -> None:
+        """Record every checkout from ``engine``'s pool, including the pools it recreates on dispose."""
+        engine = getattr(engine, "sync_engine", engine)
+        with self._lock:
+            if engine in self._watched:
+                return
+            self._watched.add(engine)
+
+        def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+            started = _checkout_started.get()
+            self.record(time.perf_counter() - started if started is not None else 0.0, engine)
+
+        event.listen(engine.pool, "checkout", on_checkout)
+
+    def record(self, wait: float, engine: Engine) -> None:
+        slow = wait > self.warning_seconds
+        with self._lock:
+            counters = self._counters.setdefault(engine, [0, 0.0, 0.0, 0])
+            counters[0] += 1
+            counters[1] += wait
+            counters[2] = max(counters[2], wait)
+            counters[3] += slow
+        if slow:
+            logger.warning("Waited %.3fs for a database connection. %s", wait, engine.pool.status())
+
+    def stats(self, engine: Engine | AsyncEngine) -> dict[str, int | float]:
+        engine = getattr(engine, "sync_engine", engine)
+        with self._lock:
+            checkouts, total_wait, max_wait, slow_checkouts = self._counters.get(engine, (0, 0.0, 0.0, 0))
+        data = {
+            "checkouts": checkouts,
+            "average_wait_ms": round(total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+            "max_wait_ms": round(max_wait * 1000, 3),
+            "slow_checkouts": slow_checkouts,
+            "warning_threshold_ms": self.warning_seconds * 1000,
+        }
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,81 @@
+import time
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import AsyncIterator
+
+from decouple import config
+from fastapi import Request
+from jose import JWTError, jwt
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+READ_YOUR_WRITES_SECONDS = float(config("READ_YOUR_WRITES_SECONDS", default=5))
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Key of ``AsyncSession.info`` holding the primary engine of a session that reads from the replica.
+PRIMARY_ENGINE = "primary_engine"
+
+
+def get_request_user_key(request: Request) -> str | None:
+    """The ``sub`` claim of the request's bearer token, without verifying it.
+
+    Only used to pick a database for the request; authentication still verifies the token.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+
+@asynccontextmanager
+async def primary_session(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """``session`` itself, or a short-lived session on the primary when ``session`` reads from the replica.
+
+    Process-wide caches are tagged with versions that writes bump, so they are built from here:
+    a snapshot read from a lagging replica would be kept under the new version until the next write.
+    """
+    primary_engine = session.info.get(PRIMARY_ENGINE)
+    if primary_engine is None:
+        yield session
+        return
+    async with AsyncSession(primary_engine, expire_on_commit=False) as primary:
+        yield primary
+
+
+class ReadYourWrites:
+    """Remembers which users wrote recently so their reads stay on the primary.
+
+    A user's reads go back to the replica once ``window`` seconds have passed since their
+    last write, which should comfortably exceed the replica's lag.
+    """
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS):
+        self.window = window
+        self._lock = Lock()
+        self._writes: dict[str, float] = {}
+
+    def record_write(self, user_key: str | None) -> None:
+        if user_key is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes[user_key] = now
+            if len(self._writes) > 1024:
+                self._writes = {key: written for key, written in self._writes.items() if now - written < self.window}
+
+    def use_replica(self, user_key: str | None) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            written = self._writes.get(user_key)
+            if written is not None and now - written >= self.window:
+                del self._writes[user_key]
+                written = None
+            return written is None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._writes.clear()
+
+
+read_your_writes = ReadYourWrites()
@@ -0,0 +1,145 @@
+import json
+import time
+from dataclasses import dataclass
+from threading import Lock
+
+from decouple import config
+from fastapi import HTTPException, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.enums import ReferenceDataKind
+from models.relationship_merge import (
+    WorkoutCategory, MovementCategory, MajorMuscle, SpecificMuscle, Equipment, BandColor, Role
+)
+from utilities.http_cache import make_etag
+from utilities.read_routing import primary_session
+
+REFERENCE_DATA_REFRESH_SECONDS = float(config("REFERENCE_DATA_REFRESH_SECONDS", default=300))
+REFERENCE_DATA_MAX_AGE = int(config("REFERENCE_DATA_MAX_AGE", default=3600))
+REFERENCE_DATA_CACHE_CONTROL = f"public, max-age={REFERENCE_DATA_MAX_AGE}"
+
+REFERENCE_MODELS = {
+    "workout_category": WorkoutCategory,
+    "movement_category": MovementCategory,
+    "major_muscle": MajorMuscle,
+    "specific_muscle": SpecificMuscle,
+    "equipment": Equipment,
+    "band_color": BandColor,
+    "role": Role,
+}
+
+INVALID_OPTION_LABELS = {
+    "workout_category": "Workout category",
+    "movement_category": "Movement category",
+    "major_muscle": "Major muscle",
+    "specific_muscle": "Specific Muscle",
+    "equipment": "Equipment",
+    "band_color": "Band color",
+    "role": "Role",
+}
+
+# Reference tables served by the public /reference-data endpoints, and the key each uses in the combined response.
+PUBLIC_REFERENCE_KINDS = {
+    ReferenceDataKind.WORKOUT_CATEGORIES: ("workout_category", "workout_categories", "Workout categories"),
+    ReferenceDataKind.MOVEMENT_CATEGORIES: ("movement_category", "movement_categories", "Movement categories"),
+    ReferenceDataKind.MAJOR_MUSCLES: ("major_muscle", "major_muscles", "Major muscles"),
+    ReferenceDataKind.SPECIFIC_MUSCLES: ("specific_muscle", "specific_muscles", "Specific muscles"),
+    ReferenceDataKind.EQUIPMENT: ("equipment", "equipment", "Equipment"),
+    ReferenceDataKind.BAND_COLORS: ("band_color", "band_colors", "Band colors"),
+}
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Immutable snapshot of the small lookup tables, keyed by ``REFERENCE_MODELS`` name."""
+
+    names: dict[str, dict[int, str]]
+    ids: dict[str, dict[str, int]]
+    payloads: dict[ReferenceDataKind | None, tuple[bytes, str]]
+
+    @classmethod
+    def from_names(cls, names: dict[str, dict[int, str]]) -> "ReferenceData":
+        """Build the lookups and the serialized response bodies with their ETags.
+
+        ``payloads`` is keyed by ReferenceDataKind, with None for the combined response.
+        """
+        def payload(data: object, detail: str) -> tuple[bytes, str]:
+            body = json.dumps({"data": data, "detail": detail}, separators=(",", ":")).encode()
+            return body, make_etag(body)
+
+        options = {reference_kind: list(names[kind].values()) for reference_kind, (kind, _, _) in PUBLIC_REFERENCE_KINDS.items()}
+        payloads = {
+            reference_kind: payload(options[reference_kind], f"{label} fetched successfully.")
+            for reference_kind, (_, _, label) in PUBLIC_REFERENCE_KINDS.items()
+        }
+        payloads[None] = payload(
+            {key: options[reference_kind] for reference_kind, (_, key, _) in PUBLIC_REFERENCE_KINDS.items()},
+            "Reference data fetched successfully."
+        )
+        return cls(
+            names=names,
+            ids={kind: {name: reference_id for reference_id, name in kind_names.items()} for kind, kind_names in names.items()},
+            payloads=payloads
+        )
+
+    def id(self, kind: str, name: str) -> int | None:
+        return self.ids[kind].get(name)
+
+    def valid_options(self, kind: str) -> list[str]:
+        return list(self.names[kind].values())
+
+    def require_id(self, kind: str, name: str) -> int:
+        """Id of ``name``, or a 404 listing the valid options like the routes always returned."""
+        reference_id = self.ids[kind].get(name)
+        if reference_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{INVALID_OPTION_LABELS[kind]} '{name}' is not a valid option. These are valid options: {self.valid_options(kind)}"
+            )
+        return reference_id
+
+
+class ReferenceDataRegistry:
+    """Process-wide copy of categories, muscles, equipment, band colors and roles.
+
+    These tables only change when the catalog is seeded, so they are loaded once and
+    served from memory. ``invalidate`` forces a reload, and the snapshot is also reloaded
+    after ``ttl`` seconds so a seed run by another process is picked up.
+    """
+
+    def __init__(self, ttl: float = REFERENCE_DATA_REFRESH_SECONDS):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._generation = 0
+        self.clear()
+
+    def clear(self) -> None:
+        self.invalidate()
+        with self._lock:
+            self.loads = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data: tuple[ReferenceData, float] | None = None
+            self._generation += 1
+
+    async def get(self, session: AsyncSession) -> ReferenceData:
+        with self._lock:
+            cached = self._data
+            generation = self._generation
+        if cached is not None and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        names = {}
+        async with primary_session(session) as primary:
+            for kind, model in REFERENCE_MODELS.items():
+                names[kind] = dict((await primary.exec(select(model.id, model.name).order_by(model.id))).all())
+        data = ReferenceData.from_names(names)
+        with self._lock:
+            if generation == self._generation:
+                self._data = (data, time.monotonic())
+            self.loads += 1
+        return data
+
+
+reference_data = ReferenceDataRegistry()
@@ -0,0 +1,86 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from heapq import merge, nsmallest
+from itertools import islice
+from math import log
+from typing import Sequence
+
+from models.responses import ExerciseResponseData
+from utilities.exercise_loader import exercise_sort_key
+
+TOKEN = re.compile(r"[a-z0-9]+")
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+
+
+def tokenize(text: str | None) -> list[str]:
+    return TOKEN.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """Inverted index over exercise names and descriptions.
+
+    Each token maps to the exercises containing it with a precomputed tf-idf score, name
+    matches weighing more than description matches. Like ``plainto_tsquery`` on Postgres,
+    an exercise must contain every query term to match.
+    """
+
+    def __init__(self, exercises: Sequence[ExerciseResponseData]):
+        self.exercises = tuple(exercises)
+        frequencies: dict[str, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        for position, exercise in enumerate(self.exercises):
+            for weight, text in ((NAME_WEIGHT, exercise.name), (DESCRIPTION_WEIGHT, exercise.description)):
+                for token in tokenize(text):
+                    frequencies[token][position] += weight
+        self._postings = {
+            token: {position: frequency * log(1 + len(self.exercises) / len(postings)) for position, frequency in postings.items()}
+            for token, postings in frequencies.items()
+        }
+
+    def search(self, query: str) -> list[tuple[float, ExerciseResponseData]]:
+        """Every exercise matching all terms of ``query``, with its score, in no particular order."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        scores: dict[int, float] | None = None
+        # Intersect from the rarest term so the candidate set only shrinks.
+        for term in sorted(terms, key=lambda term: len(self._postings.get(term, ()))):
+            postings = self._postings.get(term)
+            if not postings:
+                return []
+            if scores is None:
+                scores = dict(postings)
+            else:
+                scores = {position: score + postings[position] for position, score in scores.items() if position in postings}
+            if not scores:
+                return []
+        return [(score, self.exercises[position]) for position, score in scores.items()]
+
+
+def top_matches(query: str, limit: int, *indexes: SearchIndex) -> list[ExerciseResponseData]:
+    """The ``limit`` best matches for ``query`` across ``indexes``, ties broken by name."""
+    matches = (match for index in indexes for match in index.search(query))
+    return [exercise for _, exercise in nsmallest(limit, matches, key=lambda match: (-match[0], exercise_sort_key(match[1])))]
+
+
+class PrefixIndex:
+    """Exercise names in casefolded order, for prefix lookups with two binary searches."""
+
+    def __init__(self, exercises: Sequence[ExerciseResponseData]):
+        entries = sorted(((exercise.name.casefold(), str(exercise.uuid)), exercise) for exercise in exercises)
+        self._keys = [key for key, _ in entries]
+        self._exercises = [exercise for _, exercise in entries]
+
+    def complete(self, prefix: str, limit: int) -> list[tuple[tuple[str, str], ExerciseResponseData]]:
+        """The first ``limit`` exercises whose names start with ``prefix``, ignoring case, in name order."""
+        prefix = prefix.casefold()
+        start = bisect_left(self._keys, (prefix,))
+        end = min(bisect_left(self._keys, (prefix + "\U0010ffff",), lo=start), start + limit)
+        return list(zip(self._keys[start:end], self._exercises[start:end]))
+
+
+def complete_prefix(prefix: str, limit: int, *indexes: PrefixIndex) -> list[ExerciseResponseData]:
+    """The first ``limit`` exercises across ``indexes`` whose names start with ``prefix``."""
+    matches = merge(*(index.complete(prefix, limit) for index in indexes), key=lambda match: match[0])
+    return [exercise for _, exercise in islice(matches, limit)]
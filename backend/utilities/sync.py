@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+from uuid import UUID
+
+from decouple import config
+from fastapi import HTTPException, Query, status
+from sqlalchemy import delete, insert, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.enums import SyncKind
+from models.relationship_merge import DeletedRecord, ExerciseLog, Workout, WorkoutExercise, WorkoutExerciseWorkoutOrderLink
+from utilities.pagination import decode_cursor, encode_cursor
+from utilities.timestamps import utcnow
+
+SYNC_TOMBSTONE_DAYS = int(config("SYNC_TOMBSTONE_DAYS", default=90))
+
+# updated_at is set when a change is flushed, a moment before it commits. Syncs look back this far
+# so a change committed just after a token was issued is still picked up. Clients upsert by uuid,
+# so seeing a row twice is harmless.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class SyncParams:
+    """``since`` query parameter of the lists that support delta sync.
+
+    Every such list carries a ``sync_token``. Passing it back as ``since`` returns only the rows
+    created or changed after it was issued, and the uuids of rows deleted since in ``deleted``.
+    When paging, keep the token of the first page. Tokens older than SYNC_TOMBSTONE_DAYS are
+    refused with a 410, since the tombstones they need are gone, and the list must be fetched again.
+    """
+
+    def __init__(self, since: str | None = Query(default=None, description="sync_token of an earlier response")):
+        self.since = since
+        # Taken before the list is read, so nothing committed after it is missed next time.
+        self.issued_at = utcnow()
+
+    @property
+    def token(self) -> str:
+        return encode_cursor(self.issued_at)
+
+    def after(self) -> datetime | None:
+        if self.since is None:
+            return None
+        try:
+            (since,) = decode_cursor(self.since, datetime.fromisoformat)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token.")
+        if since < self.issued_at - timedelta(days=SYNC_TOMBSTONE_DAYS):
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Sync token expired. Fetch the full list again.")
+        return since - SYNC_OVERLAP
+
+    def changed(self, updated_at: Any) -> list[Any]:
+        """Filters keeping the rows changed since the token, none without one."""
+        since = self.after()
+        return [] if since is None else [updated_at >= since]
+
+    async def deleted(self, session: AsyncSession, user_id: int, kind: SyncKind) -> list[UUID] | None:
+        since = self.after()
+        if since is None:
+            return None
+        return list((await session.exec(
+            select(DeletedRecord.uuid)
+            .where(DeletedRecord.user_id == user_id, DeletedRecord.kind == kind.value, DeletedRecord.deleted_at >= since)
+        )).all())
+
+
+def touch(*rows: Any) -> None:
+    """Mark ``rows`` changed when what their responses show changed without their own columns changing."""
+    now = utcnow()
+    for row in rows:
+        row.updated_at = now
+
+
+async def touch_workouts_containing(session: AsyncSession, workout_exercise_ids: Iterable[int]) -> None:
+    """Mark the workouts listing any of ``workout_exercise_ids`` changed, since their responses embed them."""
+    await session.exec(
+        update(Workout)
+        .where(Workout.id.in_(
+            select(WorkoutExerciseWorkoutOrderLink.workout_id)
+            .where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id.in_(list(workout_exercise_ids)))
+        ))
+        .values(updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def touch_rows_embedding_exercise(session: AsyncSession, exercise_id: int) -> None:
+    """Mark the exercise logs and workout exercises of an edited exercise changed, and the workouts
+    listing those workout exercises, since all of their responses embed the exercise."""
+    now = utcnow()
+    workout_exercise_ids = select(WorkoutExercise.id).where(WorkoutExercise.exercise_id == exercise_id)
+    await session.exec(
+        update(Workout)
+        .where(Workout.id.in_(
+            select(WorkoutExerciseWorkoutOrderLink.workout_id)
+            .where(WorkoutExerciseWorkoutOrderLink.workout_exercise_id.in_(workout_exercise_ids))
+        ))
+        .values(updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    for model in (ExerciseLog, WorkoutExercise):
+        await session.exec(update(model).where(model.exercise_id == exercise_id).values(updated_at=now).execution_options(synchronize_session=False))
+
+
+async def touch_workout_exercises_in(session: AsyncSession, workout_id: int) -> None:
+    """Mark the workout exercises listed in a workout changed, since their exercise_order comes from it."""
+    await session.exec(
+        update(WorkoutExercise)
+        .where(WorkoutExercise.id.in_(
+            select(WorkoutExerciseWorkoutOrderLink.workout_exercise_id)
+            .where(WorkoutExerciseWorkoutOrderLink.workout_id == workout_id)
+        ))
+        .values(updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def record_deletions(session: AsyncSession, kind: SyncKind, records: Iterable[tuple[int, UUID]]) -> None:
+    """Journal the ``(user_id, uuid)`` of deleted rows and drop that user's expired tombstones."""
+    now = utcnow()
+    rows = [{"user_id": user_id, "kind": kind.value, "uuid": uuid, "deleted_at": now} for user_id, uuid in records]
+    if not rows:
+        return
+    await session.exec(insert(DeletedRecord), params=rows)
+    await session.exec(
+        delete(DeletedRecord)
+        .where(DeletedRecord.user_id.in_({row["user_id"] for row in rows}), DeletedRecord.deleted_at < now - timedelta(days=SYNC_TOMBSTONE_DAYS))
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+from typing import Annotated
+
+from pydantic import AfterValidator
+
+
+def utcnow() -> datetime:
+    """The current UTC time as a naive datetime, matching the timestamp columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def as_naive_utc(moment: datetime | None) -> datetime | None:
+    """``moment`` converted to UTC and stripped of its offset. The timestamp columns are
+    ``timestamp without time zone``, which asyncpg refuses tz-aware values for."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# For query parameters compared against the timestamp columns.
+NaiveUTCDatetime = Annotated[datetime, AfterValidator(as_naive_utc)]
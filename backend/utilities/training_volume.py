@@ -0,0 +1,145 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models.relationship_merge import DailyExerciseVolume, Exercise, ExerciseLog, User, WeeklyMuscleVolume
+
+DAILY_KEY = ("user_id", "day", "exercise_id")
+WEEKLY_KEY = ("user_id", "week_start", "major_muscle_id")
+TOTALS = ("sets", "reps", "tonnage")
+
+Totals = dict[tuple, list]
+# Longest span the volume endpoints return at once, so a dashboard read stays bounded.
+MAX_VOLUME_RANGE_DAYS = 731
+
+
+class LoggedSet(NamedTuple):
+    """The fields of an exercise log that the volume summaries depend on."""
+
+    user_id: int
+    exercise_id: int
+    datetime_completed: datetime
+    reps: int
+    weight: float
+
+    @classmethod
+    def from_log(cls, exercise_log: ExerciseLog) -> "LoggedSet":
+        return cls(exercise_log.user_id, exercise_log.exercise_id, exercise_log.datetime_completed, exercise_log.reps, exercise_log.weight)
+
+
+def week_start(day: date) -> date:
+    """The Monday starting ``day``'s ISO week."""
+    return day - timedelta(days=day.weekday())
+
+
+def _add(totals: Totals, key: tuple, sign: int, sets: int, reps: int, tonnage: float) -> None:
+    entry = totals.setdefault(key, [0, 0, 0.0])
+    entry[0] += sign * sets
+    entry[1] += sign * reps
+    entry[2] += sign * tonnage
+
+
+def volume_deltas(removed: Iterable[LoggedSet], added: Iterable[LoggedSet], major_muscles: dict[int, int | None]) -> tuple[Totals, Totals]:
+    """How the daily and weekly summaries change when ``removed`` sets are taken out and ``added`` ones put in."""
+    daily: Totals = {}
+    weekly: Totals = {}
+    for sign, logged_sets in ((-1, removed), (1, added)):
+        for logged_set in logged_sets:
+            day = logged_set.datetime_completed.date()
+            tonnage = logged_set.reps * logged_set.weight
+            _add(daily, (logged_set.user_id, day, logged_set.exercise_id), sign, 1, logged_set.reps, tonnage)
+            if (major_muscle_id := major_muscles.get(logged_set.exercise_id)) is not None:
+                _add(weekly, (logged_set.user_id, week_start(day), major_muscle_id), sign, 1, logged_set.reps, tonnage)
+    # An edit that keeps a set in the same buckets cancels out.
+    return (
+        {key: entry for key, entry in daily.items() if any(entry)},
+        {key: entry for key, entry in weekly.items() if any(entry)},
+    )
+
+
+def _rows(key_columns: tuple[str, ...], totals: Totals) -> list[dict]:
+    return [dict(zip(key_columns + TOTALS, (*key, *entry))) for key, entry in totals.items()]
+
+
+async def _upsert(session: AsyncSession, model: type[SQLModel], key_columns: tuple[str, ...], deltas: Totals) -> None:
+    """Add ``deltas`` to the rows of ``model`` in SQL, so concurrent writers never overwrite each other's
+    totals, then drop the rows that reached zero sets."""
+    if not deltas:
+        return
+    table = model.__table__
+    dialect_insert = postgresql_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    statement = dialect_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={column: table.c[column] + statement.excluded[column] for column in TOTALS},
+    )
+    await session.exec(statement, params=_rows(key_columns, deltas))
+    if any(entry[0] < 0 for entry in deltas.values()):
+        await session.exec(delete(table).where(table.c.user_id.in_({key[0] for key in deltas}), table.c.sets <= 0))
+
+
+async def apply_volume_changes(session: AsyncSession, removed: Iterable[LoggedSet] = (), added: Iterable[LoggedSet] = ()) -> None:
+    """Fold sets that were deleted (or edited away) and created (or edited in) into the summaries.
+    Call before committing the exercise log change, so both land in the same transaction."""
+    removed, added = list(removed), list(added)
+    if not removed and not added:
+        return
+    exercise_ids = {logged_set.exercise_id for logged_set in (*removed, *added)}
+    major_muscles = dict((await session.exec(select(Exercise.id, Exercise.major_muscle_id).where(Exercise.id.in_(exercise_ids)))).all())
+    daily, weekly = volume_deltas(removed, added, major_muscles)
+    await _upsert(session, DailyExerciseVolume, DAILY_KEY, daily)
+    await _upsert(session, WeeklyMuscleVolume, WEEKLY_KEY, weekly)
+
+
+async def move_exercise_volume(session: AsyncSession, exercise_id: int, old_major_muscle_id: int | None, new_major_muscle_id: int | None) -> None:
+    """Move an exercise's weekly volume to its new major muscle, working from its daily rows so
+    no exercise logs are read. A new major muscle of None drops the volume from the weekly summary."""
+    if old_major_muscle_id == new_major_muscle_id:
+        return
+    daily_rows = (await session.exec(
+        select(DailyExerciseVolume.user_id, DailyExerciseVolume.day, DailyExerciseVolume.sets, DailyExerciseVolume.reps, DailyExerciseVolume.tonnage)
+        .where(DailyExerciseVolume.exercise_id == exercise_id)
+    )).all()
+    weekly: Totals = {}
+    for user_id, day, sets, reps, tonnage in daily_rows:
+        for sign, major_muscle_id in ((-1, old_major_muscle_id), (1, new_major_muscle_id)):
+            if major_muscle_id is not None:
+                _add(weekly, (user_id, week_start(day), major_muscle_id), sign, sets, reps, tonnage)
+    await _upsert(session, WeeklyMuscleVolume, WEEKLY_KEY, weekly)
+
+
+async def remove_exercise_volume(session: AsyncSession, exercise: Exercise) -> None:
+    """Take a deleted exercise's logs out of both summaries."""
+    await move_exercise_volume(session, exercise.id, exercise.major_muscle_id, None)
+    await session.exec(delete(DailyExerciseVolume).where(DailyExerciseVolume.exercise_id == exercise.id))
+
+
+def rebuild_training_volume(session: Session, user_ids: Iterable[int] | None = None) -> int:
+    """Recompute the summaries of ``user_ids`` (every user when None) from their exercise logs,
+    committing once per user. Returns how many logs were summarized.
+
+    Meant for backfills and repairs while the app is not writing logs: a log written for a user
+    while their summaries are being rebuilt can fail or leave them off until the next rebuild.
+    """
+    major_muscles = dict(session.exec(select(Exercise.id, Exercise.major_muscle_id)).all())
+    if user_ids is None:
+        user_ids = session.exec(select(User.id).order_by(User.id)).all()
+    summarized = 0
+    for user_id in user_ids:
+        logged_sets = [LoggedSet(*row) for row in session.exec(
+            select(ExerciseLog.user_id, ExerciseLog.exercise_id, ExerciseLog.datetime_completed, ExerciseLog.reps, ExerciseLog.weight)
+            .where(ExerciseLog.user_id == user_id)
+        ).all()]
+        daily, weekly = volume_deltas((), logged_sets, major_muscles)
+        for model, key_columns, totals in ((DailyExerciseVolume, DAILY_KEY, daily), (WeeklyMuscleVolume, WEEKLY_KEY, weekly)):
+            session.exec(delete(model).where(model.user_id == user_id))
+            if totals:
+                session.exec(insert(model.__table__), params=_rows(key_columns, totals))
+        session.commit()
+        summarized += len(logged_sets)
+    return summarized
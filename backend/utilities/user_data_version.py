@@ -0,0 +1,38 @@
+import hashlib
+import secrets
+
+from fastapi import Request, Response
+
+from models.relationship_merge import User
+from utilities.exercise_catalog import exercise_catalog
+from utilities.http_cache import etag_matches, not_modified
+
+USER_DATA_CACHE_CONTROL = "private, no-cache"
+
+# The catalog version restarts at 0 with the process, so ETags from an earlier process must never match.
+_PROCESS_TAG = secrets.token_hex(4)
+
+
+def record_user_write(user: User) -> None:
+    """Bump ``user``'s data_version. Call before committing any change to their exercises, workouts,
+    workout exercises or exercise logs so their list ETags change with it.
+
+    The increment runs in SQL, so two concurrent writes never end on the same version.
+    """
+    user.data_version = User.data_version + 1
+
+
+def user_list_etag(request: Request, user: User) -> str:
+    query = hashlib.sha256(request.url.query.encode()).hexdigest()[:8]
+    return f'"{_PROCESS_TAG}-{exercise_catalog.catalog_version}-{user.data_version}-{query}"'
+
+
+def conditional_user_list(request: Request, response: Response, user: User) -> Response | None:
+    """A 304 when the client already has the current version of this list, otherwise None after
+    adding the ETag to ``response``. Only uses the already loaded user, so a 304 costs no queries."""
+    etag = user_list_etag(request, user)
+    if etag_matches(request, etag):
+        return not_modified(etag, USER_DATA_CACHE_CONTROL)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = USER_DATA_CACHE_CONTROL
+    return None